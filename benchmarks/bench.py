@@ -0,0 +1,187 @@
+from typing import *
+from dataclasses import dataclass, field
+import argparse
+import glob
+import os
+import os.path
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import lambda_compiler.bundled_files as bf
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES_DIR = os.path.join(os.path.dirname(BENCH_DIR), "examples")
+STATS_SRC = os.path.join(BENCH_DIR, "stats.c")
+
+STATS_OPT = "-Oz -fno-inline -ffunction-sections -fdata-sections"
+STATS_DEFS = "-DLAMBDA_POOL=0"
+STATS_WRAP = "-Wl,--wrap=lambda_ref,--wrap=lambda_unref,--wrap=putchar"
+TIME_WRAP = "-Wl,--wrap=putchar"
+
+@dataclass
+class Workload:
+    example: str
+    stdin: bytes = b""
+    stdin_file: Optional[str] = None
+    lines: int = 0
+
+    def read_stdin(self) -> bytes:
+        if self.stdin_file is None:
+            return self.stdin
+
+        with open(os.path.join(EXAMPLES_DIR, self.example, self.stdin_file), "rb") as f:
+            return f.read()
+
+WORKLOADS = {
+    "hello": Workload("hello"),
+    "objects": Workload("objects"),
+    "echo": Workload("echo", stdin = b"the quick brown fox jumps over the lazy dog\n"),
+    "crackme": Workload("crackme", stdin = b"LosCTF{Church_0bfUsC4t10n}\n"),
+    "brainfuck": Workload("brainfuck", stdin_file = "hello.bf"),
+    "primes": Workload("primes", lines = 30),
+    "binprimes": Workload("binprimes", lines = 30),
+}
+
+@dataclass
+class Result:
+    workload: Workload
+    static: Dict[str, int] = field(default_factory = dict)
+    dynamic: Dict[str, int] = field(default_factory = dict)
+    seconds: Optional[float] = None
+
+def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
+    ap = argparse.ArgumentParser(
+        description = "benchmark allocation, refcount traffic, and runtime of the example programs"
+    )
+
+    ap.add_argument("examples", help = "the examples to benchmark (default: all)", nargs = "*")
+    ap.add_argument("-m", "--make", action = "append", default = [], help = "pass a VAR=VALUE override to make")
+    ap.add_argument("-t", "--time", action = "store_true", default = False, help = "measure runtime instead of allocation and refcount statistics")
+    ap.add_argument("-r", "--repeat", type = int, default = 5, help = "number of timed runs, the fastest is reported")
+    ap.add_argument("-l", "--lines", type = int, help = "override the number of lines non-terminating examples may print")
+    ap.add_argument("-i", "--inline-threshold", type = int, help = "build with this HLIR inlining threshold, 0 disables inlining")
+    ap.add_argument("-n", "--native-numbers", action = "store_true", default = False, help = "build with native machine integer numbers")
+    ap.add_argument("-k", "--keep", action = "store_true", default = False, help = "keep the build directories")
+
+    return ap, ap.parse_args()
+
+def write_native_numbers(project: str):
+    for bundled in [bf.std_native_lambda, bf.io_native_lambda, bf.io_native_c, bf.num_c]:
+        with open(os.path.join(project, bundled.filename), "w") as f:
+            f.write(bundled.source)
+
+def build(workload: Workload, make_args: List[str], timed: bool, native_numbers: bool, keep: bool) -> Tuple[str, str]:
+    build_root = tempfile.mkdtemp(prefix = f"lambda-bench-{workload.example}-")
+    project = os.path.join(build_root, workload.example)
+    shutil.copytree(os.path.join(EXAMPLES_DIR, workload.example), project, ignore = shutil.ignore_patterns("build"))
+
+    if native_numbers:
+        write_native_numbers(project)
+        make_args = ["H_FLAGS=--native-numbers"] + make_args
+
+    # stats.c is compiled against the same lambda.h configuration as the runtime
+    defs = [arg.split("=", 1)[1] for arg in make_args if arg.startswith("C_DEFS=")]
+    if not timed:
+        defs.insert(0, STATS_DEFS)
+
+    clang = os.environ.get("CLANG", "clang")
+    args = [f"CLANG={clang}"]
+    if not timed:
+        args.append(f"C_OPT={STATS_OPT}")
+    args += [arg for arg in make_args if not arg.startswith("C_DEFS=")]
+    args.append("C_DEFS=" + " ".join(defs))
+
+    subprocess.run(["make", "-s", "-C", project] + args, check = True, stdout = subprocess.DEVNULL)
+
+    flags = ["-O2", "-Isrc"] + " ".join(defs).split()
+    if timed:
+        flags += ["-DLAMBDA_STATS_LINES_ONLY", TIME_WRAP]
+    else:
+        flags += [STATS_WRAP]
+
+    binary = os.path.join(project, "build", "bench")
+    objects = sorted(glob.glob(os.path.join(project, "build", "*.o")))
+    subprocess.run([clang] + flags + ["-o", binary] + objects + [STATS_SRC], check = True, cwd = project)
+
+    if keep:
+        print(f"info: keeping build of {workload.example} in {build_root}", file = sys.stderr)
+
+    return build_root, binary
+
+def count_static(build_root: str) -> Dict[str, int]:
+    counts = { "ref_sites": 0, "unref_sites": 0, "alloc_sites": 0 }
+    for ll in glob.glob(os.path.join(build_root, "*", "build", "*.ll")):
+        with open(ll) as f:
+            for line in f:
+                if "call void @lambda_ref(" in line:
+                    counts["ref_sites"] += 1
+                elif "call void @lambda_unref(" in line:
+                    counts["unref_sites"] += 1
+                elif "call %lambda* @lambda_alloc(" in line or "call %lambda_cont* @lambda_cont_alloc(" in line:
+                    counts["alloc_sites"] += 1
+    return counts
+
+def run(workload: Workload, binary: str, lines: Optional[int]) -> Tuple[float, str]:
+    env = dict(os.environ)
+    env["LAMBDA_STATS_LINES"] = str(workload.lines if lines is None or workload.lines == 0 else lines)
+
+    start = time.perf_counter()
+    proc = subprocess.run([binary], input = workload.read_stdin(), env = env, capture_output = True, check = True)
+    seconds = time.perf_counter() - start
+
+    return seconds, proc.stderr.decode()
+
+def benchmark(workload: Workload, args: argparse.Namespace) -> Result:
+    result = Result(workload)
+    build_root, binary = build(workload, args.make, args.time, args.native_numbers, args.keep)
+
+    try:
+        if args.time:
+            result.seconds = min(run(workload, binary, args.lines)[0] for _ in range(args.repeat))
+        else:
+            result.static = count_static(build_root)
+            _, stats = run(workload, binary, args.lines)
+            for key, value in re.findall(r"(\w+)=(\d+)", stats):
+                result.dynamic[key] = int(value)
+    finally:
+        if not args.keep:
+            shutil.rmtree(build_root)
+
+    return result
+
+def print_results(results: List[Result], timed: bool):
+    if timed:
+        print(f"{'example':<12} {'seconds':>10}")
+        for result in results:
+            print(f"{result.workload.example:<12} {result.seconds:>10.4f}")
+        return
+
+    columns = ["ref_sites", "unref_sites", "alloc_sites", "allocs", "frees", "peak_bytes", "refs", "unrefs", "refcount_writes", "peak_rss_kb"]
+    widths = [max(12, len(column)) for column in columns]
+    print(f"{'example':<12} " + " ".join(f"{column:>{width}}" for column, width in zip(columns, widths)))
+    for result in results:
+        values = result.static | result.dynamic
+        print(f"{result.workload.example:<12} " + " ".join(f"{values.get(column, 0):>{width}}" for column, width in zip(columns, widths)))
+
+def main():
+    ap, args = parse_args()
+
+    examples = args.examples or list(WORKLOADS)
+    for example in examples:
+        if example not in WORKLOADS:
+            print(f"error: unknown example '{example}'", file = sys.stderr)
+            print("info: known examples: " + ", ".join(WORKLOADS), file = sys.stderr)
+            sys.exit(1)
+
+    if args.inline_threshold is not None:
+        args.make = [f"M_FLAGS=--inline-threshold={args.inline_threshold}"] + args.make
+
+    results = [benchmark(WORKLOADS[example], args) for example in examples]
+    print_results(results, args.time)
+
+if __name__ == "__main__":
+    main()
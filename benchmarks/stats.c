@@ -0,0 +1,135 @@
+#include <stddef.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+#include "lambda.h"
+
+// allocation and refcount statistics hooks for benchmarking lambda programs
+//
+// overrides the weak lambda_mem_alloc and lambda_mem_free hooks of the lambda
+// runtime and wraps lambda_ref, lambda_unref, and putchar using the linker
+// flags -Wl,--wrap=lambda_ref,--wrap=lambda_unref,--wrap=putchar
+//
+// the environment variable LAMBDA_STATS_LINES limits the number of lines the
+// program may print before it is stopped, which bounds non-terminating
+// programs like examples/primes
+//
+// defining LAMBDA_STATS_LINES_ONLY keeps only the line limit, which is used
+// for timing runs that should not be slowed down by the statistics hooks
+
+static size_t stats_allocs;
+static size_t stats_frees;
+static size_t stats_live_bytes;
+static size_t stats_peak_bytes;
+static size_t stats_refs;
+static size_t stats_unrefs;
+static size_t stats_refcount_writes;
+static size_t stats_lines;
+static size_t stats_max_lines;
+
+// the peak resident set size of the process in kilobytes, read from VmHWM as
+// the ru_maxrss of getrusage also covers the process image before execve
+static long stats_peak_rss_kb(void) {
+    FILE* status = fopen("/proc/self/status", "r");
+    if (status == NULL) {
+        return 0;
+    }
+
+    long peak_rss_kb = 0;
+    char line[256];
+    while (fgets(line, sizeof line, status) != NULL) {
+        if (sscanf(line, "VmHWM: %ld kB", &peak_rss_kb) == 1) {
+            break;
+        }
+    }
+
+    fclose(status);
+    return peak_rss_kb;
+}
+
+static void stats_print(void) {
+    fflush(stdout);
+#ifndef LAMBDA_STATS_LINES_ONLY
+    fprintf(stderr,
+        "lambda-stats: allocs=%zu frees=%zu peak_bytes=%zu refs=%zu unrefs=%zu refcount_writes=%zu peak_rss_kb=%ld\n",
+        stats_allocs, stats_frees, stats_peak_bytes, stats_refs, stats_unrefs, stats_refcount_writes, stats_peak_rss_kb()
+    );
+#endif
+}
+
+__attribute__((constructor))
+static void stats_init(void) {
+    const char* max_lines = getenv("LAMBDA_STATS_LINES");
+    if (max_lines != NULL) {
+        stats_max_lines = strtoul(max_lines, NULL, 10);
+    }
+
+    atexit(stats_print);
+}
+
+#ifndef LAMBDA_STATS_LINES_ONLY
+// counts the refcount updates that actually write to memory, lambdas are never
+// immortal when building against a runtime without immortal instances
+static int stats_is_immortal(lambda* l) {
+#ifdef LAMBDA_IMMORTAL
+    return LAMBDA_IS_IMMORTAL(l);
+#else
+    (void) l;
+    return 0;
+#endif
+}
+
+void* lambda_mem_alloc(size_t size) {
+    size_t* mem = malloc(sizeof (size_t) + size);
+    if (mem == NULL) {
+        lambda_abort();
+    }
+
+    stats_allocs++;
+    stats_live_bytes += size;
+    if (stats_live_bytes > stats_peak_bytes) {
+        stats_peak_bytes = stats_live_bytes;
+    }
+
+    *mem = size;
+    return mem + 1;
+}
+
+void lambda_mem_free(void* mem) {
+    size_t* header = (size_t*)mem - 1;
+
+    stats_frees++;
+    stats_live_bytes -= *header;
+
+    free(header);
+}
+
+void __real_lambda_ref(lambda* l, size_t count);
+void __wrap_lambda_ref(lambda* l, size_t count) {
+    stats_refs++;
+    if (!stats_is_immortal(l)) {
+        stats_refcount_writes++;
+    }
+    __real_lambda_ref(l, count);
+}
+
+void __real_lambda_unref(lambda* l);
+void __wrap_lambda_unref(lambda* l) {
+    stats_unrefs++;
+    if (l->header.refcount > 1 && !stats_is_immortal(l)) {
+        stats_refcount_writes++;
+    }
+    __real_lambda_unref(l);
+}
+#endif
+
+int __real_putchar(int c);
+int __wrap_putchar(int c) {
+    int ret = __real_putchar(c);
+
+    if (c == '\n' && stats_max_lines != 0 && ++stats_lines >= stats_max_lines) {
+        exit(0);
+    }
+
+    return ret;
+}
@@ -0,0 +1,340 @@
+#ifndef _LAMBDA_H
+#define _LAMBDA_H
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdnoreturn.h>
+
+// the lambda header layout
+// can be overridden by defining it when compiling the runtime
+//
+// LAMBDA_COMPACT_HEADER packs the refcount, the number of captures, and the
+// userdata length into 64 bits instead of three words (default 0)
+//
+// must match the target of lambda-mlir2llir and lambda-mlir2main, the compact
+// layout is selected with the -compact targets, from which the Makefile
+// derives the define, for example:
+// make L_TARGET=x86_64-compact
+#ifndef LAMBDA_COMPACT_HEADER
+#define LAMBDA_COMPACT_HEADER 0
+#endif
+
+// the header layout the runtime was compiled for
+// defined by the lambda runtime
+//
+// generated code refers to the symbol of the layout of its target, so linking
+// it against a runtime compiled for the other layout fails
+#if LAMBDA_COMPACT_HEADER
+extern const char lambda_abi_compact_header;
+#else
+extern const char lambda_abi_word_header;
+#endif
+
+typedef struct lambda lambda;
+typedef struct lambda_header lambda_header;
+typedef struct lambda_cont lambda_cont;
+typedef lambda* lambda_impl(lambda* arg, lambda* self, lambda_cont* cont);
+typedef void lambda_destructor(void * userdata);
+
+// the header of a lambda function object
+struct lambda_header {
+#if LAMBDA_COMPACT_HEADER
+    uint32_t refcount;
+    uint16_t len_captures;
+    uint16_t len_userdata;
+#else
+    size_t refcount;
+    size_t len_captures;
+    size_t len_userdata;
+#endif
+    union {
+        lambda_impl* impl;
+        lambda* tail;
+    };
+};
+
+// the lambda function object type
+// a lambda function object with lexical captures and potentially user data
+struct lambda {
+    lambda_header header;
+    lambda* captures[];
+};
+
+// the lambda continuation chain type
+// a chain of pending lambda function continuations
+struct lambda_cont {
+    lambda_cont* next;
+    lambda* fn;
+};
+
+// a bit flag in len_userdata that signifies a custom destructor
+// the destructor is stored in the first 8 bytes of userdata
+#define LAMBDA_USER_DESTRUCTOR 1
+
+// a mask macro that selects userdata without the bit flags
+#define LAMBDA_HAS_USER_DESTRUCTOR(l) ((l)->header.len_userdata & LAMBDA_USER_DESTRUCTOR)
+
+// a mask macro that selects userdata without the bit flags
+#define LAMBDA_LEN_USERDATA(l) ((l)->header.len_userdata & ~LAMBDA_USER_DESTRUCTOR)
+
+// the refcount of immortal lambdas, such as statically allocated instances
+// any refcount with the top bit set is immortal, lambda_ref and lambda_unref
+// leave immortal lambdas untouched so that their memory is never written to
+#if LAMBDA_COMPACT_HEADER
+#define LAMBDA_IMMORTAL ((uint32_t) 1 << 31)
+#else
+#define LAMBDA_IMMORTAL (~(size_t) 0 / 2 + 1)
+#endif
+
+// a macro that checks whether a lambda is immortal
+#define LAMBDA_IS_IMMORTAL(l) ((l)->header.refcount >= LAMBDA_IMMORTAL)
+
+// create a statically allocated instance of a lambda
+#define LAMBDA_INSTANCE(_name, _impl, _len_captures, _len_userdata, ...) \
+    struct { \
+        lambda_header header; \
+        lambda* captures[_len_captures]; \
+        char userdata[(_len_userdata) & ~LAMBDA_USER_DESTRUCTOR]; \
+    } _name = { \
+        .header = { \
+            .refcount = LAMBDA_IMMORTAL, \
+            .len_captures = _len_captures, \
+            .len_userdata = _len_userdata, \
+            .impl = _impl \
+        }, \
+        __VA_ARGS__ \
+    }
+
+// the lambda userdata accessor function
+// defined by the lambda runtime
+//
+// this function returns a pointer to the userdata of the passed lambda
+void* lambda_userdata(lambda* l);
+
+// the lambda allocation failure handler
+// default defined by the lambda runtime
+// can be overridden
+//
+// this function is called when lambda_alloc fails
+// this function does not return
+noreturn void lambda_abort(void);
+
+// the lambda memory allocation function
+// default defined by the lambda runtime
+// can be overridden
+//
+// allocates a contiguous buffer of size bytes
+// calls lambda_abort on allocation failure
+// used by the lambda runtime to allocate memory
+//
+// this function never returns NULL
+void* lambda_mem_alloc(size_t size);
+
+// the lambda deallocation function
+// default defined by the lambda runtime
+// can be overridden
+//
+// deallocates a contiguous buffer of size bytes allocated by lambda_mem_alloc
+// used by the lambda runtime to deallocate memory
+void lambda_mem_free(void* mem);
+
+// the pooled allocator configuration
+// can be overridden by defining these when compiling the runtime
+//
+// LAMBDA_POOL enables the pooled allocator (default 1)
+// LAMBDA_POOL_MAX_CAPTURES is the largest pooled lambda size (default 8)
+// LAMBDA_POOL_SLAB_SIZE is the size of slabs allocated by lambda_mem_alloc
+// LAMBDA_POOL_LIMIT caps the total slab memory in bytes, 0 means no cap
+#ifndef LAMBDA_POOL
+#define LAMBDA_POOL 1
+#endif
+
+#ifndef LAMBDA_POOL_MAX_CAPTURES
+#define LAMBDA_POOL_MAX_CAPTURES 8
+#endif
+
+#ifndef LAMBDA_POOL_SLAB_SIZE
+#define LAMBDA_POOL_SLAB_SIZE 65536
+#endif
+
+#ifndef LAMBDA_POOL_LIMIT
+#define LAMBDA_POOL_LIMIT 0
+#endif
+
+// the arena allocator configuration
+// can be overridden by defining these when compiling the runtime
+//
+// LAMBDA_ARENA enables the bump-pointer arena (default 0)
+// LAMBDA_ARENA_SIZE is the size of the arena mapping in bytes (default 1 GiB)
+//
+// in arena mode lambdas are carved from a single anonymous mapping which is
+// only reserved, not committed, until it is touched, and memory is never
+// reused, so lambda_unref skips releasing the captures of dead arena lambdas
+// and only runs their destructors, once the arena is exhausted or could not be
+// mapped, allocation falls back to the pooled allocator
+//
+// meant for short-running programs where throughput matters more than peak
+// memory, for example: make C_DEFS=-DLAMBDA_ARENA=1
+#ifndef LAMBDA_ARENA
+#define LAMBDA_ARENA 0
+#endif
+
+#ifndef LAMBDA_ARENA_SIZE
+#define LAMBDA_ARENA_SIZE ((size_t) 1 << 30)
+#endif
+
+// the pooled lambda memory allocation functions
+// defined by the lambda runtime
+//
+// lambda_pool_alloc allocates a buffer of size bytes
+// lambda_pool_free deallocates a buffer of size bytes allocated by
+// lambda_pool_alloc
+//
+// small buffers, such as lambdas with up to LAMBDA_POOL_MAX_CAPTURES captures
+// and heap-allocated continuations, are kept on per-size freelists and carved
+// from slabs allocated by lambda_mem_alloc, larger buffers are passed through
+// to lambda_mem_alloc and lambda_mem_free directly
+//
+// buffers are taken from the arena first if LAMBDA_ARENA is enabled
+//
+// calls lambda_abort when LAMBDA_POOL_LIMIT is exceeded
+void* lambda_pool_alloc(size_t size);
+void lambda_pool_free(void* mem, size_t size);
+
+// the continuation stack configuration
+// can be overridden by defining these when compiling the runtime
+//
+// LAMBDA_CONT_STACK enables the continuation stack (default 1)
+// LAMBDA_CONT_STACK_SEGMENT is the number of continuations per segment
+//
+// continuations are strictly last in, first out, every continuation is called
+// exactly once and only after the continuations pushed after it, so instead of
+// allocating them on the heap, they are pushed onto a segmented stack and
+// popped again by lambda_cont_call
+//
+// must match lambda-mlir2llir and lambda-mlir2main, which inline the push and
+// pop unless --no-cont-stack is passed, the Makefile selects both with:
+// make CONT_STACK=0
+#ifndef LAMBDA_CONT_STACK
+#define LAMBDA_CONT_STACK 1
+#endif
+
+// the continuation mode the runtime was compiled for
+// defined by the lambda runtime
+//
+// generated code refers to the symbol of the mode it was compiled for, so
+// linking it against a runtime compiled for the other mode fails
+#if LAMBDA_CONT_STACK
+extern const char lambda_abi_cont_stack;
+#else
+extern const char lambda_abi_cont_heap;
+#endif
+
+#ifndef LAMBDA_CONT_STACK_SEGMENT
+#define LAMBDA_CONT_STACK_SEGMENT 4096
+#endif
+
+#if LAMBDA_CONT_STACK
+// the continuation stack state
+// defined by the lambda runtime
+//
+// lambda_cont_top is the next free continuation of the current segment
+// lambda_cont_end is the end of the current segment
+// lambda_cont_base is the first continuation of the current segment
+extern lambda_cont* lambda_cont_top;
+extern lambda_cont* lambda_cont_end;
+extern lambda_cont* lambda_cont_base;
+
+// the continuation stack slow paths
+// defined by the lambda runtime
+//
+// lambda_cont_push_segment continues in the next segment once the current
+// one is full and returns its first continuation, which is already pushed
+// lambda_cont_pop_segment returns to the previous segment once the first
+// continuation of the current one has been popped
+//
+// calls lambda_abort on allocation failure
+lambda_cont* lambda_cont_push_segment(void);
+void lambda_cont_pop_segment(void);
+#endif
+
+// the lambda allocation function
+// defined by the lambda runtime
+//
+// allocates a lambda with len_captures captured lambdas and len_userdata bytes
+// of user-supplied data, calls lambda_abort on allocation failure
+//
+// the members impl, captures, and userdata are uninitialized
+//
+// generated code reuses a uniquely owned lambda without userdata in place for
+// a new lambda with the same or fewer captures instead of freeing it
+lambda* lambda_alloc(size_t len_captures, size_t len_userdata);
+
+// the continuation allocation function
+// defined by the lambda runtime
+//
+// prepends the passed lambda to the passed continuation chain
+// calls lambda_abort on allocation failure
+lambda_cont* lambda_cont_alloc(lambda_cont* cont, lambda* l);
+
+// the lambda reference-counting functions
+// defined by the lambda runtime
+//
+// lambda_ref increments the refcount of the passed lambda by the passed amount
+// lambda_unref decrements the refcount of the passed lambda
+//
+// when the refcount of the passed lambda reaches zero, it is deallocated and
+// the refcounts of its captured lambdas are decremented
+//
+// both are no-ops for immortal lambdas
+void lambda_ref(lambda* l, size_t count);
+void lambda_unref(lambda* l);
+
+// the lambda call function
+// defined by the lambda runtime
+//
+// calls the first passed lambda with the second passed lambda as its argument
+// continues with the passed continuation
+lambda* lambda_call(lambda* fn, lambda* arg, lambda_cont* cont);
+
+// the lambda continuation call function
+// defined by the lambda runtime
+//
+// continues with the passed continuation, using the passed lambda as an
+// argument
+lambda* lambda_cont_call(lambda* arg, lambda_cont* cont);
+
+// the blocking lambda call function
+// defined by the lambda runtime
+//
+// calls the first passed lambda with the second passed lambda as its argument
+// returns the result of the call
+lambda* lambda_ret_call(lambda* fn, lambda* arg);
+
+// the argumentless blocking lambda call function
+// defined by the lambda runtime
+//
+// calls the first passed lambda with a dummy lambda as its argument
+// returns the result of the call
+lambda* lambda_null_call(lambda* fn);
+
+// the native number functions
+// defined by the lambda runtime
+//
+// native numbers are lambdas without captures that carry their value as a
+// size_t of userdata, they are created by lambda_num and by native number
+// literals, see lambda-lang2hlir --native-numbers
+//
+// when called, native numbers behave like the numerals of std.lambda:
+// a non-zero number n called with s tail calls s with n - 1, and zero called
+// with s returns b -> b, just like false
+//
+// lambda_num_impl is the implementation of every native number
+// lambda_num allocates a native number with the passed value
+// lambda_num_value returns the value of the passed number without consuming
+// it, numbers that are not native are counted by calling them
+lambda* lambda_num_impl(lambda* arg, lambda* self, lambda_cont* cont);
+lambda* lambda_num(size_t n);
+size_t lambda_num_value(lambda* l);
+
+#endif
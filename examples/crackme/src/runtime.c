@@ -1,9 +1,28 @@
+// for MAP_ANONYMOUS and MAP_NORESERVE used by the arena allocator
+#define _DEFAULT_SOURCE
+
 #include <stddef.h>
 #include <stdnoreturn.h>
 #include <stdlib.h>
 
 #include "lambda.h"
 
+#if LAMBDA_ARENA
+#include <sys/mman.h>
+#endif
+
+#if LAMBDA_COMPACT_HEADER
+const char lambda_abi_compact_header = 0;
+#else
+const char lambda_abi_word_header = 0;
+#endif
+
+#if LAMBDA_CONT_STACK
+const char lambda_abi_cont_stack = 0;
+#else
+const char lambda_abi_cont_heap = 0;
+#endif
+
 void* lambda_userdata(lambda* l) {
     return (void*) &l->captures[l->header.len_captures];
 }
@@ -27,11 +46,162 @@ void lambda_mem_free(void * mem) {
     free(mem);
 }
 
+#if LAMBDA_POOL
+typedef struct lambda_pool_block lambda_pool_block;
+struct lambda_pool_block {
+    lambda_pool_block* next;
+};
+
+typedef struct lambda_pool_class lambda_pool_class;
+struct lambda_pool_class {
+    lambda_pool_block* free;
+    char* cur;
+    char* end;
+};
+
+#define LAMBDA_POOL_WORD (sizeof (lambda*))
+#define LAMBDA_POOL_CLASSES ((sizeof (lambda) + sizeof (lambda*) * LAMBDA_POOL_MAX_CAPTURES) / LAMBDA_POOL_WORD + 1)
+
+static lambda_pool_class lambda_pool_classes[LAMBDA_POOL_CLASSES];
+static size_t lambda_pool_used;
+
+static void lambda_pool_refill(lambda_pool_class* pc) {
+    if (LAMBDA_POOL_LIMIT != 0 && lambda_pool_used + LAMBDA_POOL_SLAB_SIZE > LAMBDA_POOL_LIMIT) {
+        lambda_abort();
+    }
+
+    // slabs are never returned, freed blocks are kept on the freelists
+    char* slab = (char*) lambda_mem_alloc(LAMBDA_POOL_SLAB_SIZE);
+    lambda_pool_used += LAMBDA_POOL_SLAB_SIZE;
+
+    pc->cur = slab;
+    pc->end = slab + LAMBDA_POOL_SLAB_SIZE;
+}
+
+static void* lambda_pool_class_alloc(size_t size) {
+    size_t words = (size + LAMBDA_POOL_WORD - 1) / LAMBDA_POOL_WORD;
+    if (words >= LAMBDA_POOL_CLASSES) {
+        return lambda_mem_alloc(size);
+    }
+
+    lambda_pool_class* pc = &lambda_pool_classes[words];
+    if (pc->free != NULL) {
+        lambda_pool_block* block = pc->free;
+        pc->free = block->next;
+        return block;
+    }
+
+    size_t block_size = words * LAMBDA_POOL_WORD;
+    if ((size_t)(pc->end - pc->cur) < block_size) {
+        lambda_pool_refill(pc);
+    }
+
+    void* mem = pc->cur;
+    pc->cur += block_size;
+    return mem;
+}
+
+static void lambda_pool_class_free(void* mem, size_t size) {
+    size_t words = (size + LAMBDA_POOL_WORD - 1) / LAMBDA_POOL_WORD;
+    if (words >= LAMBDA_POOL_CLASSES) {
+        lambda_mem_free(mem);
+        return;
+    }
+
+    lambda_pool_class* pc = &lambda_pool_classes[words];
+    lambda_pool_block* block = (lambda_pool_block*) mem;
+    block->next = pc->free;
+    pc->free = block;
+}
+#else
+static void* lambda_pool_class_alloc(size_t size) {
+    return lambda_mem_alloc(size);
+}
+
+static void lambda_pool_class_free(void* mem, size_t size) {
+    (void) size;
+    lambda_mem_free(mem);
+}
+#endif
+
+#if LAMBDA_ARENA
+static char* lambda_arena_start;
+static char* lambda_arena_cur;
+static char* lambda_arena_end;
+static int lambda_arena_mapped;
+
+static void lambda_arena_map(void) {
+    lambda_arena_mapped = 1;
+
+    void* arena = mmap(NULL, LAMBDA_ARENA_SIZE, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS | MAP_NORESERVE, -1, 0);
+    if (arena == MAP_FAILED) {
+        return;
+    }
+
+#ifdef MADV_HUGEPAGE
+    // fewer page faults while the bump pointer walks through fresh memory
+    madvise(arena, LAMBDA_ARENA_SIZE, MADV_HUGEPAGE);
+#endif
+
+    lambda_arena_start = (char*) arena;
+    lambda_arena_cur = lambda_arena_start;
+    lambda_arena_end = lambda_arena_start + LAMBDA_ARENA_SIZE;
+}
+
+static void* lambda_arena_alloc(size_t size) {
+    if (!lambda_arena_mapped) {
+        lambda_arena_map();
+    }
+
+    size = (size + sizeof (lambda*) - 1) & ~(sizeof (lambda*) - 1);
+    if ((size_t)(lambda_arena_end - lambda_arena_cur) < size) {
+        return NULL;
+    }
+
+    void* mem = lambda_arena_cur;
+    lambda_arena_cur += size;
+    return mem;
+}
+
+static int lambda_arena_contains(void* mem) {
+    return (char*) mem >= lambda_arena_start && (char*) mem < lambda_arena_end;
+}
+#endif
+
+void* lambda_pool_alloc(size_t size) {
+#if LAMBDA_ARENA
+    void* mem = lambda_arena_alloc(size);
+    if (mem != NULL) {
+        return mem;
+    }
+#endif
+
+    return lambda_pool_class_alloc(size);
+}
+
+void lambda_pool_free(void* mem, size_t size) {
+#if LAMBDA_ARENA
+    if (lambda_arena_contains(mem)) {
+        return;
+    }
+#endif
+
+    lambda_pool_class_free(mem, size);
+}
+
+static size_t lambda_size(size_t len_captures, size_t len_userdata) {
+    return sizeof (lambda) + sizeof (lambda*) * len_captures + len_userdata;
+}
+
 lambda* lambda_alloc(size_t len_captures, size_t len_userdata) {
-    lambda* l = (lambda*) lambda_mem_alloc(
-        sizeof (lambda) +
-        sizeof (lambda*) * len_captures +
-        len_userdata
+#if LAMBDA_COMPACT_HEADER
+    if (len_captures > UINT16_MAX || len_userdata > UINT16_MAX) {
+        lambda_abort();
+    }
+#endif
+
+    lambda* l = (lambda*) lambda_pool_alloc(
+        lambda_size(len_captures, len_userdata)
     );
 
     l->header.refcount = 1;
@@ -40,8 +210,77 @@ lambda* lambda_alloc(size_t len_captures, size_t len_userdata) {
     return l;
 }
 
+#if LAMBDA_CONT_STACK
+typedef struct lambda_cont_segment lambda_cont_segment;
+struct lambda_cont_segment {
+    lambda_cont_segment* prev;
+    lambda_cont_segment* next;
+    lambda_cont conts[LAMBDA_CONT_STACK_SEGMENT];
+};
+
+lambda_cont* lambda_cont_top;
+lambda_cont* lambda_cont_end;
+lambda_cont* lambda_cont_base;
+
+static lambda_cont_segment* lambda_cont_segment_cur;
+
+static void lambda_cont_enter_segment(lambda_cont_segment* segment, lambda_cont* top) {
+    lambda_cont_segment_cur = segment;
+    lambda_cont_top = top;
+    lambda_cont_end = &segment->conts[LAMBDA_CONT_STACK_SEGMENT];
+    lambda_cont_base = &segment->conts[0];
+}
+
+lambda_cont* lambda_cont_push_segment(void) {
+    lambda_cont_segment* cur = lambda_cont_segment_cur;
+
+    // the segment left last is kept around, so a stack that keeps crossing a
+    // segment boundary does not allocate every time
+    lambda_cont_segment* next = cur != NULL ? cur->next : NULL;
+    if (next == NULL) {
+        next = (lambda_cont_segment*) lambda_mem_alloc(sizeof (lambda_cont_segment));
+        next->prev = cur;
+        next->next = NULL;
+
+        if (cur != NULL) {
+            cur->next = next;
+        }
+    }
+
+    lambda_cont_enter_segment(next, &next->conts[1]);
+    return &next->conts[0];
+}
+
+void lambda_cont_pop_segment(void) {
+    lambda_cont_segment* cur = lambda_cont_segment_cur;
+    if (cur->prev == NULL) {
+        return;
+    }
+
+    // segments are only left once they are full
+    lambda_cont_enter_segment(cur->prev, &cur->prev->conts[LAMBDA_CONT_STACK_SEGMENT]);
+
+    if (cur->next != NULL) {
+        lambda_mem_free(cur->next);
+        cur->next = NULL;
+    }
+}
+
+lambda_cont* lambda_cont_alloc(lambda_cont* cont, lambda* l) {
+    lambda_cont* c = lambda_cont_top;
+    if (c < lambda_cont_end) {
+        lambda_cont_top = c + 1;
+    } else {
+        c = lambda_cont_push_segment();
+    }
+
+    c->next = cont;
+    c->fn = l;
+    return c;
+}
+#else
 lambda_cont* lambda_cont_alloc(lambda_cont* cont, lambda* l) {
-    lambda_cont* c = (lambda_cont*) lambda_mem_alloc(
+    lambda_cont* c = (lambda_cont*) lambda_pool_alloc(
         sizeof (lambda_cont)
     );
 
@@ -49,14 +288,19 @@ lambda_cont* lambda_cont_alloc(lambda_cont* cont, lambda* l) {
     c->fn = l;
     return c;
 }
+#endif
 
 void lambda_ref(lambda* l, size_t count) {
-    l->header.refcount += count;
+    if (!LAMBDA_IS_IMMORTAL(l)) {
+        l->header.refcount += count;
+    }
 }
 
 void lambda_unref(lambda* l) {
     if (l->header.refcount > 1) {
-        l->header.refcount--;
+        if (!LAMBDA_IS_IMMORTAL(l)) {
+            l->header.refcount--;
+        }
         return;
     }
 
@@ -65,15 +309,30 @@ void lambda_unref(lambda* l) {
         ((lambda_destructor*)userdata)(userdata);
     }
 
+    size_t size = lambda_size(l->header.len_captures, l->header.len_userdata);
+
     lambda* tail = NULL;
     if (l->header.refcount == 0) {
         tail = l->header.tail;
     }
 
+#if LAMBDA_ARENA
+    // arena memory is never reused, so the captures are not released either
+    if (lambda_arena_contains(l)) {
+        if (tail != NULL) {
+            lambda_unref(tail);
+        }
+
+        return;
+    }
+#endif
+
     for (size_t i = 0; i < l->header.len_captures; i++) {
         lambda* cur = l->captures[i];
         if (cur->header.refcount > 1) {
-            cur->header.refcount--;
+            if (!LAMBDA_IS_IMMORTAL(cur)) {
+                cur->header.refcount--;
+            }
             continue;
         }
 
@@ -85,7 +344,7 @@ void lambda_unref(lambda* l) {
         tail = cur;
     }
 
-    lambda_mem_free(l);
+    lambda_pool_free(l, size);
 
     if (tail != NULL) {
         lambda_unref(tail);
@@ -100,7 +359,14 @@ lambda* lambda_cont_call(lambda* arg, lambda_cont* cont) {
     lambda_cont* next = cont->next;
     lambda* fn = cont->fn;
 
-    lambda_mem_free(cont);
+#if LAMBDA_CONT_STACK
+    lambda_cont_top = cont;
+    if (cont == lambda_cont_base) {
+        lambda_cont_pop_segment();
+    }
+#else
+    lambda_pool_free(cont, sizeof (lambda_cont));
+#endif
     return lambda_call(fn, arg, next);
 }
 
@@ -144,3 +410,92 @@ lambda* lambda_null_call(lambda* fn) {
 
     return lambda_ret_call(fn, null);
 }
+
+static lambda* lambda_num_zero_impl(lambda* arg, lambda* self, lambda_cont* cont) {
+    lambda_unref(self);
+    return lambda_cont_call(arg, cont);
+}
+
+static LAMBDA_INSTANCE(lambda_num_zero_inst, lambda_num_zero_impl, 0, 0,
+    .captures = {},
+    .userdata = {}
+);
+
+lambda* lambda_num_impl(lambda* arg, lambda* self, lambda_cont* cont) {
+    size_t n = *(size_t*)lambda_userdata(self);
+    lambda_unref(self);
+
+    if (n == 0) {
+        lambda_unref(arg);
+
+        lambda* zero = (lambda*)&lambda_num_zero_inst;
+        lambda_ref(zero, 1);
+        return lambda_cont_call(zero, cont);
+    }
+
+    return lambda_call(arg, lambda_num(n - 1), cont);
+}
+
+lambda* lambda_num(size_t n) {
+    lambda* l = lambda_alloc(0, sizeof (size_t));
+    l->header.impl = lambda_num_impl;
+
+    *(size_t*)lambda_userdata(l) = n;
+
+    return l;
+}
+
+// std numerals are destructured by calling them with lambda_num_succ_inst and
+// then with lambda_num_end_inst, n s z is s (n - 1) z for non-zero n, which
+// returns the predecessor wrapped by lambda_num_pred_impl, and z for zero
+static lambda* lambda_num_pred_impl(lambda* arg, lambda* self, lambda_cont* cont) {
+    lambda_unref(arg);
+    return lambda_cont_call(self, cont);
+}
+
+static lambda* lambda_num_succ_impl(lambda* arg, lambda* self, lambda_cont* cont) {
+    lambda* pred = lambda_alloc(1, 0);
+    pred->header.impl = lambda_num_pred_impl;
+    pred->captures[0] = arg;
+
+    lambda_unref(self);
+    return lambda_cont_call(pred, cont);
+}
+
+static LAMBDA_INSTANCE(lambda_num_succ_inst, lambda_num_succ_impl, 0, 0,
+    .captures = {},
+    .userdata = {}
+);
+
+static LAMBDA_INSTANCE(lambda_num_end_inst, lambda_num_pred_impl, 0, 0,
+    .captures = {},
+    .userdata = {}
+);
+
+size_t lambda_num_value(lambda* l) {
+    lambda* succ = (lambda*)&lambda_num_succ_inst;
+    lambda* end = (lambda*)&lambda_num_end_inst;
+    size_t n = 0;
+
+    lambda_ref(l, 1);
+    while (l->header.impl != lambda_num_impl) {
+        lambda_ref(succ, 1);
+        lambda* partial = lambda_ret_call(l, succ);
+
+        lambda_ref(end, 1);
+        lambda* pred = lambda_ret_call(partial, end);
+        if (pred == end) {
+            lambda_unref(pred);
+            return n;
+        }
+
+        l = pred->captures[0];
+        lambda_ref(l, 1);
+        lambda_unref(pred);
+        n++;
+    }
+
+    n += *(size_t*)lambda_userdata(l);
+    lambda_unref(l);
+    return n;
+}
@@ -4,5 +4,6 @@ from . import parse
 from . import passes
 from . import pretty
 from . import search_path
+from . import recursion
 from . import bundled_files
 from . import cli
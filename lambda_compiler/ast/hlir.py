@@ -14,6 +14,7 @@ class ExternCrate(Statement):
 @dataclass
 class Extern(Statement):
     name: str
+    is_impure: bool = True
 
 @dataclass
 class Assignment(Statement):
@@ -57,3 +58,7 @@ class Ident(Expr):
 @dataclass
 class Absolute(Expr):
     path: Path
+
+@dataclass
+class Number(Expr):
+    value: int
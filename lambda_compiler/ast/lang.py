@@ -14,6 +14,7 @@ class ExternCrate(Statement):
 @dataclass
 class Extern(Statement):
     name: str
+    is_impure: bool = True
 
 @dataclass
 class Mod(Statement):
@@ -79,3 +80,7 @@ class Char(Macro):
 @dataclass
 class Number(Macro):
     value: int
+
+@dataclass
+class Binary(Macro):
+    value: int
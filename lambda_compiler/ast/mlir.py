@@ -28,6 +28,11 @@ class Instance(Statement):
     impl: ImplementationPath
     captures: List[InstancePath]
 
+@dataclass
+class NumberInstance(Statement):
+    path: InstancePath
+    value: int
+
 @dataclass
 class Implementation(Statement):
     path: ImplementationPath
@@ -48,6 +53,18 @@ class ContinueCallImplementation(Implementation):
     arg: ValueLiteral
     next: ValueLiteral
 
+@dataclass
+class BranchImplementation(Implementation):
+    # fn arg -> next, unless fn has the impl of the boolean true or false, then
+    # on_true or on_false is called with the arg and the captures of this impl
+    fn: ValueLiteral
+    arg: ValueLiteral
+    next: ValueLiteral
+    true: ValueLiteral
+    on_true: ValueLiteral
+    false: ValueLiteral
+    on_false: ValueLiteral
+
 @dataclass
 class ValueLiteral:
     pass
@@ -56,6 +73,12 @@ class ValueLiteral:
 class CaptureLiteral(ValueLiteral):
     id: int
 
+@dataclass
+class SelfLiteral(ValueLiteral):
+    # the closure running the impl, closures built by std::y at runtime refer
+    # to themselves through it instead of capturing themselves
+    pass
+
 @dataclass
 class ExternLiteral(ValueLiteral):
     name: str
@@ -71,4 +94,4 @@ class InstanceLiteral(ValueLiteral):
 @dataclass
 class ImplementationLiteral(ValueLiteral):
     impl: ImplementationPath
-    captures: List[int | InstancePath]
+    captures: List[int | InstancePath | SelfLiteral]
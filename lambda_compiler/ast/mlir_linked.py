@@ -4,7 +4,7 @@ from .mlir import *
 @dataclass
 class LinkedDefinition(Statement):
     path: Path
-    inst: LinkedInstance
+    inst: LinkedInstance | LinkedNumberInstance
     needs_init: bool
     is_public: bool
 
@@ -12,7 +12,12 @@ class LinkedDefinition(Statement):
 class LinkedInstance(Statement):
     path: InstancePath
     impl: Implementation
-    captures: List[LinkedInstance]
+    captures: List[LinkedInstance | LinkedNumberInstance]
+
+@dataclass
+class LinkedNumberInstance(Statement):
+    path: InstancePath
+    value: int
 
 @dataclass
 class LinkedDefinitionLiteral(ValueLiteral):
@@ -20,9 +25,9 @@ class LinkedDefinitionLiteral(ValueLiteral):
 
 @dataclass
 class LinkedInstanceLiteral(ValueLiteral):
-    inst: LinkedInstance
+    inst: LinkedInstance | LinkedNumberInstance
 
 @dataclass
 class LinkedImplementationLiteral(ValueLiteral):
     impl: Implementation
-    captures: List[int | LinkedInstance]
+    captures: List[int | LinkedInstance | LinkedNumberInstance | SelfLiteral]
@@ -62,3 +62,11 @@ class ImplementationPath:
 
     def __lt__(self, other: ImplementationPath) -> bool:
         return (self.path, self.lambda_id, self.continuation_id) < (other.path, other.lambda_id, other.continuation_id)
+
+# the fixed-point combinator of std, whose compile-time applications the
+# optimizer compiles as letrec, so the HLIR passes keep its applications
+FIXPOINT_PATH = Path(["std", "y"])
+
+# the booleans of std, which conditionals branch on
+TRUE_PATH = Path(["std", "true"])
+FALSE_PATH = Path(["std", "false"])
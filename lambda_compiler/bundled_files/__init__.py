@@ -1,7 +1,12 @@
 from . import makefile
 from . import crate_lambda
 from . import std_lambda
+from . import std_native_lambda
+from . import std_bin_lambda
 from . import io_lambda
 from . import io_c
+from . import io_native_lambda
+from . import io_native_c
+from . import num_c
 from . import runtime_h
 from . import runtime_c
@@ -0,0 +1,90 @@
+filename = "src/io.c"
+source = r"""
+#include <stdio.h>
+#include "lambda.h"
+
+static lambda* lambda_io_error_impl(lambda* arg, lambda* self, lambda_cont* cont) {
+    lambda_unref(arg);
+    return lambda_cont_call(self, cont);
+}
+
+LAMBDA_INSTANCE(lambda_io_error_inst, lambda_io_error_impl, 0, 0,
+    .captures = {},
+    .userdata = {}
+);
+
+lambda* lambda_io_error = (lambda*)&lambda_io_error_inst;
+
+// numbers are the native numbers of the lambda runtime, which can be used
+// in place of std numerals, and std numerals are accepted as arguments
+static lambda* mk_num(size_t n) {
+    return lambda_num(n);
+}
+
+static size_t get_num(lambda* l) {
+    return lambda_num_value(l);
+}
+
+static lambda* lambda_io_putc_impl(lambda* arg, lambda* self, lambda_cont* cont) {
+    size_t num = get_num(arg);
+
+    putchar(num);
+
+    lambda_unref(arg);
+    lambda_unref(self);
+
+    lambda_ref(lambda_io_error, 1);
+    return lambda_cont_call(lambda_io_error, cont);
+}
+
+LAMBDA_INSTANCE(lambda_io_putc_inst, lambda_io_putc_impl, 0, 0,
+    .captures = {},
+    .userdata = {}
+);
+
+lambda* lambda_io_putc = (lambda*)&lambda_io_putc_inst;
+
+static lambda* lambda_io_getc_impl(lambda* arg, lambda* self, lambda_cont* cont) {
+    int c = getchar();
+
+    size_t num;
+    if (c == EOF) {
+        num = 256;
+    } else {
+        num = c;
+    }
+
+    lambda* r = mk_num(num);
+
+    lambda_unref(arg);
+    lambda_unref(self);
+
+    return lambda_cont_call(r, cont);
+}
+
+LAMBDA_INSTANCE(lambda_io_getc_inst, lambda_io_getc_impl, 0, 0,
+    .captures = {},
+    .userdata = {}
+);
+
+lambda* lambda_io_getc = (lambda*)&lambda_io_getc_inst;
+
+static lambda* lambda_io_debug_impl(lambda* arg, lambda* self, lambda_cont* cont) {
+#if __x86_64__ || __i386__
+    __asm__("int3");
+#endif
+
+    lambda_unref(arg);
+    lambda_unref(self);
+
+    lambda_ref(lambda_io_error, 1);
+    return lambda_cont_call(lambda_io_error, cont);
+}
+
+LAMBDA_INSTANCE(lambda_io_debug_inst, lambda_io_debug_impl, 0, 0,
+    .captures = {},
+    .userdata = {}
+);
+
+lambda* lambda_io_debug = (lambda*)&lambda_io_debug_inst;
+""".strip()
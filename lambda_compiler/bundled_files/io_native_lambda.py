@@ -0,0 +1,31 @@
+filename = "src/io.lambda"
+source = r"""
+extern crate std;
+use std::*;
+
+extern impure lambda_io_putc;
+extern impure lambda_io_getc;
+extern impure lambda_io_debug;
+
+pub eof = dec3 2 5 6;
+
+pop_eof = list ->
+    equal (first list) eof
+        (x -> rest list)
+        (x -> list)
+    ident;
+
+pub impure putc = n -> lambda_io_putc n;
+
+pub impure puts = s -> map putc s;
+
+pub impure getc = x -> lambda_io_getc x;
+
+pub impure gets = x -> reverse (pop_eof (while
+    (l -> not (or (equal (first l) eof) (equal (first l) 10)))
+    (l -> prepend (getc ident) l)
+    (prepend (getc ident) nil)
+));
+
+pub impure trap = lambda_io_debug;
+""".strip()
@@ -7,11 +7,25 @@ TARGET      := lambda-$(MAIN)
 CC          := $(CLANG)
 C_OPT       := -Oz -ffunction-sections -fdata-sections
 C_INC       :=
+C_DEFS      :=
 C_STD       := -std=c17
 C_WARN      := -Wall -Wextra
 C_SAN       :=
 C_LINK      := -Wl,--gc-sections
-C_FLAGS     := $(C_OPT) $(C_SAN) $(C_INC) $(C_STD) $(C_WARN)
+H_FLAGS     :={h_flags}
+M_FLAGS     :=
+O_FLAGS     :=
+L_TARGET    :=
+L_FLAGS     :=
+L_PARTS     :=
+WHOLE       :=
+CONT_STACK  := 1
+CACHE       :=
+CACHE_ARGS  := $(if $(CACHE),--cache $(CACHE))
+KEEP_ARGS   := $(if $(CACHE),--keep-unchanged)
+L_ARGS      := $(if $(L_TARGET),-t $(L_TARGET)) $(if $(filter 0,$(CONT_STACK)),--no-cont-stack) $(L_FLAGS)
+C_ABI       := $(if $(findstring -compact,$(L_TARGET)),-DLAMBDA_COMPACT_HEADER=1) $(if $(filter 0,$(CONT_STACK)),-DLAMBDA_CONT_STACK=0)
+C_FLAGS     := $(C_OPT) $(C_SAN) $(C_INC) $(C_ABI) $(C_DEFS) $(C_STD) $(C_WARN)
 
 MAIN_LL     := build/$(MAIN).main.ll
 LANG_SRC    := $(wildcard src/*.lambda)
@@ -20,7 +34,11 @@ C_SRC       := $(wildcard src/*.c)
 LANG_DEPS   := build/$(MAIN).ll.d
 C_DEPS      := $(C_SRC:src/%.c=build/%.c.d)
 DEPS        := $(LANG_DEPS) $(C_DEPS)
-OBJECTS     := $(MAIN_LL:build/%.ll=build/%.ll.o) $(LANG_SRC:src/%.lambda=build/%.ll.o) $(C_SRC:src/%.c=build/%.c.o)
+PART_IDS    := $(if $(L_PARTS),$(shell seq 0 $$(($(L_PARTS) - 1))))
+LANG_LL     := $(if $(L_PARTS),$(foreach i,$(PART_IDS),$(LANG_SRC:src/%.lambda=build/%.part$(i).ll)),$(LANG_SRC:src/%.lambda=build/%.ll))
+LANG_OBJ    := $(MAIN_LL:build/%.ll=build/%.ll.o) $(LANG_LL:build/%.ll=build/%.ll.o)
+WHOLE_OBJ   := build/$(MAIN).whole.main.ll.o build/$(MAIN).whole.ll.o
+OBJECTS     := $(if $(WHOLE),$(WHOLE_OBJ),$(LANG_OBJ)) $(C_SRC:src/%.c=build/%.c.o)
 
 .PHONY: all clean
 all: build/$(TARGET) build/$(TARGET).stripped
@@ -32,22 +50,40 @@ build:
 	mkdir -p $@
 
 build/%.hlir: src/%.lambda
-	lambda-lang2hlir -P build/ -o $@ $<
+	lambda-lang2hlir $(H_FLAGS) $(KEEP_ARGS) -P build/ -o $@ $<
 
 build/%.hlis: build/%.hlir
-	lambda-hlir2hlis -o $@ $<
+	lambda-hlir2hlis $(KEEP_ARGS) -o $@ $<
 
 build/%.mlir: build/%.hlir
-	lambda-hlir2mlir -o $@ $<
+	lambda-hlir2mlir $(M_FLAGS) $(CACHE_ARGS) -P build/ -o $@ $<
 
 build/%.opt.mlir: build/%.mlir
-	lambda-mlir2opt -P build/ -o $@ $<
+	lambda-mlir2opt $(O_FLAGS) $(CACHE_ARGS) -P build/ -o $@ $<
+
+build/%.whole.mlir: build/%.mlir
+	lambda-mlir2opt --whole-program $(O_FLAGS) $(CACHE_ARGS) -P build/ -o $@ $<
+
+build/%.whole.ll: build/%.whole.mlir
+	lambda-mlir2llir $(L_ARGS) $(CACHE_ARGS) -o $@ $<
+
+build/%.whole.main.ll: build/%.whole.mlir
+	lambda-mlir2main $(L_ARGS) -P build/ -o $@ $<
 
 build/%.ll: build/%.opt.mlir
-	lambda-mlir2llir -o $@ $<
+	lambda-mlir2llir $(L_ARGS) $(CACHE_ARGS) -o $@ $<
 
 build/%.main.ll: build/%.opt.mlir
-	lambda-mlir2main -P build/ -o $@ $<
+	lambda-mlir2main $(L_ARGS) -P build/ -o $@ $<
+
+# with L_PARTS=N every crate is split into N modules, each generated and
+# compiled by its own job
+define PART_RULE
+build/%.part$(1).ll: build/%.opt.mlir
+	lambda-mlir2llir $$(L_ARGS) $$(CACHE_ARGS) --partitions $(L_PARTS) --partition $(1) -o $$@ $$<
+endef
+
+$(foreach i,$(PART_IDS),$(eval $(call PART_RULE,$(i))))
 
 build/%.ll.d: src/%.lambda | build
 	lambda-lang2deps -O build/ -P src/ -o $@ $<
@@ -67,6 +103,8 @@ build/$(TARGET): $(OBJECTS)
 build/$(TARGET).stripped: build/$(TARGET)
 	strip -s -o $@ $^
 
+.SECONDARY: $(LANG_LL)
+
 $(DEPS):
 
 include $(DEPS)
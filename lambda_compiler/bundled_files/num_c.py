@@ -0,0 +1,158 @@
+filename = "src/num.c"
+source = r"""
+#include "lambda.h"
+
+// native number primitives for the std numerals
+//
+// used by std.lambda in native number mode, see lambda-mkmake --native-numbers
+//
+// arguments may be native numbers or std numerals, results are always native
+// numbers, arithmetic wraps around at SIZE_MAX instead of growing without
+// bound, and dividing by zero aborts instead of looping forever
+//
+// iszero, equal and less first take the true and false they answer with,
+// std.lambda passes std::true and std::false so that branches on their
+// results are recognized as booleans
+
+// returns a new closure with the captures of self followed by arg
+static lambda* lambda_num_curry(lambda* arg, lambda* self, lambda_impl* impl) {
+    size_t len_captures = self->header.len_captures;
+    lambda* partial = lambda_alloc(len_captures + 1, 0);
+    partial->header.impl = impl;
+    for (size_t i = 0; i < len_captures; i++) {
+        partial->captures[i] = self->captures[i];
+        lambda_ref(self->captures[i], 1);
+    }
+    partial->captures[len_captures] = arg;
+    lambda_unref(self);
+    return partial;
+}
+
+// returns the first captured boolean if cond holds and the second otherwise
+static lambda* lambda_num_select(lambda* self, int cond) {
+    lambda* value = cond ? self->captures[0] : self->captures[1];
+    lambda_ref(value, 1);
+    return value;
+}
+
+LAMBDA_INSTANCE(lambda_num_zero_inst, lambda_num_impl, 0, sizeof (size_t),
+    .captures = {},
+    .userdata = {0}
+);
+
+lambda* lambda_num_zero = (lambda*)&lambda_num_zero_inst;
+
+// defines a primitive taking one number
+#define LAMBDA_NUM_UNARY(_name, _a, _result) \
+    static lambda* lambda_num_##_name##_impl(lambda* arg, lambda* self, lambda_cont* cont) { \
+        size_t _a = lambda_num_value(arg); \
+        lambda_unref(arg); \
+        lambda_unref(self); \
+        return lambda_cont_call(_result, cont); \
+    } \
+    \
+    static LAMBDA_INSTANCE(lambda_num_##_name##_inst, lambda_num_##_name##_impl, 0, 0, \
+        .captures = {}, \
+        .userdata = {} \
+    ); \
+    \
+    lambda* lambda_num_##_name = (lambda*)&lambda_num_##_name##_inst
+
+// defines a curried primitive taking two numbers
+#define LAMBDA_NUM_BINARY(_name, _a, _b, _result) \
+    static lambda* lambda_num_##_name##_2_impl(lambda* arg, lambda* self, lambda_cont* cont) { \
+        size_t _a = lambda_num_value(self->captures[0]); \
+        size_t _b = lambda_num_value(arg); \
+        lambda_unref(arg); \
+        lambda_unref(self); \
+        return lambda_cont_call(_result, cont); \
+    } \
+    \
+    static lambda* lambda_num_##_name##_1_impl(lambda* arg, lambda* self, lambda_cont* cont) { \
+        return lambda_cont_call(lambda_num_curry(arg, self, lambda_num_##_name##_2_impl), cont); \
+    } \
+    \
+    static LAMBDA_INSTANCE(lambda_num_##_name##_inst, lambda_num_##_name##_1_impl, 0, 0, \
+        .captures = {}, \
+        .userdata = {} \
+    ); \
+    \
+    lambda* lambda_num_##_name = (lambda*)&lambda_num_##_name##_inst
+
+// defines the stages of a predicate taking its true and false, the next
+// stage is lambda_num_<name>_<next>_impl
+#define LAMBDA_NUM_TEST_BOOLS(_name, _next) \
+    static lambda* lambda_num_##_name##_2_impl(lambda* arg, lambda* self, lambda_cont* cont) { \
+        return lambda_cont_call(lambda_num_curry(arg, self, lambda_num_##_name##_##_next##_impl), cont); \
+    } \
+    \
+    static lambda* lambda_num_##_name##_1_impl(lambda* arg, lambda* self, lambda_cont* cont) { \
+        return lambda_cont_call(lambda_num_curry(arg, self, lambda_num_##_name##_2_impl), cont); \
+    } \
+    \
+    static LAMBDA_INSTANCE(lambda_num_##_name##_inst, lambda_num_##_name##_1_impl, 0, 0, \
+        .captures = {}, \
+        .userdata = {} \
+    ); \
+    \
+    lambda* lambda_num_##_name = (lambda*)&lambda_num_##_name##_inst
+
+// defines a curried predicate taking the true and false to answer with,
+// followed by one number
+#define LAMBDA_NUM_UNARY_TEST(_name, _a, _cond) \
+    static lambda* lambda_num_##_name##_3_impl(lambda* arg, lambda* self, lambda_cont* cont) { \
+        size_t _a = lambda_num_value(arg); \
+        lambda* value = lambda_num_select(self, _cond); \
+        lambda_unref(arg); \
+        lambda_unref(self); \
+        return lambda_cont_call(value, cont); \
+    } \
+    \
+    LAMBDA_NUM_TEST_BOOLS(_name, 3)
+
+// defines a curried predicate taking the true and false to answer with,
+// followed by two numbers
+#define LAMBDA_NUM_BINARY_TEST(_name, _a, _b, _cond) \
+    static lambda* lambda_num_##_name##_4_impl(lambda* arg, lambda* self, lambda_cont* cont) { \
+        size_t _a = lambda_num_value(self->captures[2]); \
+        size_t _b = lambda_num_value(arg); \
+        lambda* value = lambda_num_select(self, _cond); \
+        lambda_unref(arg); \
+        lambda_unref(self); \
+        return lambda_cont_call(value, cont); \
+    } \
+    \
+    static lambda* lambda_num_##_name##_3_impl(lambda* arg, lambda* self, lambda_cont* cont) { \
+        return lambda_cont_call(lambda_num_curry(arg, self, lambda_num_##_name##_4_impl), cont); \
+    } \
+    \
+    LAMBDA_NUM_TEST_BOOLS(_name, 3)
+
+static size_t lambda_num_checked_div(size_t a, size_t b) {
+    if (b == 0) {
+        lambda_abort();
+    }
+
+    return a / b;
+}
+
+static size_t lambda_num_checked_rem(size_t a, size_t b) {
+    if (b == 0) {
+        lambda_abort();
+    }
+
+    return a % b;
+}
+
+LAMBDA_NUM_UNARY(succ, a, lambda_num(a + 1));
+LAMBDA_NUM_UNARY(pred, a, lambda_num(a == 0 ? 0 : a - 1));
+LAMBDA_NUM_UNARY_TEST(iszero, a, a == 0);
+
+LAMBDA_NUM_BINARY(add, a, b, lambda_num(a + b));
+LAMBDA_NUM_BINARY(sub, a, b, lambda_num(a > b ? a - b : 0));
+LAMBDA_NUM_BINARY(mul, a, b, lambda_num(a * b));
+LAMBDA_NUM_BINARY(div, a, b, lambda_num(lambda_num_checked_div(a, b)));
+LAMBDA_NUM_BINARY(rem, a, b, lambda_num(lambda_num_checked_rem(a, b)));
+LAMBDA_NUM_BINARY_TEST(equal, a, b, a == b);
+LAMBDA_NUM_BINARY_TEST(less, a, b, a < b);
+""".strip()
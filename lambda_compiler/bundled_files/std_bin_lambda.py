@@ -0,0 +1,138 @@
+filename = "src/std/bin.lambda"
+source = r"""
+# binary numbers
+#
+# a binary number is a little-endian list of std::true and std::false bits
+# without trailing std::false bits, so zero is the empty list and every
+# number has exactly one representation. the arithmetic below only walks the
+# bits of its operands, making it logarithmic in the value instead of linear
+# like the unary numbers of std. literals are written in base 2 as !b1101
+
+use super::true;
+use super::false;
+use super::not;
+use super::and;
+use super::or;
+use super::pair;
+use super::1st;
+use super::2nd;
+use super::ident;
+use super::y;
+use super::prepend;
+use super::first;
+use super::rest;
+use super::nil;
+use super::empty;
+
+xor = a -> b -> a (not b) b;
+
+pub zero = nil;
+pub iszero = empty;
+
+pub bit0 = n -> empty n (x -> nil) (x -> prepend false n) ident;
+pub bit1 = n -> prepend true n;
+pub cons_bit = bit -> n -> bit (x -> bit1 n) (x -> bit0 n) ident;
+
+pub succ = y succ -> n ->
+    empty n
+        (x -> bit1 nil)
+        (x -> first n
+            (x -> bit0 (succ (rest n)))
+            (x -> bit1 (rest n))
+        ident)
+    ident;
+
+pub pred = y pred -> n ->
+    empty n
+        (x -> nil)
+        (x -> first n
+            (x -> bit0 (rest n))
+            (x -> bit1 (pred (rest n)))
+        ident)
+    ident;
+
+less_than = y less_than -> lt -> a -> b ->
+    empty a
+        (x -> empty b lt true)
+        (x -> empty b
+            (x -> false)
+            (x -> (a0 -> b0 -> less_than (xor a0 b0 b0 lt) (rest a) (rest b)) (first a) (first b))
+        ident)
+    ident;
+
+pub less = less_than false;
+pub greater = a -> b -> less b a;
+
+pub equal = y equal -> a -> b ->
+    empty a
+        (x -> empty b)
+        (x -> empty b
+            (x -> false)
+            (x -> xor (first a) (first b)
+                (x -> false)
+                (x -> equal (rest a) (rest b))
+            ident)
+        ident)
+    ident;
+
+add_carry = y add_carry -> c -> a -> b ->
+    empty a
+        (x -> c (x -> succ b) (x -> b) ident)
+        (x -> empty b
+            (x -> c (x -> succ a) (x -> a) ident)
+            (x -> (a0 -> b0 -> cons_bit
+                    (xor (xor a0 b0) c)
+                    (add_carry (a0 (or b0 c) (and b0 c)) (rest a) (rest b))
+                ) (first a) (first b))
+        ident)
+    ident;
+
+pub add = add_carry false;
+
+# subtracts b and the borrow c from a, which must not be less than b
+sub_borrow = y sub_borrow -> c -> a -> b ->
+    empty b
+        (x -> c (x -> pred a) (x -> a) ident)
+        (x -> (a0 -> b0 -> cons_bit
+                (xor (xor a0 b0) c)
+                (sub_borrow (a0 (and b0 c) (or b0 c)) (rest a) (rest b))
+            ) (first a) (first b))
+    ident;
+
+pub sub = a -> b -> less a b (x -> zero) (x -> sub_borrow false a b) ident;
+
+pub mul = a -> y (mul -> b ->
+    empty b
+        (x -> zero)
+        (x -> first b
+            (x -> add a (bit0 (mul (rest b))))
+            (x -> bit0 (mul (rest b)))
+        ident)
+    ident);
+
+# long division from the most significant bit, dividing by zero sets all bits
+# of the quotient instead of looping forever
+pub divmod = a -> b -> y (divmod -> a ->
+    empty a
+        (x -> pair zero zero)
+        (x -> (qr -> (r ->
+                less r b
+                    (x -> pair (bit0 (1st qr)) r)
+                    (x -> pair (bit1 (1st qr)) (sub_borrow false r b))
+                ident
+            ) (cons_bit (first a) (2nd qr))) (divmod (rest a)))
+    ident) a;
+
+pub div = a -> b -> 1st (divmod a b);
+pub rem = a -> b -> 2nd (divmod a b);
+
+# conversions from and to the unary numbers of std, which take time linear in
+# the value
+pub from_nat = nat -> super::count succ zero nat;
+
+pub to_nat = y to_nat -> n ->
+    empty n
+        (x -> super::zero)
+        (x -> (m -> super::add (super::add m m) (first n super::1 super::0)) (to_nat (rest n)))
+    ident;
+""".strip()
@@ -82,6 +82,7 @@ pub dec2 = a -> b -> add (mul a 10) b;
 pub dec3 = a -> b -> c -> dec2 (dec2 a b) c;
 
 pub prepend = pair;
+pub prepend_to = list -> el -> prepend el list;
 pub first = 1st;
 pub rest = 2nd;
 pub nil = false;
@@ -123,4 +124,6 @@ pub append_n = y append_n -> nat -> list ->
     ident;
 
 pub list_n = nat -> append_n nat nil;
+
+pub mod bin;
 """.strip()
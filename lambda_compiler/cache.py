@@ -0,0 +1,84 @@
+from typing import *
+from functools import cache
+from lambda_compiler.version import __version__
+import hashlib
+import os
+import os.path
+import sys
+import tempfile
+
+def fingerprint(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+@cache
+def compiler_fingerprint() -> str:
+    # cached outputs are only valid for the compiler that produced them, so
+    # every key includes the sources of the compiler
+    root = os.path.dirname(os.path.abspath(__file__))
+    parts = [__version__]
+    for dir, dirs, files in os.walk(root):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".py"):
+                with open(os.path.join(dir, name)) as f:
+                    parts.append(os.path.relpath(os.path.join(dir, name), root))
+                    parts.append(f.read())
+    return fingerprint(*parts)
+
+def write_atomic(path: str, text: str):
+    # parallel jobs may write the same file, readers never see partial ones
+    fd, tmp_path = tempfile.mkstemp(dir = os.path.dirname(path) or ".", prefix = ".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_if_changed(path: str, text: str) -> bool:
+    """
+    write text to path unless it already holds text, so that make does not
+    rebuild what depends on outputs that did not change
+    """
+
+    if os.path.isfile(path):
+        with open(path) as f:
+            if f.read() == text:
+                return False
+
+    write_atomic(path, text)
+    return True
+
+def write_output(path: str, text: str, if_changed: bool):
+    if path == "-":
+        sys.stdout.write(text)
+    elif if_changed:
+        write_if_changed(path, text)
+    else:
+        with open(path, "w") as f:
+            f.write(text)
+
+class BuildCache:
+    """
+    outputs of one compiler stage stored in a directory by the fingerprint
+    of everything they were computed from
+    """
+
+    def __init__(self, dir: str, stage: str):
+        self.dir = os.path.join(dir, stage)
+
+    def key(self, *parts: str) -> str:
+        return fingerprint(compiler_fingerprint(), *parts)
+
+    def load(self, key: str) -> Optional[str]:
+        path = os.path.join(self.dir, key)
+        if not os.path.isfile(path):
+            return None
+
+        with open(path) as f:
+            return f.read()
+
+    def store(self, key: str, text: str):
+        os.makedirs(self.dir, exist_ok = True)
+        write_atomic(os.path.join(self.dir, key), text)
@@ -1,10 +1,12 @@
 from typing import *
 from lambda_compiler.version import __version__
+from lambda_compiler.recursion import raise_recursion_limit
+from lambda_compiler.cache import write_output
 from lambda_compiler.parse.hlir import parse_hlir
 from lambda_compiler.pretty.hlir import pretty_hlir
 import argparse
+import io
 import os.path
-import sys
 
 def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
     ap = argparse.ArgumentParser(
@@ -13,11 +15,13 @@ def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
 
     ap.add_argument("input", help = "the input HLIR file", nargs = "?")
     ap.add_argument("-o", "--output", help = "the output HLIS file")
+    ap.add_argument("--keep-unchanged", action = "store_true", default=False, help = "do not rewrite the output file if its contents did not change")
     ap.add_argument("-v", "--version", action = "store_true", default=False, help = "print current version and exit")
 
     return ap, ap.parse_args()
 
 def main():
+    raise_recursion_limit()
     ap, args = parse_args()
 
     if args.version:
@@ -41,8 +45,9 @@ def main():
 
     ast = parse_hlir(code, infile, stub=True)
 
-    with sys.stdout if outfile == "-" else open(outfile, "w") as f:
-        pretty_hlir(ast, file=f, stub=True)
+    out = io.StringIO()
+    pretty_hlir(ast, file=out, stub=True)
+    write_output(outfile, out.getvalue(), if_changed=args.keep_unchanged)
 
 if __name__ == "__main__":
     main()
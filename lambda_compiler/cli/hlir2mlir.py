@@ -1,9 +1,21 @@
 from typing import *
 from lambda_compiler.version import __version__
+from lambda_compiler.recursion import raise_recursion_limit
+from lambda_compiler.search_path import get_crate_search_path
+from lambda_compiler.cache import BuildCache, write_output
+from lambda_compiler.ast.path import Path
+from lambda_compiler.ast.hlir import Statement, ExternCrate, Assignment
+from lambda_compiler.ast import mlir
 from lambda_compiler.parse.hlir import parse_hlir
-from lambda_compiler.passes.hlir.compile import compile_hlir
+from lambda_compiler.passes.hlir.collect_deps import collect_deps
+from lambda_compiler.passes.hlir.inline import DEFAULT_INLINE_THRESHOLD, inline_hlir
+from lambda_compiler.passes.hlir.eta import eta_reduce
+from lambda_compiler.passes.hlir.compile import compile_hlir, compile_hlir_parallel
+from lambda_compiler.passes.hlir.fingerprint import fingerprint_hlir
 from lambda_compiler.pretty.mlir import pretty_mlir
 import argparse
+import io
+import os
 import os.path
 import sys
 
@@ -14,11 +26,64 @@ def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
 
     ap.add_argument("input", help = "the input HLIR file", nargs = "?")
     ap.add_argument("-o", "--output", help = "the output MLIR file")
+    ap.add_argument("-P", "--crate-path", action = "append", help = "add a directory to the crate search path")
+    ap.add_argument("--no-default-crate-path", action = "store_true", default=False, help = "do not use default crate search paths")
+    ap.add_argument("-i", "--inline-threshold", type = int, default = DEFAULT_INLINE_THRESHOLD, help = "the maximum size of inlined definitions, 0 disables inlining")
+    ap.add_argument("-j", "--jobs", type = int, default = 1, help = "the number of processes compiling definitions in parallel, 0 uses one per CPU")
+    ap.add_argument("--cache", help = "reuse the MLIR of definitions whose HLIR and dependencies did not change from this directory")
     ap.add_argument("-v", "--version", action = "store_true", help = "print current version and exit")
 
     return ap, ap.parse_args()
 
+def pretty_mlir_str(prog: List[mlir.Statement]) -> str:
+    out = io.StringIO()
+    pretty_mlir(prog, file=out)
+    return out.getvalue()
+
+def split_definitions(prog: List[mlir.Statement]) -> List[List[mlir.Statement]]:
+    # the statements compiled from an assignment end with its definition
+    parts: List[List[mlir.Statement]] = [[]]
+    for stmt in prog:
+        parts[-1].append(stmt)
+        if isinstance(stmt, mlir.Definition):
+            parts.append([])
+    return parts[:-1]
+
+def hlir_passes(ast: List[Statement], deps_ast: List[Statement], inline_threshold: int) -> List[Statement]:
+    if inline_threshold > 0:
+        ast = inline_hlir(ast, deps_ast, inline_threshold)
+    return eta_reduce(ast)
+
+def compile_cached(ast: List[Statement], deps_ast: List[Statement], inline_threshold: int, jobs: int, cache: BuildCache) -> str:
+    # only the definitions whose fingerprint is not cached yet are compiled,
+    # inlining and eta reduction still see the whole crate
+    crates = sorted(stmt.name for stmt in ast if isinstance(stmt, ExternCrate))
+    salt = f"{inline_threshold} {' '.join(crates)}"
+    keys = {path: cache.key(fingerprint) for path, fingerprint in fingerprint_hlir(ast, deps_ast, salt).items()}
+    fragments: Dict[Path, str] = {}
+    for path, key in keys.items():
+        fragment = cache.load(key)
+        if fragment is not None:
+            fragments[path] = fragment
+
+    missing = keys.keys() - fragments.keys()
+    if len(missing) > 0:
+        todo = [stmt for stmt in hlir_passes(ast, deps_ast, inline_threshold) if isinstance(stmt, Assignment) and stmt.path in missing]
+        for ass, part in zip(todo, split_definitions(compile_hlir_parallel(todo, jobs))):
+            fragments[ass.path] = pretty_mlir_str(part)
+            cache.store(keys[ass.path], fragments[ass.path])
+
+    mlir_code = ""
+    for stmt in ast:
+        match stmt:
+            case Assignment(path):
+                mlir_code += fragments[path]
+            case _:
+                mlir_code += pretty_mlir_str(compile_hlir([stmt]))
+    return mlir_code
+
 def main():
+    raise_recursion_limit()
     ap, args = parse_args()
 
     if args.version:
@@ -33,6 +98,8 @@ def main():
     infile_dir = os.path.dirname(infile)
     infile_name = os.path.basename(infile).split(".", 1)[0]
 
+    crate_path = get_crate_search_path(args.crate_path or [], not args.no_default_crate_path)
+
     outfile = args.output
     if outfile is None:
         outfile = os.path.join(infile_dir, infile_name + ".mlir")
@@ -41,10 +108,17 @@ def main():
         code = f.read()
 
     ast = parse_hlir(code, infile)
-    mlir = compile_hlir(ast)
+    deps_ast = collect_deps(ast, crate_path) if args.inline_threshold > 0 else []
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+
+    if args.cache is None:
+        mlir = compile_hlir_parallel(hlir_passes(ast, deps_ast, args.inline_threshold), jobs)
+        with sys.stdout if outfile == "-" else open(outfile, "w") as f:
+            pretty_mlir(mlir, file=f)
+        return
 
-    with sys.stdout if outfile == "-" else open(outfile, "w") as f:
-        pretty_mlir(mlir, file=f)
+    mlir_code = compile_cached(ast, deps_ast, args.inline_threshold, jobs, BuildCache(args.cache, "mlir"))
+    write_output(outfile, mlir_code, if_changed=True)
 
 if __name__ == "__main__":
     main()
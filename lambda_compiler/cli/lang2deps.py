@@ -1,5 +1,6 @@
 from typing import *
 from lambda_compiler.version import __version__
+from lambda_compiler.recursion import raise_recursion_limit
 from lambda_compiler.search_path import get_crate_search_path
 from lambda_compiler.passes.lang.collect_deps import collect_crate
 from lambda_compiler.pretty.deps import pretty_make_deps
@@ -22,6 +23,7 @@ def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
     return ap, ap.parse_args()
 
 def main():
+    raise_recursion_limit()
     ap, args = parse_args()
 
     if args.version:
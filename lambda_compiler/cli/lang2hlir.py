@@ -1,13 +1,15 @@
 from typing import *
 from lambda_compiler.version import __version__
+from lambda_compiler.recursion import raise_recursion_limit
+from lambda_compiler.cache import write_output
 from lambda_compiler.search_path import get_crate_search_path
 from lambda_compiler.passes.lang.collect_deps import collect_crate
 from lambda_compiler.passes.lang.demacro import demacro
 from lambda_compiler.passes.lang.resolve import resolve
 from lambda_compiler.pretty.hlir import pretty_hlir
 import argparse
+import io
 import os.path
-import sys
 
 def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
     ap = argparse.ArgumentParser(
@@ -18,12 +20,15 @@ def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
     ap.add_argument("-o", "--output", help = "the output HLIR file")
     ap.add_argument("-P", "--crate-path", action = "append", help = "add a directory to the crate search path")
     ap.add_argument("--no-default-crate-path", action = "store_true", default=False, help = "do not use default crate search paths")
+    ap.add_argument("-n", "--native-numbers", action = "store_true", default=False, help = "compile number literals to native machine integers instead of std numerals")
     ap.add_argument("-s", "--stub", action = "store_true", default=False, help = "generate interface stub instead of full HLIR")
+    ap.add_argument("--keep-unchanged", action = "store_true", default=False, help = "do not rewrite the output file if its contents did not change")
     ap.add_argument("-v", "--version", action = "store_true", default=False, help = "print current version and exit")
 
     return ap, ap.parse_args()
 
 def main():
+    raise_recursion_limit()
     ap, args = parse_args()
 
     if args.version:
@@ -45,11 +50,12 @@ def main():
         outfile = os.path.join(infile_dir, infile_name + (".hlis" if args.stub else ".hlir"))
 
     crate = collect_crate(infile, crate_path, allow_hlir=True)
-    crate.file.prog = demacro(crate.file.prog)
+    crate.file.prog = demacro(crate.file.prog, args.native_numbers)
     hlir = resolve(crate)
 
-    with sys.stdout if outfile == "-" else open(outfile, "w") as f:
-        pretty_hlir(hlir, file=f, stub=args.stub)
+    out = io.StringIO()
+    pretty_hlir(hlir, file=out, stub=args.stub)
+    write_output(outfile, out.getvalue(), if_changed=args.keep_unchanged)
 
 if __name__ == "__main__":
     main()
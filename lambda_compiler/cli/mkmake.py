@@ -10,6 +10,7 @@ def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
     )
 
     ap.add_argument("name", help = "the crate name for the Lambda project")
+    ap.add_argument("-n", "--native-numbers", action = "store_true", default=False, help = "use native machine integers for std numerals and number literals")
     ap.add_argument("-v", "--version", action = "store_true", default=False, help = "print current version and exit")
 
     return ap, ap.parse_args()
@@ -33,11 +34,19 @@ def main():
         ap.print_help()
         return
 
-    write_file(bf.makefile.filename, bf.makefile.source_template.format(name = name))
+    h_flags = " --native-numbers" if args.native_numbers else ""
+    std_lambda = bf.std_native_lambda if args.native_numbers else bf.std_lambda
+    io_lambda = bf.io_native_lambda if args.native_numbers else bf.io_lambda
+    io_c = bf.io_native_c if args.native_numbers else bf.io_c
+
+    write_file(bf.makefile.filename, bf.makefile.source_template.format(name = name, h_flags = h_flags))
     write_file(bf.crate_lambda.filename_template.format(name = name), bf.crate_lambda.source, overwrite = False)
-    write_file(bf.std_lambda.filename, bf.std_lambda.source)
-    write_file(bf.io_lambda.filename, bf.io_lambda.source)
-    write_file(bf.io_c.filename, bf.io_c.source)
+    write_file(std_lambda.filename, std_lambda.source)
+    write_file(bf.std_bin_lambda.filename, bf.std_bin_lambda.source)
+    write_file(io_lambda.filename, io_lambda.source)
+    write_file(io_c.filename, io_c.source)
+    if args.native_numbers:
+        write_file(bf.num_c.filename, bf.num_c.source)
     write_file(bf.runtime_h.filename, bf.runtime_h.source)
     write_file(bf.runtime_c.filename, bf.runtime_c.source)
 
@@ -1,9 +1,12 @@
 from typing import *
 from lambda_compiler.version import __version__
+from lambda_compiler.cache import BuildCache, write_output
 from lambda_compiler.parse.mlir import parse_mlir
 from lambda_compiler.passes.llir.target import TARGETS
-from lambda_compiler.passes.llir.generate import generate_llir
+from lambda_compiler.passes.llir.generate import generate_llir, generate_llir_partitions, partition_statements
+from lambda_compiler.pretty.mlir import pretty_mlir
 import argparse
+import io
 import platform
 import os.path
 import sys
@@ -17,6 +20,11 @@ def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
     ap.add_argument("-o", "--output", help = "the output LLIR file")
     ap.add_argument("-c", "--crate-name", help = "set the name of the compiled crate")
     ap.add_argument("-t", "--target", help = "set the architecture to compile for")
+    ap.add_argument("--no-cont-stack", action = "store_false", dest = "cont_stack", default = True, help = "allocate continuations on the heap instead of the runtime continuation stack")
+    ap.add_argument("--lazy-init", action = "store_true", default = False, help = "initialize globals on their first load instead of at startup")
+    ap.add_argument("-n", "--partitions", type = int, default = 1, help = "split the crate into this many modules")
+    ap.add_argument("-p", "--partition", type = int, help = "only write this partition of the crate, by default all partitions are written next to the output file")
+    ap.add_argument("--cache", help = "reuse the LLVM IR of unchanged crates and partitions from this directory")
     ap.add_argument("-v", "--version", action = "store_true", help = "print current version and exit")
 
     return ap, ap.parse_args()
@@ -55,14 +63,54 @@ def main():
 
     arch = TARGETS[target]
 
+    if args.partitions < 1 or args.partition is not None and not 0 <= args.partition < args.partitions:
+        print(f"error: invalid partition {args.partition} of {args.partitions}", file = sys.stderr)
+        sys.exit(1)
+
     with open(infile, "r") as f:
         code = f.read()
 
+    # partition K of build/a.ll is written to build/a.partK.ll
+    outfile_base = outfile.removesuffix(".ll")
+    if args.partitions == 1 or args.partition is not None:
+        outputs = {args.partition or 0: outfile}
+    else:
+        outputs = {partition: f"{outfile_base}.part{partition}.ll" for partition in range(args.partitions)}
+
     ast = parse_mlir(code, infile)
-    llir = generate_llir(ast, crate, arch)
 
-    with sys.stdout if outfile == "-" else open(outfile, "w") as f:
-        f.write(llir)
+    # a partition is keyed by the statements it is generated from, so only
+    # the partitions an edit changed are generated again
+    cache = BuildCache(args.cache, "ll") if args.cache is not None else None
+    missing = list(outputs)
+    if cache is not None:
+        options = f"{crate} {target} {args.cont_stack} {args.lazy_init} {args.partitions}"
+        keys: Dict[int, str] = {}
+        for partition in outputs:
+            source = io.StringIO()
+            pretty_mlir(partition_statements(ast, args.partitions, partition), file=source)
+            keys[partition] = cache.key(options, str(partition), source.getvalue())
+
+        missing = []
+        for partition, key in keys.items():
+            cached = cache.load(key)
+            if cached is None:
+                missing.append(partition)
+            else:
+                write_output(outputs[partition], cached, if_changed=True)
+
+    if len(missing) == 0:
+        return
+    elif len(missing) == 1:
+        partition = missing[0]
+        llirs = {partition: generate_llir(ast, crate, arch, args.cont_stack, args.lazy_init, args.partitions, partition)}
+    else:
+        llirs = dict(zip(missing, generate_llir_partitions(ast, crate, arch, args.cont_stack, args.lazy_init, args.partitions, missing)))
+
+    for partition, llir in llirs.items():
+        if cache is not None:
+            cache.store(keys[partition], llir)
+        write_output(outputs[partition], llir, if_changed=cache is not None)
 
 if __name__ == "__main__":
     main()
@@ -21,6 +21,8 @@ def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
     ap.add_argument("--no-default-crate-path", action = "store_true", default=False, help = "do not use default crate search paths")
     ap.add_argument("-c", "--crate-name", help = "set the name of the compiled crate")
     ap.add_argument("-t", "--target", help = "set the architecture to compile for")
+    ap.add_argument("--no-cont-stack", action = "store_false", dest = "cont_stack", default = True, help = "allocate continuations on the heap instead of the runtime continuation stack")
+    ap.add_argument("--lazy-init", action = "store_true", default = False, help = "initialize globals on their first load instead of at startup")
     ap.add_argument("-v", "--version", action = "store_true", help = "print current version and exit")
 
     return ap, ap.parse_args()
@@ -66,7 +68,7 @@ def main():
 
     ast = parse_mlir(code, infile)
     deps_ast, crates = collect_deps(crate, ast, crate_path)
-    llir = generate_main_llir(crates, arch)
+    llir = generate_main_llir(crates, arch, args.cont_stack, args.lazy_init)
 
     with sys.stdout if outfile == "-" else open(outfile, "w") as f:
         f.write(llir)
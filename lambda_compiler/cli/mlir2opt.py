@@ -1,14 +1,17 @@
 from typing import *
 from lambda_compiler.version import __version__
 from lambda_compiler.search_path import get_crate_search_path
+from lambda_compiler.cache import BuildCache, write_output
+from lambda_compiler.ast.path import Path
+from lambda_compiler.ast.mlir import ExternCrate
 from lambda_compiler.parse.mlir import parse_mlir
-from lambda_compiler.passes.mlir.collect_deps import load_crate, collect_deps
+from lambda_compiler.passes.mlir.collect_deps import find_crate, collect_deps
 from lambda_compiler.passes.mlir.link import link_mlir, unlink_mlir
-from lambda_compiler.passes.mlir.optimize import optimize_mlir
+from lambda_compiler.passes.mlir.optimize import DEFAULT_PREPEND_BUDGET, DEFAULT_SPECIALIZE_BUDGET, optimize_mlir
 from lambda_compiler.pretty.mlir import pretty_mlir
 import argparse
+import io
 import os.path
-import sys
 
 def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
     ap = argparse.ArgumentParser(
@@ -20,6 +23,12 @@ def parse_args() -> Tuple[argparse.ArgumentParser, argparse.Namespace]:
     ap.add_argument("-P", "--crate-path", action = "append", help = "add a directory to the crate search path")
     ap.add_argument("--no-default-crate-path", action = "store_true", default=False, help = "do not use default crate search paths")
     ap.add_argument("-c", "--crate-name", help = "set the name of the compiled crate")
+    ap.add_argument("-S", "--snapshot", action = "store_true", default = False, help = "evaluate initialization at compile time as far as possible")
+    ap.add_argument("--snapshot-steps", type = int, default = 100000, help = "the maximum number of evaluation steps per snapshotted definition")
+    ap.add_argument("--prepend-budget", type = int, default = DEFAULT_PREPEND_BUDGET, help = "the maximum number of impls copied to prepend called continuation chains, 0 disables copying")
+    ap.add_argument("--specialize-budget", type = int, default = DEFAULT_SPECIALIZE_BUDGET, help = "the maximum number of impls cloned for the static instances closures capture, 0 disables cloning")
+    ap.add_argument("-W", "--whole-program", action = "store_true", default = False, help = "link all crates into one program that only keeps what main uses")
+    ap.add_argument("--cache", help = "reuse the optimized MLIR of unchanged crates from this directory")
     ap.add_argument("-v", "--version", action = "store_true", help = "print current version and exit")
 
     return ap, ap.parse_args()
@@ -54,13 +63,43 @@ def main():
 
     ast = parse_mlir(code, infile)
     deps_ast, crates = collect_deps(crate, ast, crate_path)
-    deps_ast = link_mlir(deps_ast)
-    ast = link_mlir(ast, deps_ast)
-    ast = optimize_mlir(ast, deps_ast)
+    snapshot_steps = args.snapshot_steps if args.snapshot else 0
+
+    # definitions are deduplicated and specialized across the whole crate,
+    # so optimized crates are only reused as a whole, keyed by the files of
+    # the crate and of the crates it depends on
+    cache = BuildCache(args.cache, "opt.mlir") if args.cache is not None else None
+    if cache is not None:
+        options = f"{crate} {snapshot_steps} {args.prepend_budget} {args.specialize_budget} {args.whole_program}"
+        deps_code: List[str] = []
+        for dep in crates:
+            if dep != crate:
+                with open(find_crate(dep, crate_path)) as f:
+                    deps_code += [dep, f.read()]
+        key = cache.key(options, code, *deps_code)
+        cached = cache.load(key)
+        if cached is not None:
+            write_output(outfile, cached, if_changed=True)
+            return
+
+    if args.whole_program:
+        # the crates are optimized as one crate without dependencies, whose
+        # main is what the program runs
+        ast = [stmt for stmt in deps_ast + ast if not isinstance(stmt, ExternCrate)]
+        ast = link_mlir(ast)
+        ast = optimize_mlir(ast, [], snapshot_steps, args.prepend_budget, args.specialize_budget, [Path(()) / crate / "main"])
+    else:
+        deps_ast = link_mlir(deps_ast)
+        ast = link_mlir(ast, deps_ast)
+        ast = optimize_mlir(ast, deps_ast, snapshot_steps, args.prepend_budget, args.specialize_budget)
+
     ast = unlink_mlir(ast)
 
-    with sys.stdout if outfile == "-" else open(outfile, "w") as f:
-        pretty_mlir(ast, file=f)
+    out = io.StringIO()
+    pretty_mlir(ast, file=out)
+    if cache is not None:
+        cache.store(key, out.getvalue())
+    write_output(outfile, out.getvalue(), if_changed=cache is not None)
 
 if __name__ == "__main__":
     main()
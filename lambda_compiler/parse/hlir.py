@@ -19,6 +19,9 @@ def parse_hlir(code: str, file: str, stub: bool = False) -> List[Statement]:
         elif p.token == Token.ParenOpen:
             p.drop()
             expr = parse_paren()
+        elif p.token == Token.MacroMarker:
+            p.drop()
+            expr = Number(p.parse_number())
         elif p.token == Token.Ident:
             name = p.eat()
             if p.token == Token.PathSep:
@@ -84,6 +87,12 @@ def parse_hlir(code: str, file: str, stub: bool = False) -> List[Statement]:
 
         return Extern(name)
 
+    def parse_extern_pure() -> Extern:
+        name = p.eat(Token.Ident)
+        p.eat(Token.SemiColon)
+
+        return Extern(name, is_impure = False)
+
     def parse_extern() -> Statement:
         p.eat(Token.Extern)
 
@@ -91,6 +100,8 @@ def parse_hlir(code: str, file: str, stub: bool = False) -> List[Statement]:
             return parse_extern_crate()
         elif p.token == Token.Impure:
             return parse_extern_impure()
+        elif p.token == Token.Ident:
+            return parse_extern_pure()
         else:
             p.err()
 
@@ -16,6 +16,15 @@ class NumberParser(PathParser):
         s = self.eat(Token.Ident)
         return int(s)
 
+    def is_binary_number(self) -> bool:
+        return self.text.startswith("b") and self.text[1:].isdigit()
+
+    def parse_binary_number(self) -> int:
+        if any(c not in "01" for c in self.text[1:]):
+            self.err("binary number literals may only contain the digits 0 and 1")
+        s = self.eat(Token.Ident)
+        return int(s[1:], 2)
+
 def parse_lang(code: str, file: str) -> List[Statement]:
     p = NumberParser(code, file)
 
@@ -37,6 +46,9 @@ def parse_lang(code: str, file: str) -> List[Statement]:
     def parse_num() -> Number:
         return Number(p.parse_number())
 
+    def parse_binary() -> Binary:
+        return Binary(p.parse_binary_number())
+
     def parse_macro() -> Macro:
         p.eat(Token.MacroMarker)
 
@@ -46,6 +58,8 @@ def parse_lang(code: str, file: str) -> List[Statement]:
             return parse_char()
         elif p.token == Token.Ident and p.is_number():
             return parse_num()
+        elif p.token == Token.Ident and p.is_binary_number():
+            return parse_binary()
         p.err()
 
     def parse_expr() -> Expr:
@@ -128,6 +142,12 @@ def parse_lang(code: str, file: str) -> List[Statement]:
 
         return Extern(name)
 
+    def parse_extern_pure() -> Extern:
+        name = p.eat(Token.Ident)
+        p.eat(Token.SemiColon)
+
+        return Extern(name, is_impure = False)
+
     def parse_extern() -> Statement:
         p.eat(Token.Extern)
 
@@ -135,6 +155,8 @@ def parse_lang(code: str, file: str) -> List[Statement]:
             return parse_extern_crate()
         elif p.token == Token.Impure:
             return parse_extern_impure()
+        elif p.token == Token.Ident:
+            return parse_extern_pure()
         else:
             p.err()
 
@@ -62,11 +62,17 @@ def parse_mlir(code: str, file: str) -> List[Statement]:
         p.eat(Token.SemiColon)
         return Definition(path, inst, needs_init, is_public)
 
-    def parse_inst() -> Instance:
+    def parse_inst() -> Instance | NumberInstance:
         p.eat(Token.Inst)
         inst = parse_inst_path()
         p.eat(Token.Assign)
 
+        if p.token == Token.MacroMarker:
+            p.eat()
+            value = p.parse_number()
+            p.eat(Token.SemiColon)
+            return NumberInstance(inst, value)
+
         impl = parse_impl_path()
 
         captures = []
@@ -78,12 +84,15 @@ def parse_mlir(code: str, file: str) -> List[Statement]:
         p.eat(Token.SemiColon)
         return Instance(inst, impl, captures)
 
-    def parse_capture(captures: Set[int]) -> int | InstancePath:
+    def parse_capture(captures: Set[int]) -> int | InstancePath | SelfLiteral:
         if p.token == Token.CapturePrefix:
             p.eat()
             id = p.parse_number()
             captures.add(id)
             return id
+        elif p.token == Token.Self:
+            p.eat()
+            return SelfLiteral()
         else:
             return parse_inst_path()
 
@@ -93,6 +102,9 @@ def parse_mlir(code: str, file: str) -> List[Statement]:
             id = p.parse_number()
             captures.add(id)
             return CaptureLiteral(id)
+        elif p.token == Token.Self:
+            p.eat()
+            return SelfLiteral()
 
         name = p.eat(Token.Ident)
         if p.token != Token.PathSep:
@@ -105,7 +117,7 @@ def parse_mlir(code: str, file: str) -> List[Statement]:
         elif p.token == Token.ImplSep:
             impl_path = parse_impl_path(path)
 
-            impl_captures: List[int | InstancePath] = []
+            impl_captures: List[int | InstancePath | SelfLiteral] = []
             p.eat(Token.CaptureOpen)
             while p.token != Token.CaptureClose:
                 impl_captures.append(parse_capture(captures))
@@ -129,12 +141,21 @@ def parse_mlir(code: str, file: str) -> List[Statement]:
             p.eat(Token.Arrow)
             c = parse_value_lit(captures)
 
+        branch: Optional[List[ValueLiteral]] = None
+        if p.token == Token.Branch:
+            p.eat()
+            branch = [parse_value_lit(captures) for _ in range(4)]
+
         if 0 in captures:
             captures.remove(0)
 
         p.eat(Token.SemiColon)
         impl_metadata: Tuple[ImplementationPath, int] = (impl_path, len(captures))
         impl: Implementation
+        if branch is not None:
+            assert b is not None and c is not None
+            return BranchImplementation(*impl_metadata, a, b, c, *branch)
+
         match (a, b, c):
             case (a, None, None):
                 impl = ReturnImplementation(*impl_metadata, a)
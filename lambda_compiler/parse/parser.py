@@ -19,6 +19,7 @@ class Token(Enum):
     CaptureOpen = auto()
     CaptureClose = auto()
     Ellipsis = auto()
+    Branch = auto()
     Pub = auto()
     Impure = auto()
     Mod = auto()
@@ -54,6 +55,7 @@ patterns: List[Tuple[str, Optional[Token]]] = [
     (r"\[", Token.CaptureOpen),
     (r"\]", Token.CaptureClose),
     (r"\.\.\.", Token.Ellipsis),
+    (r"\?", Token.Branch),
     ("pub(?=[^a-zA-Z0-9])", Token.Pub),
     ("impure(?=[^a-zA-Z0-9])", Token.Impure),
     ("mod(?=[^a-zA-Z0-9])", Token.Mod),
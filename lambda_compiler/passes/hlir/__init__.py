@@ -1 +1,5 @@
+from . import collect_deps
 from . import compile
+from . import eta
+from . import fingerprint
+from . import inline
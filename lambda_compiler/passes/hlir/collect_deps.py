@@ -0,0 +1,36 @@
+from ...ast.hlir import *
+from ...parse.hlir import parse_hlir
+import os.path
+
+class CollectHLIRError(Exception):
+    pass
+
+def load_crate(crate: str, crate_path: List[str]) -> List[Statement]:
+    for dir in crate_path:
+        crate_src = os.path.join(dir, f"{crate}.hlir")
+        if os.path.isfile(crate_src):
+            break
+    else:
+        raise CollectHLIRError(f"did not find crate '{crate}'")
+
+    with open(crate_src) as f:
+        code = f.read()
+        return parse_hlir(code, crate_src)
+
+def collect_deps(prog: List[Statement], crate_path: List[str]) -> List[Statement]:
+    found_crates: Set[str] = set()
+    collected: List[Statement] = []
+
+    def collect_crate(prog: List[Statement]):
+        nonlocal collected
+
+        for stmt in prog:
+            match stmt:
+                case ExternCrate(crate) if crate not in found_crates:
+                    found_crates.add(crate)
+                    dep = load_crate(crate, crate_path)
+                    collect_crate(dep)
+                    collected += dep
+
+    collect_crate(prog)
+    return collected
@@ -1,9 +1,16 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from ...ast.path import Path, ImplementationPath, InstancePath
 from ...ast.hlir import *
 from ...ast import mlir
+from ...recursion import raise_recursion_limit
+from .inline import expr_size
+
+# the number of chunks per worker process of compile_hlir_parallel, more
+# chunks than workers even out definitions of different sizes
+CHUNKS_PER_JOB = 4
 
 class CompileHLIRError(Exception):
     pass
@@ -28,6 +35,10 @@ class ExternLiteral(ValueLiteral):
 class DefinitionLiteral(ValueLiteral):
     path: Path
 
+@dataclass
+class NumberLiteral(ValueLiteral):
+    value: int
+
 @dataclass
 class LambdaLiteral(ValueLiteral):
     id: int
@@ -76,16 +87,23 @@ class LambdaContext:
     def get_serialized_call_result(self, lit: ValueLiteral) -> SerializedCallResult:
         return SerializedCallResult(lit, self.get_serialized_call_param(self.temp_id))
 
-    def sort_captures(self, captures: Set[Optional[int | str]]) -> List[Optional[int | str]]:
+    def sort_captures(self, captures: Set[Optional[int | str]], param: Optional[int | str] = None) -> List[Optional[int | str]]:
+        # param comes first as $0, followed by the variables from the
+        # outermost to the innermost and the temporaries from the oldest to
+        # the newest, so the captures of a continuation start with those of
+        # the impl building it and closures reusing its memory keep them in
+        # place
         capture_list = list(captures)
-        def sort_key(v: Optional[int | str]):
+        def sort_key(v: Optional[int | str]) -> Tuple[int, int]:
             match v:
-                case int():
-                    return -v - 1
+                case _ if v == param:
+                    return (0, 0)
                 case str():
-                    return self.scope.index(v) + 1
+                    return (1, -self.scope.index(v))
+                case int():
+                    return (2, v)
                 case _:
-                    return 0
+                    return (0, 0)
         capture_list.sort(key = sort_key)
         return capture_list
 
@@ -96,6 +114,15 @@ def compile_hlir(prog: List[Statement]) -> List[mlir.Statement]:
         lambda_id_table[path] += 1
         return id
 
+    # instance 0 of each path is its definition's instance, native number
+    # literals become further constant instances, one per distinct value
+    number_table: DefaultDict[Path, Dict[int, mlir.NumberInstance]] = defaultdict(dict)
+    def get_number_instance(path: Path, value: int) -> InstancePath:
+        numbers = number_table[path]
+        if value not in numbers:
+            numbers[value] = mlir.NumberInstance(InstancePath(path, len(numbers) + 1), value)
+        return numbers[value].path
+
     def visit_program(prog: List[Statement]) -> List[mlir.Statement]:
         mlir = []
         for stmt in prog:
@@ -120,7 +147,8 @@ def compile_hlir(prog: List[Statement]) -> List[mlir.Statement]:
         impl, captures = visit_body_expr(ass.value, ctx)
         inst = mlir.Instance(InstancePath(ass.path, 0), impl.path, [])
         defi = mlir.Definition(ass.path, inst.path, needs_init=True, is_public=ass.is_public)
-        return ctx.impls + [inst, defi]
+        numbers = list(number_table[ass.path].values())
+        return cast(List[mlir.Statement], numbers) + ctx.impls + [inst, defi]
 
     def visit_expr(expr: Expr, ctx: LambdaContext) -> ValueLiteral:
         match expr:
@@ -133,6 +161,8 @@ def compile_hlir(prog: List[Statement]) -> List[mlir.Statement]:
                     return ExternLiteral(name)
             case Absolute(path):
                 return DefinitionLiteral(path)
+            case Number(value):
+                return NumberLiteral(value)
             case Call() as call:
                 return visit_call(call, ctx)
             case Lambda() as lamb:
@@ -168,7 +198,7 @@ def compile_hlir(prog: List[Statement]) -> List[mlir.Statement]:
 
         captures.add(result.param)
         visit_lit_captures(result.value, captures)
-        capture_lookup = ctx.sort_captures(captures)
+        capture_lookup = ctx.sort_captures(captures, result.param)
         captures.remove(result.param)
 
         if len(ctx.calls) == 0:
@@ -186,7 +216,7 @@ def compile_hlir(prog: List[Statement]) -> List[mlir.Statement]:
             captures.add(call.param)
             visit_lit_captures(call.fn, captures)
             visit_lit_captures(call.arg, captures)
-            capture_lookup = ctx.sort_captures(captures)
+            capture_lookup = ctx.sort_captures(captures, call.param)
             captures.remove(call.param)
 
             impl_metadata: Tuple[ImplementationPath, int] = (
@@ -211,7 +241,7 @@ def compile_hlir(prog: List[Statement]) -> List[mlir.Statement]:
 
     def visit_lit_captures(lit: ValueLiteral, captures: Set[Optional[str | int]]):
         match lit:
-            case ExternLiteral() | DefinitionLiteral():
+            case ExternLiteral() | DefinitionLiteral() | NumberLiteral():
                 pass
             case NamedCaptureLiteral(name):
                 captures.add(name)
@@ -229,6 +259,8 @@ def compile_hlir(prog: List[Statement]) -> List[mlir.Statement]:
                 return mlir.ExternLiteral(name)
             case DefinitionLiteral(path):
                 return mlir.DefinitionLiteral(path)
+            case NumberLiteral(value):
+                return mlir.InstanceLiteral(get_number_instance(ctx.path, value))
             case NamedCaptureLiteral(name):
                 return mlir.CaptureLiteral(captures.index(name))
             case TemporaryCaptureLiteral(id):
@@ -247,3 +279,37 @@ def compile_hlir(prog: List[Statement]) -> List[mlir.Statement]:
                 raise CompileHLIRError(f"unexpected AST node encountered: {lit}")
 
     return visit_program(prog)
+
+def split_program(prog: List[Statement], count: int) -> List[List[Statement]]:
+    # contiguous chunks of about the same total expression size
+    weights = [expr_size(stmt.value) if isinstance(stmt, Assignment) else 1 for stmt in prog]
+    target = sum(weights) / count
+
+    chunks: List[List[Statement]] = [[]]
+    weight = 0
+    for stmt, stmt_weight in zip(prog, weights):
+        if len(chunks[-1]) > 0 and weight >= target * len(chunks) and len(chunks) < count:
+            chunks.append([])
+        chunks[-1].append(stmt)
+        weight += stmt_weight
+
+    return chunks
+
+def compile_hlir_parallel(prog: List[Statement], jobs: int) -> List[mlir.Statement]:
+    """
+    compile_hlir in jobs worker processes
+
+    every assignment is compiled on its own with ids and number instances
+    keyed by its path, which the resolver keeps unique, so contiguous chunks
+    of the program compile to exactly the statements compile_hlir emits for
+    them and are concatenated in order
+    """
+
+    if jobs <= 1:
+        return compile_hlir(prog)
+
+    chunks = split_program(prog, jobs * CHUNKS_PER_JOB)
+    with ProcessPoolExecutor(jobs, initializer = raise_recursion_limit) as executor:
+        results = list(executor.map(compile_hlir, chunks))
+
+    return [stmt for result in results for stmt in result]
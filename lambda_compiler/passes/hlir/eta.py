@@ -0,0 +1,132 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from ...ast.path import Path
+from ...ast.hlir import *
+
+class EtaHLIRError(Exception):
+    pass
+
+@dataclass
+class EtaContext:
+    # pure definitions of the crate that are initialized before the current
+    # one, with the number of arguments they take before doing any work
+    arities: Dict[Path, int] = field(default_factory = dict)
+
+    def is_value(self, expr: Expr, scope: List[str], ass: Assignment) -> bool:
+        # whether evaluating expr has no effects and always terminates, so it
+        # can be evaluated once when the wrapper would have been built
+        match expr:
+            case Paren(inner):
+                return self.is_value(inner, scope, ass)
+            case Ident(name):
+                # externs are loaded when used, they might not be set yet
+                return name in scope
+            case Absolute(path):
+                # definitions of other crates are initialized before this one,
+                # and pure definitions can only refer to pure definitions
+                if path.components[0] != ass.path.components[0]:
+                    return not ass.is_impure
+                return path in self.arities
+            case Call():
+                fn, args = unroll_call(expr)
+                if not isinstance(fn, Absolute) or len(args) >= self.arities.get(fn.path, 0):
+                    return False
+                return self.is_value(fn, scope, ass) and all(self.is_value(arg, scope, ass) for arg in args)
+
+        return False
+
+    def arity(self, expr: Expr) -> int:
+        match expr:
+            case Paren(inner):
+                return self.arity(inner)
+            case Lambda(name, body):
+                return 1 + self.arity(body)
+            case Absolute(path):
+                return self.arities.get(path, 0)
+            case Call():
+                fn, args = unroll_call(expr)
+                if isinstance(fn, Absolute):
+                    return max(0, self.arities.get(fn.path, 0) - len(args))
+
+        return 0
+
+def unroll_call(expr: Expr) -> Tuple[Expr, List[Expr]]:
+    args: List[Expr] = []
+    while True:
+        match expr:
+            case Paren(inner):
+                expr = inner
+            case Call(fn, arg):
+                args.insert(0, arg)
+                expr = fn
+            case _:
+                return expr, args
+
+def is_free(name: str, expr: Expr) -> bool:
+    match expr:
+        case Paren(inner):
+            return is_free(name, inner)
+        case Call(fn, arg):
+            return is_free(name, fn) or is_free(name, arg)
+        case Lambda(arg_name, body):
+            return arg_name != name and is_free(name, body)
+        case Ident(ident):
+            return ident == name
+
+    return False
+
+def eta_reduce(prog: List[Statement]) -> List[Statement]:
+    """
+    replace wrappers like x -> f x and a -> b -> g a b by the function they
+    wrap, which saves building and calling the wrapper closure
+
+    only wrappers around values are reduced, which are captured variables,
+    definitions initialized before the wrapper is built, and partial
+    applications of pure definitions taking more arguments than applied
+    """
+
+    ctx = EtaContext()
+
+    def visit_program(prog: List[Statement]) -> List[Statement]:
+        return [visit_statement(stmt) for stmt in prog]
+
+    def visit_statement(stmt: Statement) -> Statement:
+        match stmt:
+            case ExternCrate() | Extern() | Alias():
+                return stmt
+            case Assignment(path, value, is_public, is_impure) as ass:
+                new_ass = Assignment(path, visit_expr(value, [], ass), is_public, is_impure)
+                if not is_impure:
+                    ctx.arities[path] = ctx.arity(new_ass.value)
+                return new_ass
+            case _:
+                raise EtaHLIRError(f"unexpected AST node encountered: {stmt}")
+
+    def visit_expr(expr: Expr, scope: List[str], ass: Assignment) -> Expr:
+        match expr:
+            case Paren(inner):
+                return Paren(visit_expr(inner, scope, ass))
+            case Call(fn, arg):
+                return Call(visit_expr(fn, scope, ass), visit_expr(arg, scope, ass))
+            case Lambda(name, body):
+                new_body = visit_expr(body, [name] + scope, ass)
+                return reduce_lambda(Lambda(name, new_body), scope, ass)
+            case Ident() | Absolute() | Number():
+                return expr
+            case _:
+                raise EtaHLIRError(f"unexpected AST node encountered: {expr}")
+
+    def reduce_lambda(lamb: Lambda, scope: List[str], ass: Assignment) -> Expr:
+        # x -> f x becomes f
+        body = lamb.body
+        while isinstance(body, Paren):
+            body = body.inner
+
+        match body:
+            case Call(fn, Ident(name)) if name == lamb.name:
+                if not is_free(lamb.name, fn) and ctx.is_value(fn, scope, ass):
+                    return fn
+
+        return lamb
+
+    return visit_program(prog)
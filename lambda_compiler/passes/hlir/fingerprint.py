@@ -0,0 +1,80 @@
+from ...ast.path import Path
+from ...ast.hlir import *
+from ...cache import fingerprint
+
+class FingerprintHLIRError(Exception):
+    pass
+
+def referenced_paths(expr: Expr) -> Set[Path]:
+    match expr:
+        case Paren(inner):
+            return referenced_paths(inner)
+        case Call(fn, arg):
+            return referenced_paths(fn) | referenced_paths(arg)
+        case Lambda(name, body):
+            return referenced_paths(body)
+        case Absolute(path):
+            return {path}
+
+    return set()
+
+def fingerprint_hlir(prog: List[Statement], deps: List[Statement], salt: str = "") -> Dict[Path, str]:
+    """
+    fingerprint every assignment of prog by its own HLIR and that of all
+    definitions it refers to, directly or through other definitions
+
+    what the HLIR passes make of a definition only depends on the
+    definitions it refers to, through inlined bodies and eta reduced
+    partial applications, and on whether they are initialized before it,
+    so equal fingerprints compile to equal MLIR, salt covers everything
+    else like pass options and the crates prog refers to
+    """
+
+    # the fingerprint of each statement on its own, and what it refers to
+    own: Dict[Path, str] = {}
+    refs: Dict[Path, Set[Path]] = {}
+    # the position of the definitions of prog, whose order matters
+    position: Dict[Path, int] = {}
+
+    def visit_statement(stmt: Statement, index: Optional[int]):
+        match stmt:
+            case ExternCrate() | Extern():
+                pass
+            case Assignment(path, value):
+                own[path] = fingerprint(repr(stmt))
+                refs[path] = referenced_paths(value)
+            case Alias(path, target):
+                own[path] = fingerprint(repr(stmt))
+                refs[path] = {target}
+            case _:
+                raise FingerprintHLIRError(f"unexpected AST node encountered: {stmt}")
+
+        if index is not None and isinstance(stmt, Assignment | Alias):
+            position[stmt.path] = index
+
+    for stmt in deps:
+        visit_statement(stmt, None)
+
+    for i, stmt in enumerate(prog):
+        visit_statement(stmt, i)
+
+    def visit_assignment(ass: Assignment) -> str:
+        # definitions can refer to each other, so all reachable ones are
+        # collected instead of combining their transitive fingerprints
+        reachable: Set[Path] = set()
+        todo = list(refs[ass.path])
+        while len(todo) > 0:
+            path = todo.pop()
+            if path in reachable:
+                continue
+            reachable.add(path)
+            todo += refs.get(path, set())
+
+        parts = [salt, own[ass.path]]
+        for path in sorted(reachable):
+            precedes = path in position and position[path] < position[ass.path]
+            parts += [str(path), own.get(path, "unknown"), str(precedes)]
+
+        return fingerprint(*parts)
+
+    return {stmt.path: visit_assignment(stmt) for stmt in prog if isinstance(stmt, Assignment)}
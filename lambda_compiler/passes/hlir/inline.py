@@ -0,0 +1,224 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+from ...ast.path import Path, FIXPOINT_PATH
+from ...ast.hlir import *
+from .eta import unroll_call
+
+DEFAULT_INLINE_THRESHOLD = 12
+
+# inlined bodies may contain calls to other small definitions, which are
+# inlined as well up to this depth
+MAX_INLINE_DEPTH = 8
+
+class InlineHLIRError(Exception):
+    pass
+
+@dataclass
+class InlineContext:
+    threshold: int
+    # crates whose definitions may be referenced by inlined bodies
+    crates: Set[str] = field(default_factory = set)
+    # public definitions of the dependency crates
+    public: Set[Path] = field(default_factory = set)
+    # the bodies of the small pure definitions that are inlined at their
+    # applications, which are all lambdas
+    bodies: Dict[Path, Lambda] = field(default_factory = dict)
+    fresh_count: int = 0
+
+    def fresh(self, name: str) -> str:
+        # source identifiers cannot contain %, so fresh names never clash
+        # with the variables of the code the body is inlined into
+        self.fresh_count += 1
+        return f"{name}%{self.fresh_count}"
+
+    def add_candidate(self, ass: Assignment, local: bool):
+        value = strip_paren(ass.value)
+        # the optimizer compiles applications of std::y as letrec, which it
+        # can only do as long as they stay applications of std::y
+        if ass.is_impure or ass.path == FIXPOINT_PATH or not isinstance(value, Lambda):
+            return
+
+        if expr_size(value) > self.threshold or not self.is_closed(value, [], local):
+            return
+
+        self.bodies[ass.path] = value
+
+    def is_closed(self, expr: Expr, scope: List[str], local: bool) -> bool:
+        # whether expr only refers to its own variables and to definitions
+        # the crate being compiled can refer to as well
+        match expr:
+            case Paren(inner):
+                return self.is_closed(inner, scope, local)
+            case Call(fn, arg):
+                return self.is_closed(fn, scope, local) and self.is_closed(arg, scope, local)
+            case Lambda(name, body):
+                return self.is_closed(body, [name] + scope, local)
+            case Ident(name):
+                # externs are not declared in the crate being compiled
+                return name in scope
+            case Absolute(path):
+                return local or (path.components[0] in self.crates and path in self.public)
+            case Number():
+                return True
+
+        return False
+
+def strip_paren(expr: Expr) -> Expr:
+    while isinstance(expr, Paren):
+        expr = expr.inner
+    return expr
+
+def expr_size(expr: Expr) -> int:
+    match expr:
+        case Paren(inner):
+            return expr_size(inner)
+        case Call(fn, arg):
+            return 1 + expr_size(fn) + expr_size(arg)
+        case Lambda(name, body):
+            return 1 + expr_size(body)
+
+    return 1
+
+def count_uses(name: str, expr: Expr) -> int:
+    # only used on renamed bodies, whose variables are never shadowed
+    match expr:
+        case Paren(inner):
+            return count_uses(name, inner)
+        case Call(fn, arg):
+            return count_uses(name, fn) + count_uses(name, arg)
+        case Lambda(arg_name, body):
+            return count_uses(name, body)
+        case Ident(ident):
+            return 1 if ident == name else 0
+
+    return 0
+
+def inline_hlir(prog: List[Statement], deps: List[Statement], threshold: int = DEFAULT_INLINE_THRESHOLD) -> List[Statement]:
+    """
+    substitute the bodies of small pure definitions at their applications,
+    which saves loading the definition and calling it, and lets the
+    optimizer see through calls like std::1st p or std::not a
+
+    a definition is small if its value is a lambda of at most threshold AST
+    nodes, dependency crates' definitions are taken from their HLIR in deps,
+    only applications to values are inlined so that no evaluation is moved
+    or duplicated, and the variables of every inlined body are renamed so
+    they cannot capture the variables of the arguments
+    """
+
+    ctx = InlineContext(threshold)
+
+    if threshold <= 0:
+        return prog
+
+    for stmt in prog:
+        match stmt:
+            case ExternCrate(name):
+                ctx.crates.add(name)
+
+    for stmt in deps:
+        match stmt:
+            case Assignment(path, value, is_public, is_impure) if is_public:
+                ctx.public.add(path)
+
+    for stmt in deps:
+        match stmt:
+            case Assignment(path, value, is_public, is_impure) as ass if is_public:
+                ctx.add_candidate(ass, local=False)
+
+    def visit_program(prog: List[Statement]) -> List[Statement]:
+        return [visit_statement(stmt) for stmt in prog]
+
+    def visit_statement(stmt: Statement) -> Statement:
+        match stmt:
+            case ExternCrate() | Extern() | Alias():
+                return stmt
+            case Assignment(path, value, is_public, is_impure):
+                new_ass = Assignment(path, visit_expr(value, [], 0), is_public, is_impure)
+                ctx.add_candidate(new_ass, local=True)
+                return new_ass
+            case _:
+                raise InlineHLIRError(f"unexpected AST node encountered: {stmt}")
+
+    def visit_expr(expr: Expr, scope: List[str], depth: int) -> Expr:
+        match expr:
+            case Paren(inner):
+                return Paren(visit_expr(inner, scope, depth))
+            case Call(fn, arg):
+                inlined = inline_call(expr, scope, depth)
+                if inlined is not None:
+                    return inlined
+                return Call(visit_expr(fn, scope, depth), visit_expr(arg, scope, depth))
+            case Lambda(name, body):
+                return Lambda(name, visit_expr(body, [name] + scope, depth))
+            case Ident() | Absolute() | Number():
+                return expr
+            case _:
+                raise InlineHLIRError(f"unexpected AST node encountered: {expr}")
+
+    def inline_call(call: Call, scope: List[str], depth: int) -> Optional[Expr]:
+        fn, args = unroll_call(call)
+        if not isinstance(fn, Absolute) or fn.path not in ctx.bodies or depth >= MAX_INLINE_DEPTH:
+            return None
+
+        body: Expr = rename(ctx.bodies[fn.path], {})
+        params: List[str] = []
+        while isinstance(body, Lambda) and len(params) < len(args):
+            params.append(body.name)
+            body = strip_paren(body.body)
+
+        bound = dict(zip(params, args))
+        if not all(is_value(arg, count_uses(param, body), scope) for param, arg in bound.items()):
+            return None
+
+        inlined = substitute(body, bound)
+        for arg in args[len(params):]:
+            inlined = Call(inlined, arg)
+
+        return visit_expr(inlined, scope, depth + 1)
+
+    def is_value(expr: Expr, uses: int, scope: List[str]) -> bool:
+        # whether evaluating expr has no effects and always terminates, so it
+        # can be evaluated where the inlined body uses it instead
+        match expr:
+            case Paren(inner):
+                return is_value(inner, uses, scope)
+            case Ident(name):
+                # externs are loaded when used, they might not be set yet
+                return name in scope
+            case Absolute() | Number():
+                return True
+            case Lambda():
+                # duplicating a lambda would build its closure more than once
+                return uses <= 1
+
+        return False
+
+    def rename(expr: Expr, names: Dict[str, str]) -> Expr:
+        match expr:
+            case Paren(inner):
+                return Paren(rename(inner, names))
+            case Call(fn, arg):
+                return Call(rename(fn, names), rename(arg, names))
+            case Lambda(name, body):
+                fresh = ctx.fresh(name)
+                return Lambda(fresh, rename(body, names | {name: fresh}))
+            case Ident(name):
+                return Ident(names.get(name, name))
+
+        return expr
+
+    def substitute(expr: Expr, bound: Dict[str, Expr]) -> Expr:
+        match expr:
+            case Paren(inner):
+                return Paren(substitute(inner, bound))
+            case Call(fn, arg):
+                return Call(substitute(fn, bound), substitute(arg, bound))
+            case Lambda(name, body):
+                return Lambda(name, substitute(body, bound))
+            case Ident(name) if name in bound:
+                return bound[name]
+
+        return expr
+
+    return visit_program(prog)
@@ -1,3 +1,4 @@
+from dataclasses import field
 from ...ast.lang_linked import *
 from ...parse.path import parse_path
 
@@ -7,35 +8,78 @@ def build_call_chain(rest: List[Expr]) -> Expr:
         chain = Call(chain, expr)
     return chain
 
-def demacro_string(string: String) -> Expr:
+@dataclass
+class LiteralTable:
     """
-    convert string literals into calls to std::list_n and std::dec2/3
+    hoists each distinct literal of a crate into one synthesized private
+    definition in the crate root, e.g. crate::__lit_42, so that repeated
+    literals are expanded, resolved, compiled, and optimized only once
     """
 
-    list_n_path = lambda length: parse_path("std::list_n")
+    names: Dict[Tuple[str, int | str], str] = field(default_factory = dict)
+    pending: List[Statement] = field(default_factory = list)
 
-    s = string.content.encode()
+    def hoist(self, key: Tuple[str, int | str], name: str, build: Callable[[], Expr]) -> Expr:
+        if key not in self.names:
+            value = build()
+            self.names[key] = name
+            self.pending.append(Assignment(name, value, is_public = False, is_impure = False))
 
-    char_exprs = [demacro_number(Number(byte)) for byte in s]
-    len_expr = demacro_number(Number(len(char_exprs)))
+        return Relative(parse_path(f"crate::{self.names[key]}"))
 
-    list_n = Relative(list_n_path(len(char_exprs)))
-    return Paren(build_call_chain(cast(List[Expr], [list_n, len_expr] + char_exprs)))
+    def count(self, kind: str) -> int:
+        return sum(1 for key in self.names if key[0] == kind)
 
-def demacro_char(char: Char) -> Expr:
+    def take_pending(self) -> List[Statement]:
+        pending, self.pending = self.pending, []
+        return pending
+
+def demacro_string(string: String, native_numbers: bool = False, literals: Optional[LiteralTable] = None) -> Expr:
+    """
+    convert string literals into the list of numbers representing the UTF-8
+    bytes of the string, built directly with std::prepend_to starting from
+    std::nil
+
+    the list is nested on the function side, std::prepend_to (... std::nil)
+    c, so the compiled code only keeps the list built so far instead of every
+    pending std::prepend c, and the optimizer folds it into static instances
+    """
+
+    def build() -> Expr:
+        prepend_to = Relative(parse_path("std::prepend_to"))
+
+        chain: Expr = Relative(parse_path("std::nil"))
+        for byte in reversed(string.content.encode()):
+            char_expr = demacro_number(Number(byte), native_numbers, literals)
+            chain = Paren(build_call_chain([prepend_to, chain, char_expr]))
+
+        return chain
+
+    if literals is None or len(string.content) == 0:
+        return build()
+
+    return literals.hoist(("str", string.content), f"__lit_str_{literals.count('str')}", build)
+
+def demacro_char(char: Char, native_numbers: bool = False, literals: Optional[LiteralTable] = None) -> Expr:
     """
     convert char literals into calls to std::dec2/3
     """
 
     c = char.content.encode()
     assert len(c) == 1
-    return demacro_number(Number(c[0]))
+    return demacro_number(Number(c[0]), native_numbers, literals)
 
-def demacro_number(number: Number) -> Expr:
+def demacro_number(number: Number, native_numbers: bool = False, literals: Optional[LiteralTable] = None) -> Expr:
     """
     convert number literals into calls to std::dec2/3
+
+    native number literals are kept and compiled to constant instances of the
+    runtime's machine integer numbers instead
     """
 
+    if native_numbers:
+        return number
+
     digit_path  = lambda digit: parse_path(f"std::{digit}")
     dec_path    = lambda digits: parse_path(f"std::dec{digits}")
 
@@ -47,12 +91,54 @@ def demacro_number(number: Number) -> Expr:
     if len(digits) == 1:
         return digits[0]
 
-    return Paren(build_call_chain(cast(List[Expr], [dec] + digits)))
+    def build() -> Expr:
+        return Paren(build_call_chain(cast(List[Expr], [dec] + digits)))
+
+    if literals is None:
+        return build()
+
+    return literals.hoist(("num", n), f"__lit_{n}", build)
+
+def demacro_binary(binary: Binary, literals: Optional[LiteralTable] = None) -> Expr:
+    """
+    convert binary number literals into std::bin numbers, which are
+    little-endian lists of std::true and std::false bits
+    """
+
+    prepend = Relative(parse_path("std::prepend"))
+    bit_path = lambda bit: parse_path("std::true" if bit == "1" else "std::false")
+
+    if binary.value == 0:
+        return Relative(parse_path("std::bin::zero"))
+
+    def build() -> Expr:
+        chain: Expr = Relative(parse_path("std::bin::zero"))
+        for bit in f"{binary.value:b}":
+            chain = Paren(build_call_chain([prepend, Relative(bit_path(bit)), chain]))
+
+        return chain
+
+    if literals is None:
+        return build()
+
+    return literals.hoist(("bin", binary.value), f"__lit_b{binary.value}", build)
 
 class DemacroError(Exception):
     pass
 
-def demacro(prog: List[Statement]) -> List[Statement]:
+def demacro(prog: List[Statement], native_numbers: bool = False) -> List[Statement]:
+    literals = LiteralTable()
+
+    def visit_crate(prog: List[Statement]) -> List[Statement]:
+        # literal definitions are placed right before the first statement of
+        # the crate root using them, after the extern crates they refer to
+        new_prog: List[Statement] = []
+        for stmt in prog:
+            stmt = visit_statement(stmt)
+            new_prog += literals.take_pending()
+            new_prog.append(stmt)
+        return new_prog
+
     def visit_program(prog: List[Statement]) -> List[Statement]:
         return [visit_statement(stmt) for stmt in prog]
 
@@ -81,12 +167,14 @@ def demacro(prog: List[Statement]) -> List[Statement]:
     def visit_macro(macro: Macro) -> Expr:
         match macro:
             case String() as string:
-                return demacro_string(string)
+                return demacro_string(string, native_numbers, literals)
             case Char() as char:
-                return demacro_char(char)
+                return demacro_char(char, native_numbers, literals)
             case Number() as number:
-                return demacro_number(number)
+                return demacro_number(number, native_numbers, literals)
+            case Binary() as binary:
+                return demacro_binary(binary, literals)
             case _:
                 raise DemacroError(f"unexpected AST node encountered: {macro}")
 
-    return visit_program(prog)
+    return visit_crate(prog)
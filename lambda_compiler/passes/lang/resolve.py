@@ -25,6 +25,7 @@ class AliasEntry(NamespaceEntry):
 @dataclass
 class ExternEntry(NamespaceEntry):
     name: str
+    is_impure: bool
 
 @dataclass
 class DefinitionEntry(NamespaceEntry):
@@ -130,11 +131,11 @@ class ModuleNamespace:
             mod = ModuleNamespace(self.root, self, self.path / name, self.file)
             self.insert_entry(name, ModEntry(self.path / name, True, mod))
 
-        entry = self.entries[name]
-        if not isinstance(entry, ModEntry):
+        mod_entry = self.entries[name]
+        if not isinstance(mod_entry, ModEntry):
             raise ResolveCrateError(f"'{self.path}::{name}' is not a module, cannot define '{self.path}::{path}' in it")
 
-        entry.mod.insert_absolute(rest_path, entry)
+        mod_entry.mod.insert_absolute(rest_path, entry)
 
     def resolve(self, path: Path, allow_private: bool = False) -> NamespaceEntry:
         if len(path.components) == 0:
@@ -207,8 +208,8 @@ def resolve(crate: lang.LinkedExternCrate) -> List[hlir.Statement]:
         return visit_source_file(ext_mod.file, mod.insert_mod(ext_mod))
 
     def visit_extern(ext: lang.Extern | hlir.Extern, mod: ModuleNamespace) -> List[hlir.Statement]:
-        mod.insert_entry(ext.name, ExternEntry(mod.path / ext.name, False, ext.name))
-        return [hlir.Extern(ext.name)]
+        mod.insert_entry(ext.name, ExternEntry(mod.path / ext.name, False, ext.name, ext.is_impure))
+        return [hlir.Extern(ext.name, ext.is_impure)]
 
     def visit_import(imp: lang.Import, mod: ModuleNamespace) -> List[hlir.Statement]:
         target = root.resolve(imp.path, mod)
@@ -269,6 +270,8 @@ def resolve(crate: lang.LinkedExternCrate) -> List[hlir.Statement]:
                 return visit_relative_path(rel, mod, ctx)
             case lang.Lambda() as lamb:
                 return visit_lambda(lamb, mod, ctx)
+            case lang.Number(value):
+                return hlir.Number(value)
             case _:
                 raise ResolveCrateError(f"unexpected AST node encountered: {expr}")
 
@@ -278,8 +281,8 @@ def resolve(crate: lang.LinkedExternCrate) -> List[hlir.Statement]:
 
         entry = mod.resolve(Path(()) / ident.name, allow_private = True)
         match entry:
-            case ExternEntry(path, is_public, name):
-                if not ctx.is_impure:
+            case ExternEntry(path, is_public, name, is_impure):
+                if is_impure and not ctx.is_impure:
                     raise ResolveCrateError(f"cannot use 'extern impure {name}' in pure context")
                 return hlir.Ident(name)
             case DefinitionEntry(path, is_public, is_impure):
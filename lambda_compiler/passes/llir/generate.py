@@ -2,8 +2,10 @@ from __future__ import annotations
 from typing import *
 from dataclasses import dataclass, field
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import zlib
 
-from .runtime import lambda_runtime_llir
+from .runtime import lambda_runtime_llir, lambda_cont_heap_llir, lambda_cont_stack_llir
 from .target import Architecture
 from ...ast.mlir import *
 
@@ -56,6 +58,7 @@ class ValueUses:
     def_uses: DefaultDict[Path, int] = field(default_factory = lambda: defaultdict(int))
     inst_uses: DefaultDict[InstancePath, int] = field(default_factory = lambda: defaultdict(int))
     impl_uses: DefaultDict[ImplementationPath, int] = field(default_factory = lambda: defaultdict(int))
+    self_uses: int = 0
 
     @staticmethod
     def count_uses(impl: Implementation) -> ValueUses:
@@ -72,7 +75,9 @@ class ValueUses:
             case TailCallImplementation() as impl:
                 self.count_lit(impl.fn)
                 self.count_lit(impl.arg)
-            case ContinueCallImplementation() as impl:
+            case ContinueCallImplementation() | BranchImplementation() as impl:
+                # the branches of a branch impl take over self, arg and cont
+                # without touching them
                 self.count_lit(impl.fn)
                 self.count_lit(impl.arg)
                 self.count_lit(impl.next)
@@ -83,6 +88,8 @@ class ValueUses:
         match lit:
             case CaptureLiteral(id):
                 self.capture_uses[id] += 1
+            case SelfLiteral():
+                self.self_uses += 1
             case ExternLiteral(name):
                 self.extern_uses[name] += 1
             case DefinitionLiteral(path):
@@ -94,7 +101,7 @@ class ValueUses:
             case _:
                 raise GenerateLLIRError(f"unexpected AST node encountered: {lit}")
 
-    def count_impl_construction(self, impl: ImplementationPath, captures: List[int | InstancePath]):
+    def count_impl_construction(self, impl: ImplementationPath, captures: List[int | InstancePath | SelfLiteral]):
         self.impl_uses[impl] += 1
         for cap in captures:
             match cap:
@@ -102,10 +109,82 @@ class ValueUses:
                     self.inst_uses[cap] += 1
                 case int():
                     self.capture_uses[cap] += 1
+                case SelfLiteral():
+                    self.self_uses += 1
+
+@dataclass
+class SelfOwnership:
+    len_captures: int
+    capture_uses: Dict[int, int]
+    reuse: Optional[ImplementationLiteral] = None
+    # the literal slot of the implementation that is built in self's memory
+    reuse_slot: Optional[str] = None
+
+    @staticmethod
+    def analyze(impl: Implementation, uses: ValueUses) -> Optional[SelfOwnership]:
+        # NOTE: self owns one reference to each of its captures
+        #   if self is uniquely owned, these references are moved out of self
+        #   instead of taking new references and dropping self's afterwards
+        #   impl a!1!0 = $1 $2;
+        # takes 1 reference less to both $1 and $2 if self is unique
+        # self cannot give up its captures while it is used itself
+        capture_uses = {id - 1: refcount for id, refcount in uses.capture_uses.items() if id > 0}
+        if len(capture_uses) == 0 or uses.self_uses > 0:
+            return None
+
+        ownership = SelfOwnership(max(capture_uses) + 1, capture_uses)
+        ownership.find_reuse(impl)
+        return ownership
+
+    def find_reuse(self, impl: Implementation):
+        # NOTE: a uniquely owned self is dead after its captures are moved out
+        #   its memory can be reused for a new closure of the same size
+        #   impl a!1!0 = $1 $2 -> a!1!1[$1 $2];
+        # overwrites self with a!1!1[$1 $2] instead of freeing and allocating
+        # the pool has a size class per word, so a smaller closure would later
+        # be freed into a different class than self was allocated from
+        # the slot is recorded instead of the literal itself, equal literals
+        # may appear in several slots but only one of them can take self
+        slots: List[Tuple[str, ValueLiteral]]
+        match impl:
+            case ReturnImplementation() as impl:
+                slots = [("value", impl.value)]
+            case TailCallImplementation() as impl:
+                slots = [("fn", impl.fn), ("arg", impl.arg)]
+            case ContinueCallImplementation() | BranchImplementation() as impl:
+                slots = [("fn", impl.fn), ("arg", impl.arg), ("next", impl.next)]
+            case _:
+                raise GenerateLLIRError(f"unexpected AST node encountered: {impl}")
+
+        for slot, lit in slots:
+            if isinstance(lit, ImplementationLiteral) and len(lit.captures) == self.len_captures:
+                self.reuse = lit
+                self.reuse_slot = slot
+                return
+
+    def kept_captures(self) -> List[int]:
+        # NOTE: captures the new closure takes at the same index as self
+        #   are already in place when self's memory is reused
+        #   impl a!1!0 = $1 $2 -> a!1!1[$1 $3];
+        # only stores $3 into a unique self, $1 is only stored if self is shared
+        if self.reuse is None:
+            return []
+        return [dest_index for dest_index, cap in enumerate(self.reuse.captures) if cap == dest_index + 1]
+
+    def unique_refcount(self, capture_index: int) -> int:
+        return self.capture_uses.get(capture_index, 0) - 1
+
+    def shared_refcount(self, capture_index: int) -> int:
+        return self.capture_uses.get(capture_index, 0)
 
 @dataclass
 class GenerateLLIRContext:
     arch: Architecture
+    cont_stack: bool = True
+    lazy_init: bool = False
+    # the crate is split into this many modules, which refer to each other's
+    # private globals
+    partitions: int = 1
 
     llir: str = ""
     instance_type_cache: Set[int] = field(default_factory = set)
@@ -114,6 +193,13 @@ class GenerateLLIRContext:
     inst_cache: Set[InstancePath] = field(default_factory = set)
     impl_cache: Set[ImplementationPath] = field(default_factory = set)
     init_cache: List[Definition] = field(default_factory = list)
+    static_cache: Set[Path] = field(default_factory = set)
+    global_init_cache: Set[Path] = field(default_factory = set)
+    capture_cache: Dict[int, ValueLiteral] = field(default_factory = dict)
+    # the literal slot built in the reused memory of self, and that memory
+    reuse_cache: Optional[Tuple[str, ValueLiteral]] = None
+    # captures of the reused closure that are already stored in its memory
+    reuse_kept: List[int] = field(default_factory = list)
 
     def mangle_crate_init(self, crate: str) -> str:
         return f"_L{len(crate)}I{crate}"
@@ -127,6 +213,9 @@ class GenerateLLIRContext:
     def mangle_def(self, defi: Definition) -> str:
         return f"{self.mangle_path(defi.path)}"
 
+    def mangle_global_init(self, path: Path) -> str:
+        return f"{self.mangle_path(path)}I"
+
     def mangle_inst(self, inst: InstancePath, alt: bool) -> str:
         alt_str = "X" if alt else ""
         return f"{self.mangle_path(inst.path)}G{inst.id}{alt_str}"
@@ -146,6 +235,12 @@ class GenerateLLIRContext:
     def declare_global(self, path: Path):
         self.global_cache.add(path)
 
+    def declare_static_global(self, path: Path):
+        self.static_cache.add(path)
+
+    def declare_global_init(self, path: Path):
+        self.global_init_cache.add(path)
+
     def declare_inst(self, inst: InstancePath):
         self.inst_cache.add(inst)
 
@@ -153,13 +248,47 @@ class GenerateLLIRContext:
         self.impl_cache.add(impl)
 
     def write_runtime(self):
+        ptr_bits = self.arch.ptr_size * 8
         self.llir += lambda_runtime_llir.format(
             triple = self.arch.triple,
             data_layout = self.arch.data_layout,
-            ptr_bits = self.arch.ptr_size * 8,
+            ptr_bits = ptr_bits,
+            ptr_align = self.arch.ptr_align,
+            refcount_bits = self.arch.refcount_bits,
+            refcount_align = self.arch.refcount_bits // 8,
+            refcount_trunc = "trunc" if self.arch.refcount_bits < ptr_bits else "bitcast",
+            len_bits = self.arch.len_bits,
+            len_align = self.arch.len_bits // 8,
+            len_trunc = "trunc" if self.arch.len_bits < ptr_bits else "bitcast",
+            len_zext = "zext" if self.arch.len_bits < ptr_bits else "bitcast"
+        )
+
+        cont_llir = lambda_cont_stack_llir if self.cont_stack else lambda_cont_heap_llir
+        self.llir += "\n"
+        self.llir += cont_llir.format(
+            ptr_bits = ptr_bits,
             ptr_align = self.arch.ptr_align
         )
 
+        self.llir += "\n"
+        self.write_abi_declarations()
+
+    def abi_symbols(self) -> List[str]:
+        # the runtime defines one of these for the configuration it was
+        # compiled for, so mismatched runtimes fail to link
+        header = "compact" if self.arch.compact_header else "word"
+        cont = "stack" if self.cont_stack else "heap"
+        return [f"lambda_abi_{header}_header", f"lambda_abi_cont_{cont}"]
+
+    def write_abi_declarations(self):
+        for symbol in self.abi_symbols():
+            self.llir += f"@{symbol} = external dso_local constant i8\n"
+
+    def write_abi_check(self, index_factory: IndexFactory):
+        # volatile, so the references survive optimization and linking
+        for symbol in self.abi_symbols():
+            self.llir += f"    {self.mangle_lit(index_factory.next())} = load volatile i8, i8* @{symbol}, align 1\n"
+
     def write_extern(self, name: str):
         if name not in self.extern_cache:
             self.llir += f"@{name} = external dso_local global %lambda*, align {self.arch.ptr_align}\n"
@@ -170,6 +299,11 @@ class GenerateLLIRContext:
             self.llir += f"@{self.mangle_path(path)} = external dso_local global %lambda*, align {self.arch.ptr_align}\n"
             self.global_cache.add(path)
 
+    def write_global_init(self, path: Path):
+        if path not in self.global_init_cache:
+            self.llir += f"declare external dso_local void @{self.mangle_global_init(path)}() unnamed_addr\n"
+            self.global_init_cache.add(path)
+
     def write_inst(self, inst: InstancePath):
         if inst not in self.inst_cache:
             self.llir += f"@{self.mangle_inst(inst, alt=False)} = external dso_local global %lambda, align {self.arch.ptr_align}\n"
@@ -205,6 +339,8 @@ class GenerateLLIRContext:
                     return IndexFactory.ARG
                 else:
                     return self.write_load_capture(index_factory, id - 1)
+            case SelfLiteral():
+                return IndexFactory.SELF
             case ExternLiteral(name):
                 return self.write_load_extern(index_factory, name)
             case DefinitionLiteral(path):
@@ -216,6 +352,10 @@ class GenerateLLIRContext:
 
 
     def write_lambda_ref(self, lit: ValueLiteral, refcount: int):
+        # static instances are immortal, their refcount is never touched
+        if isinstance(lit, InstanceLiteral):
+            return
+
         self.llir += "    call void @lambda_ref(%lambda* {value}, i{ptr_bits} {refcount})\n".format(
             value = self.mangle_lit(lit),
             refcount = refcount,
@@ -223,6 +363,9 @@ class GenerateLLIRContext:
         )
 
     def write_lambda_unref(self, lit: ValueLiteral):
+        if isinstance(lit, InstanceLiteral):
+            return
+
         self.llir += "    call void @lambda_unref(%lambda* {value})\n".format(
             value = self.mangle_lit(lit)
         )
@@ -283,6 +426,9 @@ class GenerateLLIRContext:
         return index
 
     def write_load_capture(self, index_factory: IndexFactory, capture_index: int) -> ValueLiteral:
+        if capture_index in self.capture_cache:
+            return self.capture_cache[capture_index]
+
         ptr_index = self.write_capture_ptr(index_factory, IndexFactory.SELF, capture_index)
         index = index_factory.next()
         self.llir += "    {index} = load %lambda*, %lambda** {ptr_index}, align {ptr_align}\n".format(
@@ -290,8 +436,148 @@ class GenerateLLIRContext:
             ptr_index = self.mangle_lit(ptr_index),
             ptr_align = self.arch.ptr_align
         )
+        self.capture_cache[capture_index] = index
         return index
 
+    def write_load_header(self, index_factory: IndexFactory, lamb: ValueLiteral, header_index: int) -> ValueLiteral:
+        ptr_index = index_factory.next()
+        self.llir += "    {ptr_index} = getelementptr inbounds %lambda, %lambda* {lamb}, i{ptr_bits} 0, i32 0, i32 {header_index}\n".format(
+            ptr_index = self.mangle_lit(ptr_index),
+            lamb = self.mangle_lit(lamb),
+            header_index = header_index,
+            ptr_bits = self.arch.ptr_size * 8
+        )
+        index = index_factory.next()
+        self.llir += "    {index} = load i{bits}, i{bits}* {ptr_index}, align {align}\n".format(
+            index = self.mangle_lit(index),
+            ptr_index = self.mangle_lit(ptr_index),
+            bits = self.arch.header_bits(header_index),
+            align = self.arch.header_bits(header_index) // 8
+        )
+        return index
+
+    def write_lambda_free(self, index_factory: IndexFactory, lamb: ValueLiteral, len_captures: int):
+        index = index_factory.next()
+        self.llir += "    {index} = bitcast %lambda* {lamb} to i8*\n".format(
+            index = self.mangle_lit(index),
+            lamb = self.mangle_lit(lamb)
+        )
+        self.llir += "    call void @lambda_pool_free(i8* {index}, i{ptr_bits} ptrtoint (%lambda** getelementptr (%lambda, %lambda* null, i{ptr_bits} 0, i32 1, i{ptr_bits} {len_captures}) to i{ptr_bits}))\n".format(
+            index = self.mangle_lit(index),
+            len_captures = len_captures,
+            ptr_bits = self.arch.ptr_size * 8
+        )
+
+    def write_self_ownership(self, index_factory: IndexFactory, ownership: SelfOwnership) -> Optional[ValueLiteral]:
+        refcount = self.write_load_header(index_factory, IndexFactory.SELF, 0)
+        len_captures = self.write_load_header(index_factory, IndexFactory.SELF, 1)
+        is_unique = index_factory.next()
+        self.llir += "    {is_unique} = icmp eq i{refcount_bits} {refcount}, 1\n".format(
+            is_unique = self.mangle_lit(is_unique),
+            refcount = self.mangle_lit(refcount),
+            refcount_bits = self.arch.refcount_bits
+        )
+        is_exact = index_factory.next()
+        self.llir += "    {is_exact} = icmp eq i{len_bits} {len_captures}, {expected}\n".format(
+            is_exact = self.mangle_lit(is_exact),
+            len_captures = self.mangle_lit(len_captures),
+            expected = ownership.len_captures,
+            len_bits = self.arch.len_bits
+        )
+        can_move = index_factory.next()
+        self.llir += "    {can_move} = and i1 {is_unique}, {is_exact}\n".format(
+            can_move = self.mangle_lit(can_move),
+            is_unique = self.mangle_lit(is_unique),
+            is_exact = self.mangle_lit(is_exact)
+        )
+        self.llir += f"    br i1 {self.mangle_lit(can_move)}, label %self_unique, label %self_shared\n"
+
+        # self is unique: move captures out of self and free or reuse it
+        self.llir += "self_unique:\n"
+        for capture_index in range(ownership.len_captures):
+            refcount_delta = ownership.unique_refcount(capture_index)
+            if refcount_delta < 0:
+                self.write_lambda_unref(self.write_load_capture(index_factory, capture_index))
+            elif refcount_delta > 0:
+                self.write_lambda_ref(self.capture_cache[capture_index], refcount_delta)
+        if ownership.reuse is None:
+            self.write_lambda_free(index_factory, IndexFactory.SELF, ownership.len_captures)
+        self.llir += "    br label %self_done\n"
+
+        # self is shared: borrow captures from self and unref it
+        self.llir += "self_shared:\n"
+        for capture_index in range(ownership.len_captures):
+            refcount_delta = ownership.shared_refcount(capture_index)
+            if refcount_delta > 0:
+                self.write_lambda_ref(self.capture_cache[capture_index], refcount_delta)
+        self.write_lambda_unref(IndexFactory.SELF)
+        shared_lamb: Optional[ValueLiteral] = None
+        if ownership.reuse is not None:
+            shared_lamb = self.write_lambda_alloc(index_factory, len(ownership.reuse.captures))
+            for capture_index in ownership.kept_captures():
+                self.write_store_capture(index_factory, self.capture_cache[capture_index], shared_lamb, capture_index)
+        self.llir += "    br label %self_done\n"
+
+        self.llir += "self_done:\n"
+        if shared_lamb is None:
+            return None
+
+        index = index_factory.next()
+        self.llir += "    {index} = phi %lambda* [ {self_lamb}, %self_unique ], [ {shared_lamb}, %self_shared ]\n".format(
+            index = self.mangle_lit(index),
+            self_lamb = self.mangle_lit(IndexFactory.SELF),
+            shared_lamb = self.mangle_lit(shared_lamb)
+        )
+        return index
+
+    def write_load_impl(self, index_factory: IndexFactory, lamb: ValueLiteral) -> ValueLiteral:
+        ptr_index = index_factory.next()
+        self.llir += "    {ptr_index} = getelementptr inbounds %lambda, %lambda* {lamb}, i{ptr_bits} 0, i32 0, i32 3\n".format(
+            ptr_index = self.mangle_lit(ptr_index),
+            lamb = self.mangle_lit(lamb),
+            ptr_bits = self.arch.ptr_size * 8
+        )
+        index = index_factory.next()
+        self.llir += "    {index} = load %lambda_fn*, %lambda_fn** {ptr_index}, align {ptr_align}\n".format(
+            index = self.mangle_lit(index),
+            ptr_index = self.mangle_lit(ptr_index),
+            ptr_align = self.arch.ptr_align
+        )
+        return index
+
+    def write_branch(self, index_factory: IndexFactory, impl: BranchImplementation):
+        # compares the impl of fn to those of the booleans and calls the taken
+        # branch with arg, self, and cont as they are, falling through to the
+        # generic call otherwise
+        fn = self.write_load_literal(impl.fn, index_factory)
+        fn_impl = self.write_load_impl(index_factory, fn)
+
+        branches = [(impl.true, impl.on_true, "branch_true"), (impl.false, impl.on_false, "branch_false")]
+        for boolean, on_branch, label in branches:
+            assert isinstance(boolean, InstanceLiteral) and isinstance(on_branch, ImplementationLiteral)
+            assert on_branch.captures == list(range(1, len(on_branch.captures) + 1)), "branch does not take over the captures"
+
+            boolean_impl = self.write_load_impl(index_factory, boolean)
+            is_boolean = index_factory.next()
+            self.llir += "    {is_boolean} = icmp eq %lambda_fn* {fn_impl}, {boolean_impl}\n".format(
+                is_boolean = self.mangle_lit(is_boolean),
+                fn_impl = self.mangle_lit(fn_impl),
+                boolean_impl = self.mangle_lit(boolean_impl)
+            )
+            self.llir += f"    br i1 {self.mangle_lit(is_boolean)}, label %{label}, label %{label}_not\n"
+
+            self.llir += f"{label}:\n"
+            index = index_factory.next()
+            self.llir += "    {index} = tail call %lambda* @{impl_path}(%lambda* {arg}, %lambda* {self_lamb}, %lambda_cont* {cont})\n".format(
+                index = self.mangle_lit(index),
+                impl_path = self.mangle_impl(on_branch.impl),
+                arg = self.mangle_lit(IndexFactory.ARG),
+                self_lamb = self.mangle_lit(IndexFactory.SELF),
+                cont = self.mangle_lit(IndexFactory.CONT)
+            )
+            self.llir += f"    ret %lambda* {self.mangle_lit(index)}\n"
+            self.llir += f"{label}_not:\n"
+
     def write_store_capture(self, index_factory: IndexFactory, value: ValueLiteral, lamb: ValueLiteral, capture_index: int):
         ptr_index = self.write_capture_ptr(index_factory, lamb, capture_index)
         self.llir += "    store %lambda* {value}, %lambda** {ptr_index}, align {ptr_align}\n".format(
@@ -323,6 +609,12 @@ class GenerateLLIRContext:
         return index
 
     def write_load_global(self, index_factory: IndexFactory, path: Path) -> ValueLiteral:
+        if self.lazy_init and path not in self.static_cache:
+            return self.write_load_lazy_global(index_factory, path)
+
+        return self.write_load_global_raw(index_factory, path)
+
+    def write_load_global_raw(self, index_factory: IndexFactory, path: Path) -> ValueLiteral:
         index = index_factory.next()
         self.llir += "    {index} = load %lambda*, %lambda** @{path}, align {ptr_align}\n".format(
             index = self.mangle_lit(index),
@@ -331,6 +623,42 @@ class GenerateLLIRContext:
         )
         return index
 
+    def write_load_lazy_global(self, index_factory: IndexFactory, path: Path) -> ValueLiteral:
+        # the global is null until its first load initializes it
+        raw = self.write_load_global_raw(index_factory, path)
+        is_null = index_factory.next()
+        self.llir += "    {is_null} = icmp eq %lambda* {raw}, null\n".format(
+            is_null = self.mangle_lit(is_null),
+            raw = self.mangle_lit(raw)
+        )
+
+        label = f"lazy_{is_null.id}"
+        self.llir += f"    br i1 {self.mangle_lit(is_null)}, label %{label}_init, label %{label}_done\n"
+        self.llir += f"{label}_init:\n"
+        self.llir += f"    call void @{self.mangle_global_init(path)}()\n"
+        self.llir += f"    br label %{label}_done\n"
+        self.llir += f"{label}_done:\n"
+
+        return self.write_load_global_raw(index_factory, path)
+
+    def write_global_init_fn(self, defi: Definition):
+        self.llir += "define {linkage} void @{global_init}() unnamed_addr {{\n".format(
+            linkage = self.def_linkage(defi),
+            global_init = self.mangle_global_init(defi.path)
+        )
+
+        if defi.needs_init:
+            index_factory = IndexFactory()
+            index_factory.next()
+
+            lit = InstanceLiteral(defi.inst)
+            self.write_lambda_ref(lit, 1)
+            index = self.write_lambda_null_call(index_factory, lit)
+            self.write_store_global(index_factory, defi.path, index)
+
+        self.llir += "    ret void\n"
+        self.llir += "}\n"
+
     def write_store_global(self, index_factory: IndexFactory, path: Path, value: ValueLiteral):
         self.llir += "    store %lambda* {value}, %lambda** @{path}, align {ptr_align}\n".format(
             value = self.mangle_lit(value),
@@ -338,15 +666,33 @@ class GenerateLLIRContext:
             ptr_align = self.arch.ptr_align
         )
 
+    def def_linkage(self, defi: Definition) -> str:
+        if defi.is_public:
+            return "external dso_local"
+        elif self.partitions > 1:
+            # only the other partitions of the crate refer to it
+            return "external dso_local hidden"
+        else:
+            return "internal dso_local"
+
     def write_crate_init_fini(self, crate: str):
+        # the globals may be defined by other partitions of the crate
+        for defi in self.init_cache:
+            self.write_global(defi.path)
+            self.write_inst(defi.inst)
+            if self.lazy_init:
+                self.write_global_init(defi.path)
+
         self.llir += "define external dso_local void @{crate_init}() unnamed_addr {{\n".format(
             crate_init = self.mangle_crate_init(crate)
         )
 
         index_factory = IndexFactory()
         index_factory.next()
+        self.write_abi_check(index_factory)
 
-        for defi in self.init_cache:
+        # lazily initialized globals are initialized by their first load
+        for defi in self.init_cache if not self.lazy_init else []:
             lit = InstanceLiteral(defi.inst)
             self.write_lambda_ref(lit, 1)
             index = self.write_lambda_null_call(index_factory, lit)
@@ -364,28 +710,86 @@ class GenerateLLIRContext:
         index_factory.next()
 
         for defi in reversed(self.init_cache):
-            index = self.write_load_global(index_factory, defi.path)
+            index = self.write_load_global_raw(index_factory, defi.path)
+            if not self.lazy_init:
+                self.write_lambda_unref(index)
+                continue
+
+            is_null = index_factory.next()
+            self.llir += "    {is_null} = icmp eq %lambda* {index}, null\n".format(
+                is_null = self.mangle_lit(is_null),
+                index = self.mangle_lit(index)
+            )
+
+            label = f"lazy_{is_null.id}"
+            self.llir += f"    br i1 {self.mangle_lit(is_null)}, label %{label}_done, label %{label}_fini\n"
+            self.llir += f"{label}_fini:\n"
             self.write_lambda_unref(index)
+            self.llir += f"    br label %{label}_done\n"
+            self.llir += f"{label}_done:\n"
 
         self.llir += "    ret void\n"
         self.llir += "}\n"
         self.llir += "\n"
 
 
-def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
+def statement_partition(stmt: Statement, partitions: int) -> int:
+    # by the definition a statement belongs to, so the impls and instances of
+    # a definition stay in one module and editing a definition does not move
+    # the others to other modules
+    path: Path
+    match stmt:
+        case Definition() as defi:
+            path = defi.path
+        case Instance() | NumberInstance() as inst:
+            path = inst.path.path
+        case Implementation() as impl:
+            path = impl.path.path
+        case _:
+            return 0
+
+    return zlib.crc32(str(path).encode()) % partitions
+
+def partition_statements(prog: List[Statement], partitions: int, partition: int) -> List[Statement]:
+    """
+    the statements the module of a partition is generated from, the others
+    are only referred to by name, except for the definitions the first
+    partition initializes
+    """
+
+    return [
+        stmt for stmt in prog
+        if statement_partition(stmt, partitions) == partition
+        or partition == 0 and isinstance(stmt, Definition) and stmt.needs_init
+    ]
+
+def generate_llir(prog: List[Statement], crate: str, arch: Architecture, cont_stack: bool = True, lazy_init: bool = False, partitions: int = 1, partition: int = 0) -> str:
+    """
+    generate the LLVM IR module of a crate, or one of the partition modules
+    the crate is split into, which declare what they use of the others and
+    of which the first one initializes the crate
+    """
+
     def visit_program(prog: List[Statement]) -> str:
-        ctx = GenerateLLIRContext(arch)
+        ctx = GenerateLLIRContext(arch, cont_stack, lazy_init, partitions)
 
         ctx.write_runtime()
         ctx.llir += "\n"
 
+        ctx.init_cache = [stmt for stmt in prog if isinstance(stmt, Definition) and stmt.needs_init]
+        prog = [stmt for stmt in prog if statement_partition(stmt, partitions) == partition]
+
         for stmt in prog:
             match stmt:
                 case ExternCrate() | Extern():
                     pass
                 case Definition() as defi:
                     ctx.declare_global(defi.path)
-                case Instance() as inst:
+                    if not defi.needs_init:
+                        ctx.declare_static_global(defi.path)
+                    if lazy_init and (defi.needs_init or defi.is_public):
+                        ctx.declare_global_init(defi.path)
+                case Instance() | NumberInstance() as inst:
                     ctx.declare_inst(inst.path)
                 case Implementation() as impl:
                     ctx.declare_impl(impl.path)
@@ -400,6 +804,8 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
                     visit_definition(defi, ctx)
                 case Instance() as inst:
                     visit_instance(inst, ctx)
+                case NumberInstance() as inst:
+                    visit_number_instance(inst, ctx)
                 case Implementation() as impl:
                     visit_implementation(impl, ctx)
                 case _:
@@ -407,7 +813,8 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
 
             ctx.llir += "\n"
 
-        ctx.write_crate_init_fini(crate)
+        if partition == 0:
+            ctx.write_crate_init_fini(crate)
 
         return ctx.llir
 
@@ -416,19 +823,25 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
 
         ctx.llir += f"@{ctx.mangle_def(defi)} = "
 
-        if not defi.is_public:
-            ctx.llir += "internal "
-
-        ctx.llir += "dso_local global %lambda* "
+        if defi.is_public:
+            ctx.llir += "dso_local global %lambda* "
+        elif partitions > 1:
+            ctx.llir += "dso_local hidden global %lambda* "
+        else:
+            ctx.llir += "internal dso_local global %lambda* "
 
         if defi.needs_init:
             ctx.llir += "null"
-            ctx.init_cache.append(defi)
         else:
             ctx.llir += f"@{ctx.mangle_inst(defi.inst, alt=False)}"
 
         ctx.llir += f", align {ctx.arch.ptr_align}\n"
 
+        # other crates cannot tell whether a global needs initialization, so
+        # every public global gets an initialization function
+        if ctx.lazy_init and (defi.needs_init or defi.is_public):
+            ctx.write_global_init_fn(defi)
+
     def visit_instance(inst: Instance, ctx: GenerateLLIRContext):
         inst_type = ctx.write_instance_type(len(inst.captures))
 
@@ -437,8 +850,10 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
 
         ctx.write_impl(inst.impl)
 
-        ctx.llir += "@{inst_path_alt} = private dso_local unnamed_addr global {inst_type} {{ %lambda_header {{ i{ptr_bits} 1, i{ptr_bits} {captures}, i{ptr_bits} 0, %lambda_fn* @{impl_path} }}, [ {captures} x %lambda* ] [".format(
-            ptr_bits = ctx.arch.ptr_size * 8,
+        ctx.llir += "@{inst_path_alt} = private dso_local unnamed_addr global {inst_type} {{ %lambda_header {{ i{refcount_bits} {immortal}, i{len_bits} {captures}, i{len_bits} 0, %lambda_fn* @{impl_path} }}, [ {captures} x %lambda* ] [".format(
+            refcount_bits = ctx.arch.refcount_bits,
+            len_bits = ctx.arch.len_bits,
+            immortal = -(1 << (ctx.arch.refcount_bits - 1)),
             inst_type = inst_type,
             inst_path_alt = ctx.mangle_inst(inst.path, alt = True),
             impl_path = ctx.mangle_impl(inst.impl),
@@ -456,6 +871,29 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
             inst_path_alt = ctx.mangle_inst(inst.path, alt = True),
         )
 
+    def visit_number_instance(inst: NumberInstance, ctx: GenerateLLIRContext):
+        # native numbers carry their value as a size_t of userdata and are
+        # called through the runtime's lambda_num_impl
+        if inst.value >= 1 << (ctx.arch.ptr_size * 8):
+            raise GenerateLLIRError(f"number literal {inst.value} does not fit into a {ctx.arch.ptr_size * 8}-bit native number")
+
+        ctx.llir += "@{inst_path_alt} = private dso_local unnamed_addr global {{ %lambda_header, [ 0 x %lambda* ], i{ptr_bits} }} {{ %lambda_header {{ i{refcount_bits} {immortal}, i{len_bits} 0, i{len_bits} {ptr_size}, %lambda_fn* @lambda_num_impl }}, [ 0 x %lambda* ] [], i{ptr_bits} {value} }}, align {ptr_align}\n".format(
+            refcount_bits = ctx.arch.refcount_bits,
+            len_bits = ctx.arch.len_bits,
+            ptr_bits = ctx.arch.ptr_size * 8,
+            ptr_size = ctx.arch.ptr_size,
+            ptr_align = ctx.arch.ptr_align,
+            immortal = -(1 << (ctx.arch.refcount_bits - 1)),
+            inst_path_alt = ctx.mangle_inst(inst.path, alt = True),
+            value = inst.value
+        )
+
+        ctx.llir += "@{inst_path} = external dso_local alias %lambda, %lambda* bitcast({{ %lambda_header, [ 0 x %lambda* ], i{ptr_bits} }}* @{inst_path_alt} to %lambda*)\n".format(
+            ptr_bits = ctx.arch.ptr_size * 8,
+            inst_path = ctx.mangle_inst(inst.path, alt = False),
+            inst_path_alt = ctx.mangle_inst(inst.path, alt = True),
+        )
+
     def visit_implementation(impl: Implementation, ctx: GenerateLLIRContext):
         uses = ValueUses.count_uses(impl)
 
@@ -464,6 +902,8 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
 
         for path in uses.def_uses.keys():
             ctx.write_global(path)
+            if ctx.lazy_init and path not in ctx.static_cache:
+                ctx.write_global_init(path)
 
         for inst_path in uses.inst_uses.keys():
             ctx.write_inst(inst_path)
@@ -471,13 +911,26 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
         for impl_path in uses.impl_uses.keys():
             ctx.write_impl(impl_path)
 
+        if isinstance(impl, BranchImplementation):
+            for lit in [impl.true, impl.false]:
+                assert isinstance(lit, InstanceLiteral)
+                ctx.write_inst(lit.inst)
+            for lit in [impl.on_true, impl.on_false]:
+                assert isinstance(lit, ImplementationLiteral)
+                ctx.write_impl(lit.impl)
+
         ctx.llir += "define external dso_local %lambda* @{impl_path}(%lambda* %0, %lambda* %1, %lambda_cont* %2) unnamed_addr {{\n".format(
             impl_path = ctx.mangle_impl(impl.path)
         )
 
         index_factory = IndexFactory()
         index_factory.skip(4)
+        ctx.capture_cache.clear()
+
+        if isinstance(impl, BranchImplementation):
+            ctx.write_branch(index_factory, impl)
 
+        ownership = SelfOwnership.analyze(impl, uses)
         unref_arg = False
 
         for capture_index, refcount in uses.capture_uses.items():
@@ -487,8 +940,23 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
                 elif refcount > 1:
                     ctx.write_lambda_ref(IndexFactory.ARG, refcount - 1)
             else:
-                lit = ctx.write_load_capture(index_factory, capture_index - 1)
-                ctx.write_lambda_ref(lit, refcount)
+                ctx.write_load_capture(index_factory, capture_index - 1)
+
+        # the references self holds to its captures stay with it if self is
+        # used, and the reference to self is passed on to its uses
+        if uses.self_uses > 0:
+            for capture_index, refcount in uses.capture_uses.items():
+                if capture_index > 0 and refcount > 0:
+                    ctx.write_lambda_ref(ctx.capture_cache[capture_index - 1], refcount)
+            if uses.self_uses > 1:
+                ctx.write_lambda_ref(IndexFactory.SELF, uses.self_uses - 1)
+
+        ctx.reuse_cache = None
+        if ownership is not None:
+            reuse_lamb = ctx.write_self_ownership(index_factory, ownership)
+            if ownership.reuse_slot is not None and reuse_lamb is not None:
+                ctx.reuse_cache = (ownership.reuse_slot, reuse_lamb)
+                ctx.reuse_kept = ownership.kept_captures()
 
         for inst, refcount in uses.inst_uses.items():
             ctx.write_lambda_ref(InstanceLiteral(inst), refcount)
@@ -504,32 +972,36 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
         if unref_arg:
             ctx.write_lambda_unref(IndexFactory.ARG)
 
+        def write_self_unref():
+            if ownership is None and uses.self_uses == 0:
+                ctx.write_lambda_unref(IndexFactory.SELF)
+
         ret_lit: ValueLiteral
         match impl:
             case ReturnImplementation() as impl:
-                value_r = visit_literal(impl.value, index_factory, ctx)
+                value_r = visit_literal(impl.value, "value", index_factory, ctx)
                 value = ctx.write_load_realized_literal(value_r, index_factory)
 
-                ctx.write_lambda_unref(IndexFactory.SELF)
+                write_self_unref()
                 ret_lit = ctx.write_lambda_cont_call(index_factory, value)
             case TailCallImplementation() as impl:
-                fn_r = visit_literal(impl.fn, index_factory, ctx)
-                arg_r = visit_literal(impl.arg, index_factory, ctx)
+                fn_r = visit_literal(impl.fn, "fn", index_factory, ctx)
+                arg_r = visit_literal(impl.arg, "arg", index_factory, ctx)
                 fn = ctx.write_load_realized_literal(fn_r, index_factory)
                 arg = ctx.write_load_realized_literal(arg_r, index_factory)
 
-                ctx.write_lambda_unref(IndexFactory.SELF)
+                write_self_unref()
                 ret_lit = ctx.write_lambda_call(index_factory, fn, arg, IndexFactory.CONT)
-            case ContinueCallImplementation() as impl:
-                fn_r = visit_literal(impl.fn, index_factory, ctx)
-                arg_r = visit_literal(impl.arg, index_factory, ctx)
-                next_r = visit_literal(impl.next, index_factory, ctx)
+            case ContinueCallImplementation() | BranchImplementation() as impl:
+                fn_r = visit_literal(impl.fn, "fn", index_factory, ctx)
+                arg_r = visit_literal(impl.arg, "arg", index_factory, ctx)
+                next_r = visit_literal(impl.next, "next", index_factory, ctx)
                 fn = ctx.write_load_realized_literal(fn_r, index_factory)
                 arg = ctx.write_load_realized_literal(arg_r, index_factory)
                 next = ctx.write_load_realized_literal(next_r, index_factory)
 
                 cont = ctx.write_lambda_cont_alloc(index_factory, next)
-                ctx.write_lambda_unref(IndexFactory.SELF)
+                write_self_unref()
                 ret_lit = ctx.write_lambda_call(index_factory, fn, arg, cont)
             case _:
                 raise GenerateLLIRError("unexpected AST node encountered: {impl}")
@@ -537,18 +1009,27 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
         ctx.llir += f"    ret %lambda* {ctx.mangle_lit(ret_lit)}\n"
         ctx.llir += "}\n"
 
-    def visit_literal(lit: ValueLiteral, index_factory: IndexFactory, ctx: GenerateLLIRContext) -> RealizedLiteral:
+    def visit_literal(lit: ValueLiteral, slot: str, index_factory: IndexFactory, ctx: GenerateLLIRContext) -> RealizedLiteral:
         match lit:
             case ImplementationLiteral(impl, captures):
-                lamb = ctx.write_lambda_alloc(index_factory, len(captures))
+                kept: Set[int] = set()
+                if ctx.reuse_cache is not None and ctx.reuse_cache[0] == slot:
+                    lamb = ctx.reuse_cache[1]
+                    kept = set(ctx.reuse_kept)
+                else:
+                    lamb = ctx.write_lambda_alloc(index_factory, len(captures))
                 ctx.write_store_impl(index_factory, impl, lamb)
 
                 for dest_index, cap in enumerate(captures):
+                    if dest_index in kept:
+                        continue
                     match cap:
                         case InstancePath():
                             value = ctx.write_load_literal(InstanceLiteral(cap), index_factory)
                         case int():
                             value = ctx.write_load_literal(CaptureLiteral(cap), index_factory)
+                        case SelfLiteral():
+                            value = IndexFactory.SELF
 
                     ctx.write_store_capture(index_factory, value, lamb, dest_index)
 
@@ -558,8 +1039,8 @@ def generate_llir(prog: List[Statement], crate: str, arch: Architecture) -> str:
 
     return visit_program(prog)
 
-def generate_main_llir(crates: List[str], arch: Architecture) -> str:
-    ctx = GenerateLLIRContext(arch)
+def generate_main_llir(crates: List[str], arch: Architecture, cont_stack: bool = True, lazy_init: bool = False) -> str:
+    ctx = GenerateLLIRContext(arch, cont_stack, lazy_init)
 
     ctx.write_runtime()
     ctx.llir += "\n"
@@ -605,8 +1086,11 @@ def generate_main_llir(crates: List[str], arch: Architecture) -> str:
     main_crate = crates[-1]
     main_path = Path(()) / main_crate / "main"
     ctx.write_global(main_path)
+    if lazy_init:
+        ctx.write_global_init(main_path)
 
     ctx.llir += "define dso_local i32 @main() unnamed_addr {\n"
+    ctx.write_abi_check(index_factory)
     index = ctx.write_load_global(index_factory, main_path)
     ctx.write_lambda_ref(index, 1)
     ret_index = ctx.write_lambda_null_call(index_factory, index)
@@ -615,3 +1099,16 @@ def generate_main_llir(crates: List[str], arch: Architecture) -> str:
     ctx.llir += "}\n"
 
     return ctx.llir
+
+def generate_llir_partitions(prog: List[Statement], crate: str, arch: Architecture, cont_stack: bool = True, lazy_init: bool = False, partitions: int = 1, selected: Optional[List[int]] = None) -> List[str]:
+    """
+    generate the partition modules of a crate in one process each, or only
+    the selected ones in their order
+    """
+
+    if selected is None:
+        selected = list(range(partitions))
+
+    args = [(prog, crate, arch, cont_stack, lazy_init, partitions, partition) for partition in selected]
+    with ProcessPoolExecutor(len(selected)) as executor:
+        return list(executor.map(generate_llir, *zip(*args)))
@@ -4,57 +4,55 @@ target triple = "{triple}"
 
 %lambda_fn = type %lambda* (%lambda*, %lambda*, %lambda_cont*)
 %lambda_cont = type {{ %lambda_cont*, %lambda* }}
-%lambda_header = type {{ i{ptr_bits}, i{ptr_bits}, i{ptr_bits}, %lambda_fn* }}
+%lambda_header = type {{ i{refcount_bits}, i{len_bits}, i{len_bits}, %lambda_fn* }}
 %lambda = type {{ %lambda_header, [0 x %lambda*] }}
 
 declare external void @lambda_abort() nounwind noreturn
-declare external noalias nonnull i8* @lambda_mem_alloc(i{ptr_bits}) nounwind
-declare external void @lambda_mem_free(i8* nocapture) nounwind
+declare external noalias nonnull i8* @lambda_pool_alloc(i{ptr_bits}) nounwind
+declare external void @lambda_pool_free(i8* nocapture, i{ptr_bits}) nounwind
 declare external void @lambda_unref(%lambda* nonnull nocapture) nounwind
 declare external nonnull %lambda* @lambda_ret_call(%lambda* nonnull, %lambda* nonnull) nounwind
 declare external nonnull %lambda* @lambda_null_call(%lambda* nonnull) nounwind
+declare external %lambda* @lambda_num_impl(%lambda*, %lambda*, %lambda_cont*)
 
 define available_externally noalias nonnull %lambda* @lambda_alloc(i{ptr_bits} %0, i{ptr_bits} %1) unnamed_addr nofree nounwind {{
     %3 = getelementptr %lambda, %lambda* null, i{ptr_bits} 0, i32 1, i{ptr_bits} %0
     %4 = ptrtoint %lambda** %3 to i{ptr_bits}
     %5 = add i{ptr_bits} %4, %1
-    %6 = call i8* @lambda_mem_alloc(i{ptr_bits} %5)
+    %6 = call i8* @lambda_pool_alloc(i{ptr_bits} %5)
     %7 = bitcast i8* %6 to %lambda*
     %8 = getelementptr inbounds %lambda, %lambda* %7, i{ptr_bits} 0, i32 0, i32 0
-    store i{ptr_bits} 1, i{ptr_bits}* %8, align {ptr_align}
+    store i{refcount_bits} 1, i{refcount_bits}* %8, align {refcount_align}
     %9 = getelementptr inbounds %lambda, %lambda* %7, i{ptr_bits} 0, i32 0, i32 1
-    store i{ptr_bits} %0, i{ptr_bits}* %9, align {ptr_align}
-    %10 = getelementptr inbounds %lambda, %lambda* %7, i{ptr_bits} 0, i32 0, i32 2
-    store i{ptr_bits} %1, i{ptr_bits}* %10, align {ptr_align}
+    %10 = {len_trunc} i{ptr_bits} %0 to i{len_bits}
+    store i{len_bits} %10, i{len_bits}* %9, align {len_align}
+    %11 = getelementptr inbounds %lambda, %lambda* %7, i{ptr_bits} 0, i32 0, i32 2
+    %12 = {len_trunc} i{ptr_bits} %1 to i{len_bits}
+    store i{len_bits} %12, i{len_bits}* %11, align {len_align}
     ret %lambda* %7
 }}
 
-define available_externally noalias nonnull %lambda_cont* @lambda_cont_alloc(%lambda_cont* nonnull readonly %0, %lambda* nonnull readonly %1) unnamed_addr nofree nounwind {{
-    %3 = getelementptr %lambda_cont, %lambda_cont* null, i{ptr_bits} 1
-    %4 = ptrtoint %lambda_cont* %3 to i{ptr_bits}
-    %5 = call i8* @lambda_mem_alloc(i{ptr_bits} %4)
-    %6 = bitcast i8* %5 to %lambda_cont*
-    %7 = getelementptr inbounds %lambda_cont, %lambda_cont* %6, i{ptr_bits} 0, i32 0
-    store %lambda_cont* %0, %lambda_cont** %7, align {ptr_align}
-    %8 =  getelementptr inbounds %lambda_cont, %lambda_cont* %6, i{ptr_bits} 0, i32 1
-    store %lambda* %1, %lambda** %8, align {ptr_align}
-    ret %lambda_cont* %6
-}}
-
 define available_externally void @lambda_ref(%lambda* nonnull nocapture %0, i{ptr_bits} %1) unnamed_addr argmemonly nofree nounwind {{
     %3 = getelementptr inbounds %lambda, %lambda* %0, i{ptr_bits} 0, i32 0, i32 0
-    %4 = load i{ptr_bits}, i{ptr_bits}* %3, align {ptr_align}
-    %5 = add i{ptr_bits} %4, %1
-    store i{ptr_bits} %5, i{ptr_bits}* %3, align {ptr_align}
+    %4 = load i{refcount_bits}, i{refcount_bits}* %3, align {refcount_align}
+    %5 = icmp slt i{refcount_bits} %4, 0
+    br i1 %5, label %immortal, label %mortal
+mortal:
+    %6 = {refcount_trunc} i{ptr_bits} %1 to i{refcount_bits}
+    %7 = add i{refcount_bits} %4, %6
+    store i{refcount_bits} %7, i{refcount_bits}* %3, align {refcount_align}
+    br label %immortal
+immortal:
     ret void
 }}
 
 define available_externally nonnull i8* @lambda_userdata(%lambda* nonnull %0) unnamed_addr argmemonly nofree nounwind {{
     %2 = getelementptr inbounds %lambda, %lambda* %0, i{ptr_bits} 0, i32 0, i32 1
-    %3 = load i{ptr_bits}, i{ptr_bits}* %2, align {ptr_align}
-    %4 = getelementptr inbounds %lambda, %lambda* %0, i{ptr_bits} 0, i32 1, i{ptr_bits} %3
-    %5 = bitcast %lambda** %4 to i8*
-    ret i8* %5
+    %3 = load i{len_bits}, i{len_bits}* %2, align {len_align}
+    %4 = {len_zext} i{len_bits} %3 to i{ptr_bits}
+    %5 = getelementptr inbounds %lambda, %lambda* %0, i{ptr_bits} 0, i32 1, i{ptr_bits} %4
+    %6 = bitcast %lambda** %5 to i8*
+    ret i8* %6
 }}
 
 define available_externally nonnull %lambda* @lambda_call(%lambda* nonnull %0, %lambda* nonnull %1, %lambda_cont* nonnull %2) unnamed_addr nounwind {{
@@ -63,6 +61,21 @@ define available_externally nonnull %lambda* @lambda_call(%lambda* nonnull %0, %
     %6 = tail call %lambda* %5(%lambda* %1, %lambda* %0, %lambda_cont* %2)
     ret %lambda* %6
 }}
+""".lstrip()
+
+# continuations allocated from the pooled allocator
+lambda_cont_heap_llir = """
+define available_externally noalias nonnull %lambda_cont* @lambda_cont_alloc(%lambda_cont* nonnull readonly %0, %lambda* nonnull readonly %1) unnamed_addr nofree nounwind {{
+    %3 = getelementptr %lambda_cont, %lambda_cont* null, i{ptr_bits} 1
+    %4 = ptrtoint %lambda_cont* %3 to i{ptr_bits}
+    %5 = call i8* @lambda_pool_alloc(i{ptr_bits} %4)
+    %6 = bitcast i8* %5 to %lambda_cont*
+    %7 = getelementptr inbounds %lambda_cont, %lambda_cont* %6, i{ptr_bits} 0, i32 0
+    store %lambda_cont* %0, %lambda_cont** %7, align {ptr_align}
+    %8 =  getelementptr inbounds %lambda_cont, %lambda_cont* %6, i{ptr_bits} 0, i32 1
+    store %lambda* %1, %lambda** %8, align {ptr_align}
+    ret %lambda_cont* %6
+}}
 
 define available_externally nonnull %lambda* @lambda_cont_call(%lambda* nonnull %0, %lambda_cont* nonnull %1) unnamed_addr nounwind {{
     %3 = getelementptr inbounds %lambda_cont, %lambda_cont* %1, i{ptr_bits} 0, i32 0
@@ -70,8 +83,58 @@ define available_externally nonnull %lambda* @lambda_cont_call(%lambda* nonnull
     %5 = getelementptr inbounds %lambda_cont, %lambda_cont* %1, i{ptr_bits} 0, i32 1
     %6 = load %lambda*, %lambda** %5, align {ptr_align}
     %7 = bitcast %lambda_cont* %1 to i8*
-    call void @lambda_mem_free(i8* %7)
-    %8 = tail call %lambda* @lambda_call(%lambda* %6, %lambda* %0, %lambda_cont* %4)
-    ret %lambda* %8
+    %8 = getelementptr %lambda_cont, %lambda_cont* null, i{ptr_bits} 1
+    %9 = ptrtoint %lambda_cont* %8 to i{ptr_bits}
+    call void @lambda_pool_free(i8* %7, i{ptr_bits} %9)
+    %10 = tail call %lambda* @lambda_call(%lambda* %6, %lambda* %0, %lambda_cont* %4)
+    ret %lambda* %10
+}}
+""".lstrip()
+
+# continuations pushed onto and popped off the runtime's continuation stack
+lambda_cont_stack_llir = """
+@lambda_cont_top = external dso_local global %lambda_cont*, align {ptr_align}
+@lambda_cont_end = external dso_local global %lambda_cont*, align {ptr_align}
+@lambda_cont_base = external dso_local global %lambda_cont*, align {ptr_align}
+
+declare external nonnull %lambda_cont* @lambda_cont_push_segment() nounwind
+declare external void @lambda_cont_pop_segment() nounwind
+
+define available_externally noalias nonnull %lambda_cont* @lambda_cont_alloc(%lambda_cont* nonnull readonly %0, %lambda* nonnull readonly %1) unnamed_addr nofree nounwind {{
+    %3 = load %lambda_cont*, %lambda_cont** @lambda_cont_top, align {ptr_align}
+    %4 = load %lambda_cont*, %lambda_cont** @lambda_cont_end, align {ptr_align}
+    %5 = icmp ult %lambda_cont* %3, %4
+    br i1 %5, label %push, label %grow
+push:
+    %6 = getelementptr inbounds %lambda_cont, %lambda_cont* %3, i{ptr_bits} 1
+    store %lambda_cont* %6, %lambda_cont** @lambda_cont_top, align {ptr_align}
+    br label %init
+grow:
+    %7 = call %lambda_cont* @lambda_cont_push_segment()
+    br label %init
+init:
+    %8 = phi %lambda_cont* [ %3, %push ], [ %7, %grow ]
+    %9 = getelementptr inbounds %lambda_cont, %lambda_cont* %8, i{ptr_bits} 0, i32 0
+    store %lambda_cont* %0, %lambda_cont** %9, align {ptr_align}
+    %10 = getelementptr inbounds %lambda_cont, %lambda_cont* %8, i{ptr_bits} 0, i32 1
+    store %lambda* %1, %lambda** %10, align {ptr_align}
+    ret %lambda_cont* %8
+}}
+
+define available_externally nonnull %lambda* @lambda_cont_call(%lambda* nonnull %0, %lambda_cont* nonnull %1) unnamed_addr nounwind {{
+    %3 = getelementptr inbounds %lambda_cont, %lambda_cont* %1, i{ptr_bits} 0, i32 0
+    %4 = load %lambda_cont*, %lambda_cont** %3, align {ptr_align}
+    %5 = getelementptr inbounds %lambda_cont, %lambda_cont* %1, i{ptr_bits} 0, i32 1
+    %6 = load %lambda*, %lambda** %5, align {ptr_align}
+    store %lambda_cont* %1, %lambda_cont** @lambda_cont_top, align {ptr_align}
+    %7 = load %lambda_cont*, %lambda_cont** @lambda_cont_base, align {ptr_align}
+    %8 = icmp eq %lambda_cont* %1, %7
+    br i1 %8, label %shrink, label %call
+shrink:
+    call void @lambda_cont_pop_segment()
+    br label %call
+call:
+    %9 = tail call %lambda* @lambda_call(%lambda* %6, %lambda* %0, %lambda_cont* %4)
+    ret %lambda* %9
 }}
 """.lstrip()
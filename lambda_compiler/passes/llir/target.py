@@ -1,6 +1,6 @@
 from __future__ import annotations
 from typing import *
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 
 @dataclass
 class Architecture:
@@ -8,6 +8,20 @@ class Architecture:
     data_layout: str
     ptr_size: int
     ptr_align: int
+    compact_header: bool = False
+
+    # the compact header packs refcount, len_captures, and len_userdata into
+    # 64 bits instead of three words, matching LAMBDA_COMPACT_HEADER in lambda.h
+    @property
+    def refcount_bits(self) -> int:
+        return 32 if self.compact_header else self.ptr_size * 8
+
+    @property
+    def len_bits(self) -> int:
+        return 16 if self.compact_header else self.ptr_size * 8
+
+    def header_bits(self, header_index: int) -> int:
+        return self.refcount_bits if header_index == 0 else self.len_bits
 
 TARGETS = {
     "x86_64": Architecture("x86_64-pc-linux-gnu", "e-m:e-p270:32:32-p271:32:32-p272:64:64-i64:64-f80:128-n8:16:32:64-S128", 8, 8),
@@ -20,3 +34,8 @@ TARGETS = {
     "armv5": Architecture("armv5-unknown-linux-gnueabi", "e-m:e-p:32:32-Fi8-i64:64-v128:64:128-a:0:32-n32-S64", 4, 4),
     "armv4": Architecture("armv4-unknown-linux-gnueabi", "e-m:e-p:32:32-Fi8-i64:64-v128:64:128-a:0:32-n32-S64", 4, 4),
 }
+
+TARGETS |= {
+    f"{name}-compact": replace(arch, compact_header = True)
+    for name, arch in TARGETS.items()
+}
@@ -5,18 +5,20 @@ import os.path
 class CollectMLIRError(Exception):
     pass
 
-def load_crate(crate: str, crate_path: List[str]) -> List[Statement]:
+def find_crate(crate: str, crate_path: List[str]) -> str:
     for dir in crate_path:
         crate_src = os.path.join(dir, f"{crate}.opt.mlir")
         if os.path.isfile(crate_src):
-            break
+            return crate_src
 
         crate_src = os.path.join(dir, f"{crate}.mlir")
         if os.path.isfile(crate_src):
-            break
-    else:
-        raise CollectMLIRError(f"did not find crate '{crate}'")
+            return crate_src
+
+    raise CollectMLIRError(f"did not find crate '{crate}'")
 
+def load_crate(crate: str, crate_path: List[str]) -> List[Statement]:
+    crate_src = find_crate(crate, crate_path)
     with open(crate_src) as f:
         code = f.read()
         return parse_mlir(code, crate_src)
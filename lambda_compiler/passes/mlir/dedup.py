@@ -14,15 +14,15 @@ class DedupMLIRContext:
     extern_crates: List[ExternCrate] = field(default_factory = list)
     externs: List[Extern] = field(default_factory = list)
     implementations: List[Implementation] = field(default_factory = list)
-    instances: List[LinkedInstance] = field(default_factory = list)
+    instances: List[LinkedInstance | LinkedNumberInstance] = field(default_factory = list)
     definitions: List[LinkedDefinition] = field(default_factory = list)
 
     inst_hash: Dict[InstancePath, tuple] = field(default_factory = dict)
     impl_hash: Dict[ImplementationPath, tuple] = field(default_factory = dict)
-    inst_dedup: Dict[tuple, LinkedInstance] = field(default_factory = dict)
+    inst_dedup: Dict[tuple, LinkedInstance | LinkedNumberInstance] = field(default_factory = dict)
     impl_dedup: Dict[tuple, Implementation] = field(default_factory = dict)
 
-    def dedup_inst(self, inst: LinkedInstance) -> Tuple[LinkedInstance, tuple]:
+    def dedup_inst(self, inst: LinkedInstance | LinkedNumberInstance) -> Tuple[LinkedInstance | LinkedNumberInstance, tuple]:
         if inst.path not in self.inst_hash:
             raise DedupNotYetSeenError()
 
@@ -47,13 +47,22 @@ class DedupMLIRContext:
         except DedupNotYetSeenError:
             return None
 
-    def hash_inst(self, inst: LinkedInstance) -> Optional[tuple]:
+    def hash_inst(self, inst: LinkedInstance | LinkedNumberInstance) -> Optional[tuple]:
+        if isinstance(inst, LinkedNumberInstance):
+            return ("num", inst.value)
+
         try:
             inst.impl, impl_hash_value = self.dedup_impl(inst.impl)
 
             captures = []
             inst_hash_values = []
             for capture in inst.captures:
+                # letrec instances of std::y capture themselves
+                if capture is inst:
+                    captures.append(inst)
+                    inst_hash_values.append(("self",))
+                    continue
+
                 capture, hash_value = self.dedup_inst(capture)
 
                 captures.append(capture)
@@ -73,6 +82,11 @@ class DedupMLIRContext:
                     return ("tail", self.hash_literal(impl.fn), self.hash_literal(impl.arg))
                 case ContinueCallImplementation() as impl:
                     return ("cont", self.hash_literal(impl.fn), self.hash_literal(impl.arg), self.hash_literal(impl.next))
+                case BranchImplementation() as impl:
+                    return ("branch", self.hash_literal(impl.fn), self.hash_literal(impl.arg), self.hash_literal(impl.next),
+                        self.hash_literal(impl.true), self.hash_literal(impl.on_true),
+                        self.hash_literal(impl.false), self.hash_literal(impl.on_false)
+                    )
                 case _:
                     raise DedupMLIRError(f"unexpected AST node encountered: {impl}")
         except DedupNotYetSeenError:
@@ -82,6 +96,8 @@ class DedupMLIRContext:
         match lit:
             case CaptureLiteral(id):
                 return ("cap", id)
+            case SelfLiteral():
+                return ("self",)
             case ExternLiteral(name):
                 return ("extern", name)
             case LinkedDefinitionLiteral(defi):
@@ -95,12 +111,14 @@ class DedupMLIRContext:
             case _:
                 raise DedupMLIRError(f"unexpected AST node encountered: {lit}")
 
-    def hash_capture(self, cap: int | LinkedInstance) -> int | InstancePath:
+    def hash_capture(self, cap: int | LinkedInstance | LinkedNumberInstance | SelfLiteral) -> int | InstancePath | str:
         match cap:
-            case LinkedInstance():
+            case LinkedInstance() | LinkedNumberInstance():
                 return cap.path
             case int():
                 return cap
+            case SelfLiteral():
+                return "self"
 
     def hash_crate(self, crate: ExternCrate) -> tuple:
         return ("crate", crate.name)
@@ -114,7 +132,7 @@ class DedupMLIRContext:
             self.impl_dedup[hash_value] = impl
             self.implementations.append(impl)
 
-    def insert_inst(self, inst: LinkedInstance, hash_value: tuple):
+    def insert_inst(self, inst: LinkedInstance | LinkedNumberInstance, hash_value: tuple):
         self.inst_hash[inst.path] = hash_value
         if hash_value not in self.inst_dedup:
             self.inst_dedup[hash_value] = inst
@@ -143,7 +161,7 @@ class DedupMLIRContext:
                         hash_value = self.hash_extern(extern)
                     case Implementation() as impl:
                         hash_value = self.hash_impl(impl)
-                    case LinkedInstance() as inst:
+                    case LinkedInstance() | LinkedNumberInstance() as inst:
                         hash_value = self.hash_inst(inst)
                     case LinkedDefinition() as defi:
                         hash_value = self.hash_def(defi)
@@ -162,14 +180,14 @@ class DedupMLIRContext:
                         self.insert_extern(extern)
                     case Implementation() as impl:
                         self.insert_impl(impl, hash_value)
-                    case LinkedInstance() as inst:
+                    case LinkedInstance() | LinkedNumberInstance() as inst:
                         self.insert_inst(inst, hash_value)
                     case LinkedDefinition() as defi:
                         self.insert_def(defi)
                     case _:
                         raise DedupMLIRError(f"unexpected AST node encountered: {stmt}")
 
-    def dedup_new_inst(self, inst: LinkedInstance) -> LinkedInstance:
+    def dedup_new_inst(self, inst: LinkedInstance | LinkedNumberInstance) -> LinkedInstance | LinkedNumberInstance:
         hash_value = self.hash_inst(inst)
         if hash_value is None:
             raise DedupMLIRError(f"cannot deduplicate new instance, captures unknown: {inst}")
@@ -196,15 +214,18 @@ class DedupMLIRContext:
         return ctx
 
     def collect(self) -> List[Statement]:
+        # replaced impls stay in the list, but hashing them again after what
+        # they refer to was replaced as well would bring them back
+        implementations = [impl for impl in self.implementations if self.dedup_impl(impl)[0] is impl]
         return (
             cast(List[Statement], self.extern_crates) +
             cast(List[Statement], self.externs) +
             cast(List[Statement], self.definitions) +
-            cast(List[Statement], self.implementations) +
+            cast(List[Statement], implementations) +
             cast(List[Statement], self.instances)
         )
 
-    def tree_shake(self, opt_deps: Optional[List[Statement]] = None) -> List[Statement]:
+    def tree_shake(self, opt_deps: Optional[List[Statement]] = None, roots: Optional[List[Path]] = None) -> List[Statement]:
         inst_counter: DefaultDict[Path, int] = defaultdict(int)
         prog: List[Statement] = []
         deps = opt_deps or []
@@ -220,29 +241,37 @@ class DedupMLIRContext:
 
             prog.append(defi)
 
-        def visit_inst(inst: LinkedInstance):
+        def visit_inst(inst: LinkedInstance | LinkedNumberInstance):
             if inst in deps:
                 return
             if inst in prog:
                 return
 
-            inst.impl, _ = self.dedup_impl(inst.impl)
-            visit_impl(inst.impl)
+            if isinstance(inst, LinkedNumberInstance):
+                prog.append(inst)
+                return
+
+            inst.impl = visit_impl(inst.impl)
 
             for i, capture in enumerate(inst.captures):
+                if capture is inst:
+                    continue
+
                 capture, _ = self.dedup_inst(capture)
                 inst.captures[i] = capture
                 visit_inst(capture)
 
             prog.append(inst)
 
-        def visit_impl(impl: Implementation):
+        def visit_impl(impl: Implementation) -> Implementation:
+            # impls replaced more than once during optimization only resolve
+            # one replacement per lookup, users take the impl kept here
             impl, _ = self.dedup_impl(impl)
 
             if impl in deps:
-                return
+                return impl
             if impl in prog:
-                return
+                return impl
 
             match impl:
                 case ReturnImplementation() as impl:
@@ -254,10 +283,19 @@ class DedupMLIRContext:
                     visit_lit(impl.fn)
                     visit_lit(impl.arg)
                     visit_lit(impl.next)
+                case BranchImplementation() as impl:
+                    visit_lit(impl.fn)
+                    visit_lit(impl.arg)
+                    visit_lit(impl.next)
+                    visit_lit(impl.true)
+                    visit_lit(impl.on_true)
+                    visit_lit(impl.false)
+                    visit_lit(impl.on_false)
                 case _:
                     raise DedupMLIRError(f"unexpected AST node encountered: {impl}")
 
             prog.append(impl)
+            return impl
 
         def visit_lit(lit: ValueLiteral):
             match lit:
@@ -268,11 +306,9 @@ class DedupMLIRContext:
                     lit.inst = inst
                     visit_inst(inst)
                 case LinkedImplementationLiteral(impl, captures):
-                    impl, _ = self.dedup_impl(impl)
-                    lit.impl = impl
-                    visit_impl(impl)
+                    lit.impl = visit_impl(impl)
                     for i, cap in enumerate(captures):
-                        if isinstance(cap, LinkedInstance):
+                        if isinstance(cap, (LinkedInstance, LinkedNumberInstance)):
                             cap, _ = self.dedup_inst(cap)
                             captures[i] = cap
                             visit_inst(cap)
@@ -291,10 +327,13 @@ class DedupMLIRContext:
             prog.append(crate)
 
         for defi in self.definitions:
-            visit_def(defi)
+            # with roots, only the roots and what they use are kept, along
+            # with definitions initialized at startup, whose effects stay
+            if roots is None or defi.path in roots or defi.needs_init:
+                visit_def(defi)
 
         for stmt in prog:
-            if not isinstance(stmt, LinkedInstance):
+            if not isinstance(stmt, (LinkedInstance, LinkedNumberInstance)):
                 continue
 
             stmt.path = InstancePath(stmt.path.path, inst_counter[stmt.path.path])
@@ -5,7 +5,7 @@ class LinkMLIRError(Exception):
 
 def link_mlir(prog: List[Statement], deps: Optional[List[Statement]] = None) -> List[Statement]:
     def_table: Dict[Path, LinkedDefinition] = {}
-    inst_table: Dict[InstancePath, LinkedInstance] = {}
+    inst_table: Dict[InstancePath, LinkedInstance | LinkedNumberInstance] = {}
     impl_table: Dict[ImplementationPath, Implementation] = {}
 
     if deps is None:
@@ -21,7 +21,7 @@ def link_mlir(prog: List[Statement], deps: Optional[List[Statement]] = None) ->
                 pass
             case LinkedDefinition() as defi:
                 def_table[defi.path] = defi
-            case LinkedInstance() as inst:
+            case LinkedInstance() | LinkedNumberInstance() as inst:
                 inst_table[inst.path] = inst
             case Implementation() as impl:
                 impl_table[impl.path] = impl
@@ -39,6 +39,8 @@ def link_mlir(prog: List[Statement], deps: Optional[List[Statement]] = None) ->
                 return visit_definition(defi)
             case Instance() as inst:
                 return visit_instance(inst)
+            case NumberInstance() as inst:
+                return visit_number_instance(inst)
             case Implementation() as impl:
                 return visit_implementation(impl)
             case _:
@@ -56,12 +58,21 @@ def link_mlir(prog: List[Statement], deps: Optional[List[Statement]] = None) ->
     def visit_instance(inst: Instance) -> LinkedInstance:
         assert inst.path not in inst_table, "duplicate instance"
         impl = impl_table[inst.impl]
-        captures = [inst_table[cap] for cap in inst.captures]
 
+        # inserted before its captures are resolved, letrec instances of
+        # std::y capture themselves
         new_inst = LinkedInstance(
-            inst.path, impl, captures
+            inst.path, impl, []
         )
         inst_table[inst.path] = new_inst
+        new_inst.captures = [inst_table[cap] for cap in inst.captures]
+        return new_inst
+
+    def visit_number_instance(inst: NumberInstance) -> LinkedNumberInstance:
+        assert inst.path not in inst_table, "duplicate instance"
+
+        new_inst = LinkedNumberInstance(inst.path, inst.value)
+        inst_table[inst.path] = new_inst
         return new_inst
 
     def visit_implementation(impl: Implementation) -> Implementation:
@@ -88,6 +99,17 @@ def link_mlir(prog: List[Statement], deps: Optional[List[Statement]] = None) ->
                     visit_literal(impl.arg),
                     visit_literal(impl.next)
                 )
+            case BranchImplementation():
+                new_impl = BranchImplementation(
+                    *impl_metadata,
+                    visit_literal(impl.fn),
+                    visit_literal(impl.arg),
+                    visit_literal(impl.next),
+                    visit_literal(impl.true),
+                    visit_literal(impl.on_true),
+                    visit_literal(impl.false),
+                    visit_literal(impl.on_false)
+                )
             case _:
                 raise LinkMLIRError(f"unexpected AST node encountered: {impl}")
 
@@ -96,7 +118,7 @@ def link_mlir(prog: List[Statement], deps: Optional[List[Statement]] = None) ->
 
     def visit_literal(lit: ValueLiteral) -> ValueLiteral:
         match lit:
-            case CaptureLiteral() | ExternLiteral():
+            case CaptureLiteral() | SelfLiteral() | ExternLiteral():
                 return lit
             case DefinitionLiteral(path):
                 return LinkedDefinitionLiteral(def_table[path])
@@ -110,11 +132,11 @@ def link_mlir(prog: List[Statement], deps: Optional[List[Statement]] = None) ->
             case _:
                 raise LinkMLIRError(f"unexpected AST node encountered: {lit}")
 
-    def visit_capture(cap: int | InstancePath) -> int | LinkedInstance:
+    def visit_capture(cap: int | InstancePath | SelfLiteral) -> int | LinkedInstance | LinkedNumberInstance | SelfLiteral:
         match cap:
             case InstancePath():
                 return inst_table[cap]
-            case int():
+            case int() | SelfLiteral():
                 return cap
 
     visit_deps_program(deps)
@@ -132,6 +154,8 @@ def unlink_mlir(prog: List[Statement]) -> List[Statement]:
                 return visit_definition(defi)
             case LinkedInstance() as inst:
                 return visit_instance(inst)
+            case LinkedNumberInstance() as inst:
+                return NumberInstance(inst.path, inst.value)
             case Implementation() as impl:
                 return visit_implementation(impl)
             case _:
@@ -169,12 +193,23 @@ def unlink_mlir(prog: List[Statement]) -> List[Statement]:
                     visit_literal(impl.arg),
                     visit_literal(impl.next)
                 )
+            case BranchImplementation():
+                return BranchImplementation(
+                    *impl_metadata,
+                    visit_literal(impl.fn),
+                    visit_literal(impl.arg),
+                    visit_literal(impl.next),
+                    visit_literal(impl.true),
+                    visit_literal(impl.on_true),
+                    visit_literal(impl.false),
+                    visit_literal(impl.on_false)
+                )
             case _:
                 raise LinkMLIRError(f"unexpected AST node encountered: {impl}")
 
     def visit_literal(lit: ValueLiteral) -> ValueLiteral:
         match lit:
-            case CaptureLiteral() | ExternLiteral():
+            case CaptureLiteral() | SelfLiteral() | ExternLiteral():
                 return lit
             case LinkedDefinitionLiteral(defi):
                 return DefinitionLiteral(defi.path)
@@ -188,11 +223,11 @@ def unlink_mlir(prog: List[Statement]) -> List[Statement]:
             case _:
                 raise LinkMLIRError(f"unexpected AST node encountered: {lit}")
 
-    def visit_capture(cap: int | LinkedInstance) -> int | InstancePath:
+    def visit_capture(cap: int | LinkedInstance | LinkedNumberInstance | SelfLiteral) -> int | InstancePath | SelfLiteral:
         match cap:
-            case LinkedInstance():
+            case LinkedInstance() | LinkedNumberInstance():
                 return cap.path
-            case int():
+            case int() | SelfLiteral():
                 return cap
 
     return visit_program(prog)
@@ -1,8 +1,25 @@
 from collections import defaultdict
 from dataclasses import dataclass, field
 from ...ast.mlir_linked import *
+from ...ast.path import FIXPOINT_PATH, TRUE_PATH, FALSE_PATH
 from .dedup import DedupMLIRContext
 
+# the number of impls optimize_impl may copy into a crate to prepend the
+# continuation chain of a called impl to the continuation of the caller
+DEFAULT_PREPEND_BUDGET = 64
+
+# the number of impls specialize_impl may clone into a crate to substitute
+# the static instances captured by closures
+DEFAULT_SPECIALIZE_BUDGET = 256
+
+# stands for the capture of a letrec instance on itself while specializing
+SELF_CAPTURE = -1
+
+# the number of closures built to be called right away that inline_call
+# replaces by their body in one impl, closures calling closures of their
+# own impl would be inlined forever otherwise
+MAX_CALL_INLINE_DEPTH = 8
+
 class OptimizeCannotEvaluateError(Exception):
     pass
 
@@ -12,7 +29,16 @@ class OptimizeMLIRError(Exception):
 @dataclass
 class OptimizeContext:
     dedup: DedupMLIRContext
+    snapshot_steps: int = 0
+    prepend_budget: int = DEFAULT_PREPEND_BUDGET
+    specialize_budget: int = DEFAULT_SPECIALIZE_BUDGET
+    specializations: Dict[Tuple[int, tuple], Implementation] = field(default_factory = dict)
     inst_id_table: Dict[Path, int] = field(default_factory = lambda: defaultdict(int))
+    impl_id_table: Dict[Path, int] = field(default_factory = lambda: defaultdict(int))
+    number_zero_inst: Optional[LinkedInstance] = None
+    fixpoint: Optional[LinkedDefinition] = None
+    true: Optional[LinkedDefinition] = None
+    false: Optional[LinkedDefinition] = None
 
     def next_inst_id(self, path: Path) -> int:
         id = self.inst_id_table[path]
@@ -23,13 +49,51 @@ class OptimizeContext:
         if self.inst_id_table[inst.path] <= inst.id:
             self.inst_id_table[inst.path] = inst.id + 1
 
-    def instantiate(self, path: Path, impl: Implementation, impl_captures: List[int | LinkedInstance], captures: List[LinkedInstance]) -> LinkedInstance:
-        captures = [captures[cap] if isinstance(cap, int) else cap for cap in impl_captures]
+    def next_impl_path(self, path: Path) -> ImplementationPath:
+        id = self.impl_id_table[path]
+        self.impl_id_table[path] += 1
+        return ImplementationPath(path, id, 0)
+
+    def bump_impl_id(self, impl: ImplementationPath):
+        if self.impl_id_table[impl.path] <= impl.lambda_id:
+            self.impl_id_table[impl.path] = impl.lambda_id + 1
+
+    def instantiate(self, path: Path, impl: Implementation, impl_captures: List[int | LinkedInstance | LinkedNumberInstance | SelfLiteral], captures: List[LinkedInstance | LinkedNumberInstance], self_inst: Optional[LinkedInstance] = None) -> LinkedInstance:
+        captures = [cast(LinkedInstance | LinkedNumberInstance, self.substitute_capture(cap, captures, self_inst)) for cap in impl_captures]
 
         inst = LinkedInstance(InstancePath(path, self.next_inst_id(path)), impl, captures)
         dedup_inst = self.dedup.dedup_new_inst(inst)
+        assert isinstance(dedup_inst, LinkedInstance)
+        return dedup_inst
+
+    def substitute_capture(self, cap: int | LinkedInstance | LinkedNumberInstance | SelfLiteral, captures: Sequence[int | LinkedInstance | LinkedNumberInstance | SelfLiteral], self_value: Optional[LinkedInstance | SelfLiteral]) -> int | LinkedInstance | LinkedNumberInstance | SelfLiteral:
+        # a capture of a literal moved out of its impl, self_value is what
+        # the closure running the impl becomes, None if it is not available
+        match cap:
+            case int():
+                return captures[cap]
+            case SelfLiteral():
+                if self_value is None:
+                    raise OptimizeCannotEvaluateError("self not available")
+                return self_value
+
+        return cap
+
+    def instantiate_number(self, path: Path, value: int) -> LinkedNumberInstance:
+        inst = LinkedNumberInstance(InstancePath(path, self.next_inst_id(path)), value)
+        dedup_inst = self.dedup.dedup_new_inst(inst)
+        assert isinstance(dedup_inst, LinkedNumberInstance)
         return dedup_inst
 
+    def instantiate_number_zero(self, path: Path) -> LinkedInstance:
+        # the result of applying zero, which is false, to its first argument
+        #   impl zero = $0;
+        if self.number_zero_inst is None:
+            impl = self.synthesize_impl(ReturnImplementation(self.next_impl_path(path), 0, CaptureLiteral(0)))
+            self.number_zero_inst = self.instantiate(path, impl, [], [])
+
+        return self.number_zero_inst
+
     def evaluate_definition(self, defi: LinkedDefinition):
         if not defi.needs_init:
             return
@@ -39,7 +103,73 @@ class OptimizeContext:
             defi.inst = inst
             defi.needs_init = False
         except OptimizeCannotEvaluateError:
-            pass
+            if self.snapshot_steps > 0:
+                self.snapshot_definition(defi)
+
+    def snapshot_definition(self, defi: LinkedDefinition):
+        # evaluates as much of the initialization as possible, until an extern
+        # or the step limit is reached, and replaces the definition by the rest
+        # of the computation, its state is entirely made up of static instances
+        stack: List[LinkedInstance] = []
+        try:
+            fn, arg = self.evaluate_impl(defi.path, defi.inst.impl, [], stack)
+        except OptimizeCannotEvaluateError:
+            return
+
+        steps = 0
+        while steps < self.snapshot_steps and (fn is not None or len(stack) > 0):
+            if fn is None:
+                fn = stack.pop()
+
+            try:
+                fn, arg = self.evaluate_inst(defi.path, fn, arg, stack)
+            except OptimizeCannotEvaluateError:
+                break
+
+            steps += 1
+
+        if fn is None and len(stack) == 0:
+            defi.inst = arg
+            defi.needs_init = False
+        elif steps > 0:
+            defi.inst = self.snapshot_instance(defi.path, fn, arg, stack)
+
+    def snapshot_instance(self, path: Path, fn: Optional[LinkedInstance], arg: LinkedInstance, stack: List[LinkedInstance]) -> LinkedInstance:
+        if fn is None:
+            fn = stack.pop()
+
+        # the continuation stack is folded into a single continuation
+        #   impl cont = $1 $0 -> $2;
+        next: Optional[LinkedInstance] = None
+        for cont in stack:
+            if next is None:
+                next = cont
+            else:
+                impl = self.synthesize_impl(ContinueCallImplementation(self.next_impl_path(path), 2,
+                    CaptureLiteral(1), CaptureLiteral(0), CaptureLiteral(2)
+                ))
+                next = self.instantiate(path, impl, [cont, next], [])
+
+        # the pending call becomes the new initialization instance
+        #   impl init = $1 $2 -> $3;
+        if next is None:
+            impl = self.synthesize_impl(TailCallImplementation(self.next_impl_path(path), 2,
+                CaptureLiteral(1), CaptureLiteral(2)
+            ))
+            return self.instantiate(path, impl, [fn, arg], [])
+        else:
+            impl = self.synthesize_impl(ContinueCallImplementation(self.next_impl_path(path), 3,
+                CaptureLiteral(1), CaptureLiteral(2), CaptureLiteral(3)
+            ))
+            return self.instantiate(path, impl, [fn, arg, next], [])
+
+    def synthesize_impl(self, impl: Implementation) -> Implementation:
+        hash_value = self.dedup.hash_impl(impl)
+        if hash_value is None:
+            raise OptimizeMLIRError(f"cannot deduplicate synthesized impl: {impl}")
+
+        self.dedup.insert_impl(impl, hash_value)
+        return self.dedup.impl_dedup[hash_value]
 
     def evaluate_impl_stack(self, path: Path, impl: Implementation) -> LinkedInstance:
         stack: List[LinkedInstance] = []
@@ -61,42 +191,164 @@ class OptimizeContext:
 
         return arg
 
-    def evaluate_inst(self, path: Path, inst: LinkedInstance, arg: LinkedInstance, stack: List[LinkedInstance]) -> Tuple[Optional[LinkedInstance], LinkedInstance]:
-        return self.evaluate_impl(path, inst.impl, [arg] + inst.captures, stack)
+    def evaluate_inst(self, path: Path, inst: LinkedInstance | LinkedNumberInstance, arg: LinkedInstance, stack: List[LinkedInstance]) -> Tuple[Optional[LinkedInstance], LinkedInstance]:
+        if isinstance(inst, LinkedNumberInstance):
+            return self.evaluate_number(path, inst, arg)
+
+        if self.fixpoint is not None and not self.fixpoint.needs_init and inst is self.fixpoint.inst:
+            letrec = self.instantiate_fixpoint(path, arg)
+            if letrec is not None:
+                return None, letrec
+
+        return self.evaluate_impl(path, inst.impl, [arg] + inst.captures, stack, inst)
+
+    def instantiate_fixpoint(self, path: Path, g: LinkedInstance) -> Optional[LinkedInstance]:
+        # std::y g where g directly returns a closure becomes that closure with
+        # itself as the argument of g, so recursive calls go straight to it
+        # instead of rebuilding it through f f on every iteration
+        #   impl g = body[$0, $1];
+        #   inst g%0 = g[foo];
+        #   inst rec%0 = std::y%1 g%0;
+        # becomes
+        #   inst rec%0 = body[rec%0, foo];
+        # static instances are immortal, so the cycle never needs to be freed
+        if isinstance(g, LinkedNumberInstance) or not isinstance(g.impl, ReturnImplementation):
+            return None
+
+        lit = g.impl.value
+        if not isinstance(lit, LinkedImplementationLiteral):
+            return None
+
+        letrec = LinkedInstance(InstancePath(path, self.next_inst_id(path)), lit.impl, [])
+        for cap in lit.captures:
+            if cap == 0:
+                letrec.captures.append(letrec)
+            elif isinstance(cap, int):
+                letrec.captures.append(g.captures[cap - 1])
+            elif isinstance(cap, SelfLiteral):
+                letrec.captures.append(g)
+            else:
+                letrec.captures.append(cap)
+
+        dedup_inst = self.dedup.dedup_new_inst(letrec)
+        assert isinstance(dedup_inst, LinkedInstance)
+        return dedup_inst
+
+    def lower_fixpoint(self, impl: Implementation) -> Implementation:
+        # std::y g applied at runtime to a closure of g that directly returns
+        # a closure builds that closure once, with the captures of it on the
+        # argument of g replaced by self, instead of rebuilding it through
+        # f f on every iteration
+        #   impl g!0!0 = body!0!0[$1 $0];
+        #   impl a!0!0 = std::y%1 g!0!0[$1] -> k[$2];
+        # becomes
+        #   impl a!1!0 = <body!0!0 with $1 = $1 and $2 = self>;
+        #   impl a!0!0 = k[$2] a!1!0[$1];
+        if self.fixpoint is None or self.fixpoint.needs_init:
+            return impl
+        if not isinstance(impl, (TailCallImplementation, ContinueCallImplementation)):
+            return impl
+        if not isinstance(impl.fn, LinkedInstanceLiteral) or impl.fn.inst is not self.fixpoint.inst:
+            return impl
+        if not isinstance(impl.arg, LinkedImplementationLiteral):
+            return impl
+
+        path = impl.path.path
+        g_impl, g_captures = self.dedup.dedup_impl(impl.arg.impl)[0], impl.arg.captures
+        if not isinstance(g_impl, ReturnImplementation) or not isinstance(g_impl.value, LinkedImplementationLiteral):
+            return impl
+
+        body, _ = self.dedup.dedup_impl(g_impl.value.impl)
+        body_captures = g_impl.value.captures
+        if isinstance(body, BranchImplementation) or any(isinstance(cap, SelfLiteral) for cap in body_captures):
+            # the branches read the captures of body by position, and the
+            # closure of g itself is never built
+            return impl
 
-    def evaluate_impl(self, path: Path, impl: Implementation, captures: List[LinkedInstance], stack: List[LinkedInstance]) -> Tuple[Optional[LinkedInstance], LinkedInstance]:
+        frame: List[int | LinkedInstance | LinkedNumberInstance | SelfLiteral] = [0]
+        rec_captures: List[int | LinkedInstance | LinkedNumberInstance | SelfLiteral] = []
+        for cap in body_captures:
+            if cap == 0:
+                frame.append(SelfLiteral())
+            else:
+                frame.append(len(rec_captures) + 1)
+                rec_captures.append(g_captures[cap - 1] if isinstance(cap, int) else cap)
+
+        stub = ReturnImplementation(self.next_impl_path(path), len(rec_captures), CaptureLiteral(0))
+        rec_impl = self.synthesize_impl(self.optimize_substitute_impl(stub, body, frame, SelfLiteral()))
+        rec = self.optimize_literal(path, LinkedImplementationLiteral(rec_impl, cast(List[int | LinkedInstance | LinkedNumberInstance | SelfLiteral], list(range(1, len(rec_captures) + 1)))), [0] + rec_captures)
+
+        new_impl: Implementation
+        if isinstance(impl, TailCallImplementation):
+            new_impl = ReturnImplementation(impl.path, impl.captures, rec)
+        else:
+            new_impl = TailCallImplementation(impl.path, impl.captures, impl.next, rec)
+        self.dedup.replace_new_impl(new_impl, impl)
+        return new_impl
+
+    def evaluate_number(self, path: Path, inst: LinkedNumberInstance, arg: LinkedInstance) -> Tuple[Optional[LinkedInstance], LinkedInstance]:
+        # native numbers behave like the std numerals when called
+        #   zero = a -> b -> b;
+        #   succ = n -> s -> s n;
+        if inst.value == 0:
+            return None, self.instantiate_number_zero(path)
+        else:
+            return arg, self.instantiate_number(path, inst.value - 1)
+
+    def evaluate_impl(self, path: Path, impl: Implementation, captures: List[LinkedInstance], stack: List[LinkedInstance], self_inst: Optional[LinkedInstance] = None) -> Tuple[Optional[LinkedInstance], LinkedInstance]:
         match impl:
             case ReturnImplementation() as impl:
-                return None, self.evaluate_literal(path, impl.value, captures)
+                return None, self.evaluate_literal(path, impl.value, captures, self_inst)
             case TailCallImplementation() as impl:
-                fn = self.evaluate_literal(path, impl.fn, captures)
-                arg = self.evaluate_literal(path, impl.arg, captures)
+                fn = self.evaluate_literal(path, impl.fn, captures, self_inst)
+                arg = self.evaluate_literal(path, impl.arg, captures, self_inst)
                 return fn, arg
             case ContinueCallImplementation() as impl:
-                fn = self.evaluate_literal(path, impl.fn, captures)
-                arg = self.evaluate_literal(path, impl.arg, captures)
-                next = self.evaluate_literal(path, impl.next, captures)
+                fn = self.evaluate_literal(path, impl.fn, captures, self_inst)
+                arg = self.evaluate_literal(path, impl.arg, captures, self_inst)
+                next = self.evaluate_literal(path, impl.next, captures, self_inst)
+                stack.append(next)
+                return fn, arg
+            case BranchImplementation() as impl:
+                fn = self.evaluate_literal(path, impl.fn, captures, self_inst)
+                for boolean, on_branch in ((impl.true, impl.on_true), (impl.false, impl.on_false)):
+                    boolean_inst = self.evaluate_literal(path, boolean, captures, self_inst)
+                    if isinstance(fn, LinkedInstance) and isinstance(boolean_inst, LinkedInstance) and fn.impl is boolean_inst.impl:
+                        # the taken branch runs on the captures and self of
+                        # impl, like in the generated code
+                        assert isinstance(on_branch, LinkedImplementationLiteral)
+                        on_impl, _ = self.dedup.dedup_impl(on_branch.impl)
+                        return self.evaluate_impl(path, on_impl, captures, stack, self_inst)
+
+                arg = self.evaluate_literal(path, impl.arg, captures, self_inst)
+                next = self.evaluate_literal(path, impl.next, captures, self_inst)
                 stack.append(next)
                 return fn, arg
             case _:
                 raise OptimizeMLIRError(f"unexpected AST node encountered: {impl}")
 
-    def evaluate_literal(self, path: Path, lit: ValueLiteral, captures: List[LinkedInstance]) -> LinkedInstance:
+    def evaluate_literal(self, path: Path, lit: ValueLiteral, captures: List[LinkedInstance], self_inst: Optional[LinkedInstance] = None) -> LinkedInstance:
         match lit:
             case CaptureLiteral(id):
                 if len(captures) == 0:
                     raise OptimizeCannotEvaluateError("captures not available at compile time")
                 return captures[id]
+            case SelfLiteral():
+                if self_inst is None:
+                    raise OptimizeCannotEvaluateError("self not available at compile time")
+                return self_inst
             case ExternLiteral(name):
                 raise OptimizeCannotEvaluateError("cannot evaluate externs at compile-time")
             case LinkedDefinitionLiteral(defi):
+                if defi.needs_init:
+                    raise OptimizeCannotEvaluateError("definition not initialized at compile time")
                 return defi.inst
             case LinkedInstanceLiteral(inst):
                 return inst
             case LinkedImplementationLiteral(impl, impl_captures):
                 if len(captures) == 0 and impl.captures > 0:
                     raise OptimizeCannotEvaluateError("captures not available at compile time")
-                return self.instantiate(path, impl, impl_captures, captures)
+                return self.instantiate(path, impl, impl_captures, captures, self_inst)
             case _:
                 raise OptimizeMLIRError(f"unexpected AST node encountered: {lit}")
 
@@ -108,18 +360,20 @@ class OptimizeContext:
                 return self.can_optimize_literal(impl.fn)
             case ContinueCallImplementation() as impl:
                 return self.can_optimize_literal(impl.fn)
+            case BranchImplementation() as impl:
+                return False
             case _:
                 raise OptimizeMLIRError(f"unexpected AST node encountered: {impl}")
 
     def can_optimize_literal(self, lit: ValueLiteral) -> bool:
         match lit:
-            case CaptureLiteral() | ExternLiteral():
+            case CaptureLiteral() | SelfLiteral() | ExternLiteral():
                 return False
             case LinkedDefinitionLiteral() | LinkedInstanceLiteral():
                 return True
             case LinkedImplementationLiteral(impl, impl_captures):
                 for cap in impl_captures:
-                    if isinstance(cap, int):
+                    if isinstance(cap, (int, SelfLiteral)):
                         return False
                 return True
             case _:
@@ -153,46 +407,37 @@ class OptimizeContext:
             pass
 
         if res is None:
+            if isinstance(fn, LinkedNumberInstance):
+                raise OptimizeCannotEvaluateError()
+
             captures = [arg]
             captures += fn.captures
             if isinstance(impl, TailCallImplementation):
-                new_impl = self.optimize_substitute_impl(impl, fn.impl, captures)
+                new_impl = self.optimize_substitute_impl(impl, fn.impl, captures, fn)
                 self.dedup.replace_new_impl(new_impl, impl)
                 return new_impl
             elif isinstance(fn.impl, ReturnImplementation):
-                impl.fn = self.optimize_literal(path, fn.impl.value, captures)
-                self.dedup.replace_new_impl(impl, impl)
-                return impl
-            elif isinstance(fn.impl, TailCallImplementation):
-                # NOTE: optimizable only by prepending the fn impl to ours
-                # NOTE: might increase binary size a little if unlucky
-                #   impl b!0!0 = bar baz;
+                # the value is passed on to the continuation
+                #   impl b!0!0 = bar;
                 #   inst a%0 = b!0!0[];
-                #   impl a!0!0 = a%0 foo -> bar;
+                #   impl a!0!0 = a%0 foo -> k[$1];
                 # becomes
-                #   impl a!0!0 = bar baz -> a!0!1;
-                #   impl a!0!1 = $0 foo -> bar;
-                raise OptimizeCannotEvaluateError()
+                #   impl a!0!0 = k[$1] bar;
+                new_impl = TailCallImplementation(*impl_metadata, impl.next, self.optimize_literal(path, fn.impl.value, captures, fn))
+                self.dedup.replace_new_impl(new_impl, impl)
+                return new_impl
             else:
-                # NOTE: optimizable only by prepending the fn impl chain to ours
-                # NOTE: very likely increases binary size by a lot
-                #   impl b!0!0 = bar baz -> b!0!1
-                #   impl b!0!1 = qux qax
-                #   inst a%0 = b!0!0[];
-                #   impl a!0!0 = a%0 foo -> bar;
-                # becomes
-                #   impl a!0!0 = bar baz -> a!0!1
-                #   impl a!0!1 = qux qax -> a!0!2
-                #   impl a!0!2 = $0 foo -> bar
-                raise OptimizeCannotEvaluateError()
+                new_impl = self.prepend_chain(impl, fn.impl, captures, fn)
+                self.dedup.replace_new_impl(new_impl, impl)
+                return new_impl
         elif isinstance(impl, TailCallImplementation):
             new_impl = ReturnImplementation(*impl_metadata, LinkedInstanceLiteral(res))
             self.dedup.replace_new_impl(new_impl, impl)
             return new_impl
-        elif isinstance(impl.next, LinkedInstanceLiteral):
+        elif isinstance(impl.next, LinkedInstanceLiteral) and isinstance(impl.next.inst, LinkedInstance):
             captures = [res]
             captures += impl.next.inst.captures
-            new_impl = self.optimize_substitute_impl(impl, impl.next.inst.impl, captures)
+            new_impl = self.optimize_substitute_impl(impl, impl.next.inst.impl, captures, impl.next.inst)
             self.dedup.replace_new_impl(new_impl, impl)
             return new_impl
         elif isinstance(impl.next, LinkedImplementationLiteral):
@@ -206,69 +451,690 @@ class OptimizeContext:
             self.dedup.replace_new_impl(new_impl, impl)
             return new_impl
 
-    def optimize_substitute_impl(self, old_impl: Implementation, impl: Implementation, captures: List[int | LinkedInstance]) -> Implementation:
+    def prepend_chain(self, impl: ContinueCallImplementation, fn_impl: Implementation, captures: List[int | LinkedInstance], fn: LinkedInstance) -> Implementation:
+        # the continuation chain of the called impl is copied in front of our
+        # continuation, with the captures of our continuation appended to the
+        # captures of every copy, so the copy of the last call continues to
+        # it directly instead of returning through the called chain
+        #   impl b!0!0 = bar baz -> b!0!1[$1];
+        #   impl b!0!1 = qux $1;
+        #   inst a%0 = b!0!0[quux];
+        #   impl a!0!0 = a%0 foo -> k[$1];
+        # becomes
+        #   impl a!0!0 = bar baz -> a!1!0[quux $1];
+        #   impl a!1!0 = qux $1 -> k[$2];
+        # every copied impl takes one impl of the prepend budget
+        path = impl.path.path
+        impl_metadata: Tuple[ImplementationPath, int] = (impl.path, impl.captures)
+        fn_impl, _ = self.dedup.dedup_impl(fn_impl)
+
+        chain: List[Tuple[Implementation, List[int | LinkedInstance | LinkedNumberInstance]]] = []
+        last = fn_impl
+        while isinstance(last, ContinueCallImplementation):
+            closure = self.literal_closure(last.next)
+            if closure is None or len(chain) >= self.prepend_budget or self.uses_self(closure[0]):
+                # the copies are not called with the continuation as self
+                raise OptimizeCannotEvaluateError()
+            chain.append(closure)
+            last = closure[0]
+
+        if not isinstance(last, TailCallImplementation):
+            raise OptimizeCannotEvaluateError()
+
+        moved = self.literal_captures(impl.next)
+
+        following: Optional[Implementation] = None
+        for cont_impl, cont_captures in reversed(chain):
+            width = len(cont_captures)
+            moved_ids: List[int | LinkedInstance | LinkedNumberInstance] = list(range(width + 1, width + 1 + len(moved)))
+            copy: Implementation
+            if isinstance(cont_impl, TailCallImplementation):
+                shifted: List[int | LinkedInstance] = [0] * (max(moved, default = 0) + 1)
+                for i, cap in enumerate(moved):
+                    shifted[cap] = width + 1 + i
+                next = self.optimize_literal(path, impl.next, shifted)
+                copy = ContinueCallImplementation(self.next_impl_path(path), width + len(moved), cont_impl.fn, cont_impl.arg, next)
+            else:
+                assert isinstance(cont_impl, ContinueCallImplementation) and following is not None
+                next_closure = self.literal_closure(cont_impl.next)
+                assert next_closure is not None
+                copy = ContinueCallImplementation(self.next_impl_path(path), width + len(moved), cont_impl.fn, cont_impl.arg,
+                    LinkedImplementationLiteral(following, next_closure[1] + moved_ids)
+                )
+            following = self.synthesize_impl(copy)
+
+        self.prepend_budget -= len(chain)
+
+        head_next: ValueLiteral = impl.next
+        if following is not None:
+            assert isinstance(fn_impl, ContinueCallImplementation)
+            head_closure = self.literal_closure(fn_impl.next)
+            assert head_closure is not None
+            head_captures = [self.substitute_capture(cap, captures, fn) for cap in head_closure[1]]
+            head_next = LinkedImplementationLiteral(following, head_captures + cast(List[int | LinkedInstance | LinkedNumberInstance], moved))
+
+        return ContinueCallImplementation(*impl_metadata,
+            self.optimize_literal(path, fn_impl.fn, captures, fn),
+            self.optimize_literal(path, fn_impl.arg, captures, fn),
+            head_next
+        )
+
+    def literal_captures(self, lit: ValueLiteral) -> List[int]:
+        # the captures of the current impl lit refers to
+        match lit:
+            case CaptureLiteral(id):
+                return [id]
+            case LinkedImplementationLiteral(_, captures):
+                return sorted(set(cap for cap in captures if isinstance(cap, int)))
+
+        return []
+
+    def optimize_substitute_impl(self, old_impl: Implementation, impl: Implementation, captures: List[int | LinkedInstance | SelfLiteral], self_value: Optional[LinkedInstance | SelfLiteral] = None) -> Implementation:
         path = old_impl.path.path
         impl_metadata: Tuple[ImplementationPath, int] = (old_impl.path, old_impl.captures)
         match impl:
             case ReturnImplementation():
                 return ReturnImplementation(*impl_metadata,
-                    self.optimize_literal(path, impl.value, captures)
+                    self.optimize_literal(path, impl.value, captures, self_value)
                 )
             case TailCallImplementation():
                 return TailCallImplementation(*impl_metadata,
-                    self.optimize_literal(path, impl.fn, captures),
-                    self.optimize_literal(path, impl.arg, captures)
+                    self.optimize_literal(path, impl.fn, captures, self_value),
+                    self.optimize_literal(path, impl.arg, captures, self_value)
                 )
             case ContinueCallImplementation():
                 return ContinueCallImplementation(*impl_metadata,
-                    self.optimize_literal(path, impl.fn, captures),
-                    self.optimize_literal(path, impl.arg, captures),
-                    self.optimize_literal(path, impl.next, captures),
+                    self.optimize_literal(path, impl.fn, captures, self_value),
+                    self.optimize_literal(path, impl.arg, captures, self_value),
+                    self.optimize_literal(path, impl.next, captures, self_value),
                 )
+            case BranchImplementation():
+                # the branches are called with the captures of the impl itself
+                raise OptimizeCannotEvaluateError()
             case _:
                 raise OptimizeMLIRError(f"unexpected AST node encountered: {impl}")
 
-    def optimize_literal(self, path: Path, lit: ValueLiteral, captures: List[int | LinkedInstance]) -> ValueLiteral:
+    def optimize_literal(self, path: Path, lit: ValueLiteral, captures: Sequence[int | LinkedInstance | LinkedNumberInstance | SelfLiteral], self_value: Optional[LinkedInstance | SelfLiteral] = None) -> ValueLiteral:
+        # captures map the captures of lit to those of the impl it is moved
+        # to, self_value is what self of lit becomes there
         match lit:
             case CaptureLiteral(id):
                 match captures[id]:
-                    case LinkedInstance() as inst:
+                    case LinkedInstance() | LinkedNumberInstance() as inst:
                         return LinkedInstanceLiteral(inst)
                     case int() as i:
                         return CaptureLiteral(i)
+                    case SelfLiteral():
+                        return SelfLiteral()
                     case other:
                         raise OptimizeMLIRError(f"unexpected AST node encountered: {other}")
+            case SelfLiteral():
+                match self.substitute_capture(lit, captures, self_value):
+                    case LinkedInstance() as inst:
+                        return LinkedInstanceLiteral(inst)
+                    case _:
+                        return SelfLiteral()
             case LinkedImplementationLiteral(impl, impl_captures):
-                new_captures = [captures[cap] if isinstance(cap, int) else cap for cap in impl_captures]
-                if all(isinstance(cap, LinkedInstance) for cap in new_captures):
+                new_captures = [self.substitute_capture(cap, captures, self_value) for cap in impl_captures]
+                if all(isinstance(cap, (LinkedInstance, LinkedNumberInstance)) for cap in new_captures):
                     return LinkedInstanceLiteral(self.instantiate(path, impl, new_captures, []))
                 else:
                     return LinkedImplementationLiteral(impl, new_captures)
-            case LinkedDefinitionLiteral() | LinkedInstanceLiteral():
+            case LinkedDefinitionLiteral() | LinkedInstanceLiteral() | ExternLiteral():
                 return lit
             case _:
                 raise OptimizeMLIRError(f"unexpected AST node encountered: {lit}")
 
-def optimize_mlir(prog: List[Statement], opt_deps: Optional[List[Statement]] = None) -> List[Statement]:
+    def optimize_impl_loop(self, impl: Implementation, try_full: bool = True):
+        try:
+            while self.can_optimize_impl(impl):
+                impl = self.optimize_impl(impl, try_full)
+                try_full = False
+        except OptimizeCannotEvaluateError:
+            # cannot optimize further
+            pass
+
+    def specialize_impl(self, impl: Implementation):
+        # closures capturing static instances next to captures of the current
+        # impl are built from clones of their impl with the static instances
+        # substituted, so they only capture what is not known
+        #   impl a!1!0 = $1 $2;
+        #   impl b!0!0 = foo $1 -> a!1!0[bar%0 $0];
+        # becomes
+        #   impl b!1!0 = bar%0 $1;
+        #   impl b!0!0 = foo $1 -> b!1!0[$0];
+        lits: List[ValueLiteral]
+        match impl:
+            case ReturnImplementation() as impl:
+                lits = [impl.value]
+            case TailCallImplementation() as impl:
+                lits = [impl.fn, impl.arg]
+            case ContinueCallImplementation() as impl:
+                lits = [impl.fn, impl.arg, impl.next]
+            case _:
+                return
+
+        new_lits = [self.specialize_literal(impl.path.path, lit) for lit in lits]
+        if all(new_lit is lit for new_lit, lit in zip(new_lits, lits)):
+            return
+
+        new_impl = type(impl)(impl.path, impl.captures, *new_lits)
+        self.dedup.replace_new_impl(new_impl, impl)
+
+    def specialize_literal(self, path: Path, lit: ValueLiteral) -> ValueLiteral:
+        if not isinstance(lit, LinkedImplementationLiteral) or all(isinstance(cap, int) for cap in lit.captures):
+            return lit
+        if any(isinstance(cap, SelfLiteral) for cap in lit.captures):
+            return lit
+
+        clone = self.specialize_closure(path, lit.impl, lit.captures)
+        if clone is None:
+            return lit
+
+        impl, slots = clone
+        return LinkedImplementationLiteral(impl, cast(List[int | LinkedInstance | LinkedNumberInstance], slots))
+
+    def specialize_instance(self, inst: LinkedInstance):
+        # static closures get their own clone of their impl as well, the
+        # capture of letrec instances on themselves stays a capture
+        #   impl a!1!0 = $1 $0;
+        #   inst b%0 = a!1!0[bar%0];
+        # becomes
+        #   impl b!1!0 = bar%0 $0;
+        #   inst b%0 = b!1!0[];
+        captures = [SELF_CAPTURE if cap is inst else cap for cap in inst.captures]
+        if len(captures) == 0 or all(isinstance(cap, int) for cap in captures):
+            return
+
+        clone = self.specialize_closure(inst.path.path, inst.impl, captures)
+        if clone is None:
+            return
+
+        # the instance keeps its identity, so everything referring to it
+        # calls the clone
+        inst.impl, slots = clone
+        inst.captures = [inst for _ in slots]
+
+    def specialize_closure(self, path: Path, impl: Implementation, captures: List[int | LinkedInstance | LinkedNumberInstance]) -> Optional[Tuple[Implementation, List[int]]]:
+        # clones impl for the static instances in captures, the other
+        # captures become the captures of the clone, repeated ones only once
+        impl, _ = self.dedup.dedup_impl(impl)
+        slots = list(dict.fromkeys(cap for cap in captures if isinstance(cap, int)))
+        mapping: List[int | LinkedInstance] = [0]
+        key: List[Tuple[str, int]] = []
+        for cap in captures:
+            if isinstance(cap, int):
+                mapping.append(slots.index(cap) + 1)
+                key.append(("cap", slots.index(cap)))
+            else:
+                mapping.append(cast(LinkedInstance, cap))
+                key.append(("inst", id(cap)))
+
+        if not self.is_specializable(impl):
+            return None
+
+        clone_key = (id(impl), tuple(key))
+        if clone_key not in self.specializations:
+            if self.specialize_budget <= 0:
+                return None
+            self.specialize_budget -= 1
+
+            stub = ReturnImplementation(self.next_impl_path(path), len(slots), CaptureLiteral(0))
+            clone = self.synthesize_impl(self.optimize_substitute_impl(stub, impl, mapping, SelfLiteral()))
+            self.specializations[clone_key] = clone
+
+            self.optimize_impl_loop(clone)
+            clone, _ = self.dedup.dedup_impl(clone)
+            self.specialize_impl(clone)
+
+        clone, _ = self.dedup.dedup_impl(self.specializations[clone_key])
+        return clone, slots
+
+    def live_instances(self, prog: List[Statement], deps: List[Statement]) -> List[LinkedInstance]:
+        # the instances of the crate that are still used by its definitions
+        # and impls, compile-time evaluation leaves many more behind
+        seen: Set[int] = set(id(stmt) for stmt in deps)
+        live: List[LinkedInstance] = []
+
+        def visit_inst(inst: LinkedInstance | LinkedNumberInstance):
+            inst, _ = self.dedup.dedup_inst(inst)
+            if id(inst) in seen or not isinstance(inst, LinkedInstance):
+                return
+            seen.add(id(inst))
+            live.append(inst)
+
+            visit_impl(inst.impl)
+            for cap in inst.captures:
+                visit_inst(cap)
+
+        def visit_impl(impl: Implementation):
+            impl, _ = self.dedup.dedup_impl(impl)
+            if id(impl) in seen:
+                return
+            seen.add(id(impl))
+
+            match impl:
+                case ReturnImplementation() as impl:
+                    lits = [impl.value]
+                case TailCallImplementation() as impl:
+                    lits = [impl.fn, impl.arg]
+                case ContinueCallImplementation() as impl:
+                    lits = [impl.fn, impl.arg, impl.next]
+                case BranchImplementation() as impl:
+                    lits = [impl.fn, impl.arg, impl.next, impl.true, impl.on_true, impl.false, impl.on_false]
+
+            for lit in lits:
+                match lit:
+                    case LinkedInstanceLiteral(inst):
+                        visit_inst(inst)
+                    case LinkedImplementationLiteral(impl, captures):
+                        visit_impl(impl)
+                        for cap in captures:
+                            if isinstance(cap, (LinkedInstance, LinkedNumberInstance)):
+                                visit_inst(cap)
+                    case LinkedDefinitionLiteral(defi) if not defi.needs_init:
+                        visit_inst(defi.inst)
+
+        for stmt in prog:
+            match stmt:
+                case LinkedDefinition() as defi:
+                    visit_inst(defi.inst)
+                case Implementation() as impl:
+                    visit_impl(impl)
+
+        return live
+
+    def is_specializable(self, impl: Implementation) -> bool:
+        # closures applying their argument to their captures are data like
+        # numbers and pairs, which keep sharing their impls
+        match impl:
+            case TailCallImplementation() | ContinueCallImplementation() as impl:
+                return impl.fn != CaptureLiteral(0)
+
+        return False
+
+    def collapse_impl(self, impl: Implementation):
+        # closures of impls that only forward their argument to a capture or a
+        # static closure are replaced by what they forward to
+        #   impl a!1!0 = $1 $0;
+        #   impl b!0!0 = foo $1 -> a!1!0[$2];
+        # becomes
+        #   impl b!0!0 = foo $1 -> $2;
+        lits: List[ValueLiteral]
+        match impl:
+            case ReturnImplementation() as impl:
+                lits = [impl.value]
+            case TailCallImplementation() as impl:
+                lits = [impl.fn, impl.arg]
+            case ContinueCallImplementation() as impl:
+                lits = [impl.fn, impl.arg, impl.next]
+            case _:
+                return
+
+        new_lits = [self.collapse_literal(lit) for lit in lits]
+        if all(new_lit is lit for new_lit, lit in zip(new_lits, lits)):
+            return
+
+        new_impl = type(impl)(impl.path, impl.captures, *new_lits)
+        self.dedup.replace_new_impl(new_impl, impl)
+
+    def collapse_literal(self, lit: ValueLiteral) -> ValueLiteral:
+        path: Path
+        captures: List[int | LinkedInstance | LinkedNumberInstance]
+        match lit:
+            case LinkedImplementationLiteral(impl, impl_captures):
+                path = impl.path.path
+                impl, _ = self.dedup.dedup_impl(impl)
+                captures = impl_captures
+            case LinkedInstanceLiteral(LinkedInstance() as inst):
+                path = inst.path.path
+                impl, _ = self.dedup.dedup_impl(inst.impl)
+                captures = cast(List[int | LinkedInstance | LinkedNumberInstance], inst.captures)
+            case _:
+                return lit
+
+        target = self.forward_target(impl)
+        if target is None:
+            return lit
+
+        # the unused $0 of the forwarding impl maps to an unused placeholder
+        try:
+            new_lit = self.optimize_literal(path, target, [0] + captures, lit.inst if isinstance(lit, LinkedInstanceLiteral) else None)
+        except OptimizeCannotEvaluateError:
+            # the target captures the closure itself
+            return lit
+        if isinstance(lit, LinkedInstanceLiteral) and isinstance(new_lit, LinkedInstanceLiteral) and new_lit.inst is lit.inst:
+            # letrec instances forwarding to themselves never return
+            return lit
+
+        return self.collapse_literal(new_lit)
+
+    def forward_target(self, impl: Implementation) -> Optional[ValueLiteral]:
+        if not isinstance(impl, TailCallImplementation) or impl.arg != CaptureLiteral(0) or self.uses_arg(impl.fn):
+            return None
+        if not isinstance(impl.fn, (CaptureLiteral, LinkedInstanceLiteral, LinkedImplementationLiteral)):
+            return None
+
+        return impl.fn
+
+    def collapse_definition(self, defi: LinkedDefinition):
+        if defi.needs_init:
+            return
+
+        lit = self.collapse_literal(LinkedInstanceLiteral(defi.inst))
+        assert isinstance(lit, LinkedInstanceLiteral)
+        defi.inst = lit.inst
+
+    def lower_branch(self, impl: Implementation):
+        # the branch idiom cond (x -> a) (x -> b) ident compiles to three
+        # applications, building both branches and a partial application of
+        # the boolean to pick one of them
+        #   impl k!0!0 = $1 k!1!0[$2] -> k!0!1[$3];
+        #   impl k!0!1 = $0 k!2!0[$1] -> k!0!2;
+        #   impl k!0!2 = $0 std::ident%0;
+        # becomes a branch on the impl of the boolean, which runs the taken
+        # branch with the captures of k!0!0 instead of building it, and falls
+        # back to the applications if cond is not one of the std booleans
+        #   impl k!0!0 = $1 k!1!0[$2] -> k!0!1[$3] ? std::true%0 k!0!3[$1 $2 $3] std::ident%0 k!0!4[$1 $2 $3];
+        #   impl k!0!3 = <k!1!0 with $0 = std::ident%0 and $1 = $2>;
+        #   impl k!0!4 = <k!2!0 with $0 = std::ident%0 and $1 = $3>;
+        if self.true is None or self.true.needs_init or self.false is None or self.false.needs_init:
+            return
+        if not isinstance(impl, ContinueCallImplementation) or not isinstance(impl.fn, CaptureLiteral):
+            return
+
+        path = impl.path.path
+        cont = self.literal_closure(impl.next)
+        if cont is None or not isinstance(cont[0], ContinueCallImplementation) or not self.is_result_applied(cont[0]):
+            return
+        if self.uses_self(cont[0]):
+            return
+
+        # the literals of the continuations are moved into the captures of
+        # impl, their unused $0 maps to an unused placeholder
+        cont_impl, cont_captures = cont
+        on_false_fn = self.optimize_literal(path, cont_impl.arg, [0] + cont_captures)
+        last = self.literal_closure(self.optimize_literal(path, cont_impl.next, [0] + cont_captures))
+        if last is None or not self.is_result_applied(last[0]) or self.uses_self(last[0]):
+            return
+
+        last_impl, last_captures = last
+        assert isinstance(last_impl, TailCallImplementation) or isinstance(last_impl, ContinueCallImplementation)
+        arg = self.optimize_literal(path, last_impl.arg, [0] + last_captures)
+        next: Optional[ValueLiteral] = None
+        if isinstance(last_impl, ContinueCallImplementation):
+            next = self.optimize_literal(path, last_impl.next, [0] + last_captures)
+
+        on_true = self.synthesize_branch(impl, impl.arg, arg, next)
+        on_false = self.synthesize_branch(impl, on_false_fn, arg, next)
+
+        # the branches take over the captures of impl as they are
+        self_captures: List[int | LinkedInstance | LinkedNumberInstance] = list(range(1, self.max_capture(impl) + 1))
+        new_impl = BranchImplementation(impl.path, impl.captures, impl.fn, impl.arg, impl.next,
+            LinkedInstanceLiteral(self.true.inst), LinkedImplementationLiteral(on_true, self_captures[:]),
+            LinkedInstanceLiteral(self.false.inst), LinkedImplementationLiteral(on_false, self_captures[:])
+        )
+        self.dedup.replace_new_impl(new_impl, impl)
+
+        self.lower_branch(on_true)
+        self.lower_branch(on_false)
+
+    def synthesize_branch(self, impl: Implementation, fn: ValueLiteral, arg: ValueLiteral, next: Optional[ValueLiteral]) -> Implementation:
+        path = impl.path.path
+        impl_metadata: Tuple[ImplementationPath, int] = (self.next_impl_path(path), impl.captures)
+
+        branch: Implementation
+        if next is not None:
+            branch = ContinueCallImplementation(*impl_metadata, fn, arg, next)
+        else:
+            branch = TailCallImplementation(*impl_metadata, fn, arg)
+
+            # the taken branch is inlined instead of built and called
+            closure = self.literal_closure(fn)
+            arg_capture = self.literal_capture(arg)
+            if closure is not None and arg_capture is not None and not isinstance(closure[0], BranchImplementation) and not self.uses_self(closure[0]):
+                branch = self.optimize_substitute_impl(branch, closure[0], [arg_capture] + closure[1])
+
+        return self.synthesize_impl(branch)
+
+    def inline_call(self, impl: Implementation):
+        # a closure built to be called right away does not escape the call,
+        # the callee gets the only reference to it as self and moves its
+        # captures out before freeing it, so the impl runs the body of the
+        # callee on the captures instead of allocating the closure at all
+        #   impl a!1!0 = $1 $0;
+        #   impl b!0!0 = a!1!0[$2] $1 -> k[$3];
+        # becomes
+        #   impl b!0!0 = $2 $1 -> k[$3];
+        # calls of static closures are inlined as well, so a closure passed
+        # to a callee that only calls it ends up called right away and is
+        # not built either, while one the callee keeps still is
+        #   impl c!0!0 = $0 foo;
+        #   inst c%0 = c!0!0[];
+        #   impl d!0!0 = c%0 a!1!0[$1];
+        # becomes
+        #   impl d!0!0 = $1 foo;
+        new_impl: Implementation = impl
+        for _ in range(MAX_CALL_INLINE_DEPTH):
+            if not isinstance(new_impl, (TailCallImplementation, ContinueCallImplementation)):
+                break
+
+            closure = self.literal_closure(new_impl.fn)
+            if closure is None:
+                break
+            self_value = new_impl.fn.inst if isinstance(new_impl.fn, LinkedInstanceLiteral) else None
+            assert not isinstance(self_value, LinkedNumberInstance)
+            inlined = self.inline_closure(new_impl, closure[0], closure[1], self_value)
+            if inlined is None:
+                break
+            new_impl = inlined
+
+        # the steps in between may equal other impls, which must not be
+        # replaced along with them
+        if new_impl is not impl:
+            self.dedup.replace_new_impl(new_impl, impl)
+
+    def inline_closure(self, impl: TailCallImplementation | ContinueCallImplementation, callee: Implementation, captures: List[int | LinkedInstance | LinkedNumberInstance], self_value: Optional[LinkedInstance] = None) -> Optional[Implementation]:
+        path = impl.path.path
+        impl_metadata: Tuple[ImplementationPath, int] = (impl.path, impl.captures)
+        if self_value is None and self.uses_self(callee):
+            # a callee referring to its own closure needs it built
+            return None
+
+        substitute: Callable[[ValueLiteral], ValueLiteral]
+        arg_capture = self.literal_capture(impl.arg)
+        if arg_capture is not None:
+            frame = cast(List[int | LinkedInstance], [arg_capture] + captures)
+            substitute = lambda lit: self.optimize_literal(path, lit, frame, self_value)
+        elif self.direct_arg_uses(callee) == 1:
+            # other args are only moved to where the callee uses its $0,
+            # which maps to an unused placeholder everywhere else
+            frame = cast(List[int | LinkedInstance], [0] + captures)
+            substitute = lambda lit: impl.arg if lit == CaptureLiteral(0) else self.optimize_literal(path, lit, frame, self_value)
+        else:
+            return None
+
+        next: Optional[ValueLiteral] = impl.next if isinstance(impl, ContinueCallImplementation) else None
+        match callee:
+            case ReturnImplementation() as callee if next is None:
+                return ReturnImplementation(*impl_metadata, substitute(callee.value))
+            case ReturnImplementation() as callee if next is not None:
+                return TailCallImplementation(*impl_metadata, next, substitute(callee.value))
+            case TailCallImplementation() as callee if next is None:
+                return TailCallImplementation(*impl_metadata, substitute(callee.fn), substitute(callee.arg))
+            case TailCallImplementation() as callee if next is not None:
+                return ContinueCallImplementation(*impl_metadata, substitute(callee.fn), substitute(callee.arg), next)
+            case ContinueCallImplementation() as callee if next is None:
+                return ContinueCallImplementation(*impl_metadata, substitute(callee.fn), substitute(callee.arg), substitute(callee.next))
+
+        # continuing a continuation would need its chain prepended, and the
+        # branches are called with the captures of the callee itself
+        return None
+
+    def direct_arg_uses(self, impl: Implementation) -> int:
+        # the number of literals of impl that are its $0, or -1 if a closure
+        # built by impl captures it
+        lits: List[ValueLiteral]
+        match impl:
+            case ReturnImplementation() as impl:
+                lits = [impl.value]
+            case TailCallImplementation() as impl:
+                lits = [impl.fn, impl.arg]
+            case ContinueCallImplementation() | BranchImplementation() as impl:
+                lits = [impl.fn, impl.arg, impl.next]
+            case _:
+                raise OptimizeMLIRError(f"unexpected AST node encountered: {impl}")
+
+        if any(isinstance(lit, LinkedImplementationLiteral) and self.uses_arg(lit) for lit in lits):
+            return -1
+
+        return sum(1 for lit in lits if lit == CaptureLiteral(0))
+
+    def is_result_applied(self, impl: Implementation) -> bool:
+        # whether impl applies its argument to something not depending on it
+        match impl:
+            case TailCallImplementation() as impl:
+                return impl.fn == CaptureLiteral(0) and not self.uses_arg(impl.arg)
+            case ContinueCallImplementation() as impl:
+                return impl.fn == CaptureLiteral(0) and not self.uses_arg(impl.arg) and not self.uses_arg(impl.next)
+
+        return False
+
+    def uses_arg(self, lit: ValueLiteral) -> bool:
+        match lit:
+            case CaptureLiteral(id):
+                return id == 0
+            case LinkedImplementationLiteral(_, captures):
+                return 0 in captures
+
+        return False
+
+    def uses_self(self, impl: Implementation) -> bool:
+        lits: List[ValueLiteral]
+        match impl:
+            case ReturnImplementation() as impl:
+                lits = [impl.value]
+            case TailCallImplementation() as impl:
+                lits = [impl.fn, impl.arg]
+            case ContinueCallImplementation() as impl:
+                lits = [impl.fn, impl.arg, impl.next]
+            case BranchImplementation() as impl:
+                lits = [impl.fn, impl.arg, impl.next, impl.on_true, impl.on_false]
+            case _:
+                raise OptimizeMLIRError(f"unexpected AST node encountered: {impl}")
+
+        for lit in lits:
+            match lit:
+                case SelfLiteral():
+                    return True
+                case LinkedImplementationLiteral(_, captures) if any(isinstance(cap, SelfLiteral) for cap in captures):
+                    return True
+
+        return False
+
+    def max_capture(self, impl: Implementation) -> int:
+        lits: List[ValueLiteral]
+        match impl:
+            case ReturnImplementation() as impl:
+                lits = [impl.value]
+            case TailCallImplementation() as impl:
+                lits = [impl.fn, impl.arg]
+            case ContinueCallImplementation() as impl:
+                lits = [impl.fn, impl.arg, impl.next]
+            case _:
+                raise OptimizeMLIRError(f"unexpected AST node encountered: {impl}")
+
+        max_id = 0
+        for lit in lits:
+            match lit:
+                case CaptureLiteral(id):
+                    max_id = max(max_id, id)
+                case LinkedImplementationLiteral(_, captures):
+                    max_id = max([max_id] + [cap for cap in captures if isinstance(cap, int)])
+
+        return max_id
+
+    def literal_closure(self, lit: ValueLiteral) -> Optional[Tuple[Implementation, List[int | LinkedInstance | LinkedNumberInstance]]]:
+        match lit:
+            case LinkedImplementationLiteral(impl, captures):
+                impl, _ = self.dedup.dedup_impl(impl)
+                return impl, captures
+            case LinkedInstanceLiteral(LinkedInstance() as inst):
+                impl, _ = self.dedup.dedup_impl(inst.impl)
+                return impl, cast(List[int | LinkedInstance | LinkedNumberInstance], inst.captures)
+
+        return None
+
+    def literal_capture(self, lit: ValueLiteral) -> Optional[int | LinkedInstance | LinkedNumberInstance]:
+        match lit:
+            case CaptureLiteral(id):
+                return id
+            case LinkedInstanceLiteral(inst):
+                return inst
+
+        return None
+
+def optimize_mlir(prog: List[Statement], opt_deps: Optional[List[Statement]] = None, snapshot_steps: int = 0, prepend_budget: int = DEFAULT_PREPEND_BUDGET, specialize_budget: int = DEFAULT_SPECIALIZE_BUDGET, roots: Optional[List[Path]] = None) -> List[Statement]:
     deps = opt_deps or []
 
     def visit_program(prog: List[Statement]) -> List[Statement]:
         dedup = DedupMLIRContext.build(deps + prog)
-        ctx = OptimizeContext(dedup)
+        ctx = OptimizeContext(dedup, snapshot_steps, prepend_budget, specialize_budget)
+
+        for stmt in deps + prog:
+            if isinstance(stmt, LinkedDefinition) and stmt.path == FIXPOINT_PATH:
+                ctx.fixpoint = stmt
+            elif isinstance(stmt, LinkedDefinition) and stmt.path == TRUE_PATH:
+                ctx.true = stmt
+            elif isinstance(stmt, LinkedDefinition) and stmt.path == FALSE_PATH:
+                ctx.false = stmt
 
         for stmt in deps + prog:
-            if isinstance(stmt, LinkedInstance):
+            if isinstance(stmt, (LinkedInstance, LinkedNumberInstance)):
                 ctx.bump_inst_id(stmt.path)
+            elif isinstance(stmt, Implementation):
+                ctx.bump_impl_id(stmt.path)
 
         for stmt in prog:
             visit_statement(stmt, ctx)
 
+        for stmt in prog:
+            if isinstance(stmt, Implementation):
+                impl, _ = ctx.dedup.dedup_impl(stmt)
+                ctx.specialize_impl(impl)
+
+        for inst in ctx.live_instances(prog, deps):
+            ctx.specialize_instance(inst)
+
+        clones: List[Statement] = list(ctx.specializations.values())
+
+        for stmt in prog + clones:
+            if isinstance(stmt, Implementation):
+                impl, _ = ctx.dedup.dedup_impl(stmt)
+                ctx.collapse_impl(impl)
+            elif isinstance(stmt, LinkedDefinition):
+                ctx.collapse_definition(stmt)
+
+        for stmt in prog + clones:
+            if isinstance(stmt, Implementation):
+                impl, _ = ctx.dedup.dedup_impl(stmt)
+                ctx.lower_branch(impl)
+
+        # the branches synthesized by lower_branch and the impls of the
+        # crate built by evaluation may call closures as well, but the impls
+        # of deps are emitted with their own crate
+        dep_impls = set(stmt.path for stmt in deps if isinstance(stmt, Implementation))
+        for impl in ctx.dedup.implementations[:]:
+            impl, _ = ctx.dedup.dedup_impl(impl)
+            if impl.path not in dep_impls:
+                ctx.inline_call(impl)
+
         ctx.dedup.deduplicate(ctx.dedup.collect())
-        return ctx.dedup.tree_shake(deps)
+        return ctx.dedup.tree_shake(deps, roots)
 
     def visit_statement(stmt: Statement, ctx: OptimizeContext):
         match stmt:
-            case ExternCrate() | Extern() | LinkedInstance():
+            case ExternCrate() | Extern() | LinkedInstance() | LinkedNumberInstance():
                 pass
             case LinkedDefinition() as defi:
                 ctx.evaluate_definition(defi)
@@ -288,6 +1154,10 @@ def optimize_mlir(prog: List[Statement], opt_deps: Optional[List[Statement]] = N
                 impl.fn = visit_literal(impl.path.path, impl.fn, ctx)
                 impl.arg = visit_literal(impl.path.path, impl.arg, ctx)
                 impl.next = visit_literal(impl.path.path, impl.next, ctx)
+            case BranchImplementation() as impl:
+                impl.fn = visit_literal(impl.path.path, impl.fn, ctx)
+                impl.arg = visit_literal(impl.path.path, impl.arg, ctx)
+                impl.next = visit_literal(impl.path.path, impl.next, ctx)
             case _:
                 raise OptimizeMLIRError(f"unexpected AST node encountered: {impl}")
 
@@ -295,15 +1165,8 @@ def optimize_mlir(prog: List[Statement], opt_deps: Optional[List[Statement]] = N
             ctx.instantiate(impl.path.path, impl, [], [])
 
         impl, _ = ctx.dedup.dedup_impl(impl)
-
-        try:
-            try_full = True
-            while ctx.can_optimize_impl(impl):
-                impl = ctx.optimize_impl(impl, try_full)
-                try_full = False
-        except OptimizeCannotEvaluateError:
-            # cannot optimize further
-            pass
+        impl = ctx.lower_fixpoint(impl)
+        ctx.optimize_impl_loop(impl)
 
     def visit_literal(path: Path, lit: ValueLiteral, ctx: OptimizeContext) -> ValueLiteral:
         match lit:
@@ -311,7 +1174,7 @@ def optimize_mlir(prog: List[Statement], opt_deps: Optional[List[Statement]] = N
                 if not defi.needs_init:
                     return LinkedInstanceLiteral(defi.inst)
             case LinkedImplementationLiteral(impl, captures):
-                if all(isinstance(cap, LinkedInstance) for cap in captures):
+                if all(isinstance(cap, (LinkedInstance, LinkedNumberInstance)) for cap in captures):
                     return LinkedInstanceLiteral(ctx.instantiate(path, impl, captures, []))
 
         return lit
@@ -45,7 +45,8 @@ def pretty_make_deps(main_crate: SourceFile, outfile: str, output_dir: str, file
         print(f"{hlis_src}: {hlir_src}", end="\n\n", file=file)
 
         mlir_src = get_mlir(mod)
-        print(f"{mlir_src}: {hlir_src}", end="\n\n", file=file)
+        mlir_crate_deps = list(map(get_hlir, mod_crate_deps))
+        print(f"{mlir_src}: {hlir_src} {' '.join(mlir_crate_deps)}", end="\n\n", file=file)
 
         mlir_opt_src = get_opt_mlir(mod)
         mlir_opt_crate_deps = list(map(get_opt_mlir, mod_crate_deps))
@@ -60,6 +61,13 @@ def pretty_make_deps(main_crate: SourceFile, outfile: str, output_dir: str, file
     llir_crate_deps = list(map(get_opt_mlir, all_crate_order))
     print(f"{llir_main_src}: {' '.join(llir_crate_deps)}", end="\n\n", file=file)
 
+    # whole-program builds optimize the main crate with all the others
+    whole_src = os.path.join(output_dir, main_crate.name + ".whole.mlir")
+    whole_crate_deps = list(map(get_opt_mlir, all_crate_order[1:]))
+    print(f"{whole_src}: {get_mlir(main_crate)} {' '.join(whole_crate_deps)}", end="\n\n", file=file)
+    print(f"{os.path.join(output_dir, main_crate.name + '.whole.ll')}: {whole_src}", end="\n\n", file=file)
+    print(f"{os.path.join(output_dir, main_crate.name + '.whole.main.ll')}: {whole_src}", end="\n\n", file=file)
+
     print(f"{outfile}: {' '.join(all_mod_deps)}", end="\n\n", file=file)
 
     for dep in all_mod_deps:
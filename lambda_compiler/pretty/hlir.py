@@ -13,10 +13,11 @@ def pretty_hlir(prog: List[Statement], file: TextIO = sys.stdout, stub: bool = F
         match stmt:
             case ExternCrate(crate):
                 print(f"extern crate {crate};", file=file)
-            case Extern(name):
+            case Extern(name, is_impure):
                 if stub:
                     return
-                print(f"extern impure {name};", file=file)
+                is_impure_str = "impure " if is_impure else ""
+                print(f"extern {is_impure_str}{name};", file=file)
             case Assignment(path, value, is_public, is_impure):
                 if stub and not is_public:
                     return
@@ -54,6 +55,8 @@ def pretty_hlir(prog: List[Statement], file: TextIO = sys.stdout, stub: bool = F
                 print(f"{name}", end="", file=file)
             case Absolute(path):
                 print(f"{path}", end="", file=file)
+            case Number(value):
+                print(f"!{value}", end="", file=file)
             case _:
                 raise PrettyHLIRError(f"unexpected AST node encountered: {expr}")
 
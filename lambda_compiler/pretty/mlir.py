@@ -19,6 +19,8 @@ def pretty_mlir(prog: List[Statement], file: TextIO = sys.stdout):
                 visit_definition(defi)
             case Instance() as inst:
                 visit_instance(inst)
+            case NumberInstance() as inst:
+                visit_number_instance(inst)
             case Implementation() as impl:
                 visit_implementation(impl)
             case _:
@@ -41,6 +43,9 @@ def pretty_mlir(prog: List[Statement], file: TextIO = sys.stdout):
         captures = " ".join(f"{cap}" for cap in inst.captures)
         print(f"inst {inst.path} = {impl}[{captures}];", file=file)
 
+    def visit_number_instance(inst: NumberInstance):
+        print(f"inst {inst.path} = !{inst.value};", file=file)
+
     def visit_implementation(impl: Implementation):
         print(f"impl {impl.path} = ", end="", file=file)
 
@@ -51,6 +56,9 @@ def pretty_mlir(prog: List[Statement], file: TextIO = sys.stdout):
                 print(f"{visit_literal(impl.fn)} {visit_literal(impl.arg)};", file=file)
             case ContinueCallImplementation() as impl:
                 print(f"{visit_literal(impl.fn)} {visit_literal(impl.arg)} -> {visit_literal(impl.next)};", file=file)
+            case BranchImplementation() as impl:
+                print(f"{visit_literal(impl.fn)} {visit_literal(impl.arg)} -> {visit_literal(impl.next)} ? ", end="", file=file)
+                print(f"{visit_literal(impl.true)} {visit_literal(impl.on_true)} {visit_literal(impl.false)} {visit_literal(impl.on_false)};", file=file)
             case _:
                 raise PrettyMLIRError(f"unexpected AST node encountered: {impl}")
 
@@ -58,6 +66,8 @@ def pretty_mlir(prog: List[Statement], file: TextIO = sys.stdout):
         match lit:
             case CaptureLiteral(id):
                 return f"${id}"
+            case SelfLiteral():
+                return "self"
             case ExternLiteral(name):
                 return f"{name}"
             case DefinitionLiteral(path):
@@ -70,11 +80,13 @@ def pretty_mlir(prog: List[Statement], file: TextIO = sys.stdout):
             case _:
                 raise PrettyMLIRError(f"unexpected AST node encountered: {lit}")
 
-    def visit_capture(cap: int | InstancePath) -> str:
+    def visit_capture(cap: int | InstancePath | SelfLiteral) -> str:
         match cap:
             case InstancePath():
                 return f"{cap}"
             case int():
                 return f"${cap}"
+            case SelfLiteral():
+                return "self"
 
     visit_program(prog)
@@ -0,0 +1,8 @@
+import sys
+
+# the passes visit Lambda and HLIR expressions recursively, and the expressions
+# of string literals nest as deep as the strings are long
+RECURSION_LIMIT = 100000
+
+def raise_recursion_limit():
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), RECURSION_LIMIT))